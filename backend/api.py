@@ -13,6 +13,9 @@ from typing import List, Optional
 from datetime import datetime
 import uuid
 import shutil
+import hashlib
+import threading
+from collections import OrderedDict
 import numpy as np
 
 # Add parent directory to path for imports
@@ -20,12 +23,24 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from src.core.dashboard_analytics import DashboardAnalytics
 from src.core.academic_evaluator import AcademicEvaluator
+from src.core.fuzzy_search import get_name_index
+from src.core.dataset_profile import batch_fingerprint, get_profile_cache_stats
+from src.core.answer_cache import AnswerCache
+from src.core.similarity_graph import get_similarity_graph
 from src.utils.logger import get_logger
-from config.settings import DOCUMENT_DIR, EXCEL_DIR
+from src.utils.metrics import render_metrics
+from config.settings import (
+    DOCUMENT_DIR,
+    EXCEL_DIR,
+    AI_ANSWER_CACHE_ENABLED,
+    AI_ANSWER_CACHE_SIZE,
+    EMBEDDING_PRELOAD,
+    METRICS_ENABLED,
+)
 
 
 
@@ -56,6 +71,14 @@ app.add_middleware(
 # Initialize logger
 logger = get_logger("api")
 
+# Load the embedding model before a preforking server starts its workers
+if EMBEDDING_PRELOAD:
+    try:
+        from src.core.embedding_backends import preload_embedding_model
+        preload_embedding_model()
+    except ImportError as e:
+        logger.warning(f"Embedding preload skipped: {e}")
+
 # Global evaluator instance
 evaluator = None
 
@@ -106,6 +129,7 @@ class SystemStatus(BaseModel):
     llm_provider: str
     supabase_available: bool
     documents_in_queue: int
+    vector_indexing: Optional[dict] = None
 
 
 # Startup event
@@ -156,6 +180,14 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline latency histograms and counters in Prometheus text format."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/status", response_model=SystemStatus)
 async def get_status():
     """Get system status."""
@@ -185,7 +217,8 @@ async def get_status():
             llm_available=info.get('llm_available', False),
             llm_provider=llm_provider,
             supabase_available=info.get('supabase_available', False),
-            documents_in_queue=doc_count
+            documents_in_queue=doc_count,
+            vector_indexing=info.get('vector_indexing')
         )
     except HTTPException:
         raise
@@ -681,10 +714,22 @@ async def get_academic_alerts(batches: str = ""):
 
 
 @app.get("/api/search/students")
-async def search_students(query: str = "", department: str = "", min_cgpa: float = 0.0, max_cgpa: float = 10.0):
+async def search_students(
+    query: str = "",
+    department: str = "",
+    min_cgpa: float = 0.0,
+    max_cgpa: float = 10.0,
+    fuzzy: bool = False,
+    max_distance: int = 2
+):
     """
     Search students with filters
     NEW: Reads from Supabase database with Excel fallback
+    
+    With fuzzy=true the query is matched against a cached BK-tree index of
+    name tokens and roll numbers, tolerating up to max_distance edits per
+    token (or matching as a prefix), plus plain substring hits; results are
+    ranked by total edit distance.
     """
     try:
         # Check if Supabase is available
@@ -708,6 +753,7 @@ async def search_students(query: str = "", department: str = "", min_cgpa: float
             logger.info(f"Searching across {len(batches)} batches with query: '{query}'")
             
             all_dfs = []
+            loaded_paths = []
             for batch in batches:
                 batch_filename = batch.get('filename')
                 if batch_filename:
@@ -716,6 +762,7 @@ async def search_students(query: str = "", department: str = "", min_cgpa: float
                         try:
                             df_temp = pd.read_excel(batch_path, sheet_name='Student Data')
                             all_dfs.append(df_temp)
+                            loaded_paths.append(batch_path)
                         except Exception as e:
                             logger.warning(f"Failed to read {batch_filename}: {e}")
             
@@ -723,11 +770,29 @@ async def search_students(query: str = "", department: str = "", min_cgpa: float
                 return {"results": [], "count": 0}
             
             df = pd.concat(all_dfs, ignore_index=True)
-            df = df.drop_duplicates(subset=['Roll Number'], keep='last')
+            df = df.drop_duplicates(subset=['Roll Number'], keep='last').reset_index(drop=True)
             
             logger.info(f"Total unique students: {len(df)}")
             
-            if query:
+            match_distances = {}
+            if query and fuzzy:
+                name_index = get_name_index(
+                    batch_fingerprint(loaded_paths),
+                    df['Student Name'].tolist(),
+                    df['Roll Number'].tolist()
+                )
+                ranked = name_index.search(query, max_distance=max_distance)
+                # Plain substring hits stay in the results (e.g. "MCMB0" inside a roll number)
+                contains = (
+                    df['Student Name'].str.contains(query, case=False, na=False, regex=False) |
+                    df['Roll Number'].astype(str).str.contains(query, case=False, na=False, regex=False)
+                )
+                match_distances = dict(ranked)
+                ranked += [(position, 0) for position in df.index[contains] if position not in match_distances]
+                ranked.sort(key=lambda item: item[1])
+                match_distances = dict(ranked)
+                df = df.iloc[[position for position, _ in ranked]]
+            elif query:
                 df = df[
                     df['Student Name'].str.contains(query, case=False, na=False) |
                     df['Roll Number'].astype(str).str.contains(query, case=False, na=False)
@@ -740,7 +805,7 @@ async def search_students(query: str = "", department: str = "", min_cgpa: float
             df = df[(df['CGPA_numeric'] >= min_cgpa) & (df['CGPA_numeric'] <= max_cgpa)]
             
             results = []
-            for _, row in df.iterrows():
+            for position, row in df.iterrows():
                 cgpa_value = 0
                 try:
                     cgpa_raw = row.get('CGPA')
@@ -760,14 +825,17 @@ async def search_students(query: str = "", department: str = "", min_cgpa: float
                         return val
                     return str(val) if val is not None else 'N/A'
                 
-                results.append({
+                student = {
                     "name": sanitize_value(row.get('Student Name')),
                     "roll_number": sanitize_value(row.get('Roll Number')),
                     "department": sanitize_value(row.get('Department')),
                     "cgpa": cgpa_value,
                     "email": sanitize_value(row.get('Email')),
                     "semester": sanitize_value(row.get('Semester'))
-                })
+                }
+                if fuzzy and query:
+                    student["match_distance"] = match_distances.get(position)
+                results.append(student)
             
             logger.info(f"Found {len(results)} matching students (Excel)")
             return {"results": results, "count": len(results), "source": "excel"}
@@ -791,7 +859,23 @@ async def search_students(query: str = "", department: str = "", min_cgpa: float
         students = response.data
         
         # Apply text search filters (client-side)
-        if query:
+        match_distances = {}
+        if query and fuzzy:
+            names = [s.get('student_name') or '' for s in students]
+            rolls = [s.get('roll_number') or '' for s in students]
+            cache_key = "supabase:" + hashlib.sha1(
+                "\x1f".join(names + rolls).encode("utf-8")
+            ).hexdigest()
+            ranked = get_name_index(cache_key, names, rolls).search(query, max_distance=max_distance)
+            # Plain substring hits stay in the results (e.g. "MCMB0" inside a roll number)
+            query_lower = query.lower()
+            seen = {position for position, _ in ranked}
+            ranked += [(position, 0) for position, (name, roll) in enumerate(zip(names, rolls))
+                       if position not in seen and (query_lower in name.lower() or query_lower in roll.lower())]
+            ranked.sort(key=lambda item: item[1])
+            students = [students[position] for position, _ in ranked]
+            match_distances = {id(s): distance for s, (_, distance) in zip(students, ranked)}
+        elif query:
             query_lower = query.lower()
             students = [s for s in students if 
                        query_lower in str(s.get('student_name', '')).lower() or 
@@ -811,6 +895,10 @@ async def search_students(query: str = "", department: str = "", min_cgpa: float
             "semester": s.get('semester', 'N/A')
         } for s in students]
         
+        if fuzzy and query:
+            for result, s in zip(results, students):
+                result["match_distance"] = match_distances.get(id(s))
+        
         logger.info(f"Found {len(results)} matching students (Supabase)")
         return {"results": results, "count": len(results), "source": "supabase"}
         
@@ -819,6 +907,35 @@ async def search_students(query: str = "", department: str = "", min_cgpa: float
         return {"error": str(e), "results": [], "count": 0}
 
 
+@app.get("/api/students/{roll_number}/similar")
+async def get_similar_students(roll_number: str, limit: int = 5):
+    """
+    Students with the most similar academic profiles
+    
+    Served from the precomputed similarity graph
+    (python main.py --mode build-similarity-graph), so the lookup needs
+    neither the vector database nor the embedding model.
+    """
+    try:
+        graph = get_similarity_graph()
+        if graph is None:
+            return {"results": [], "count": 0, "error": "Similarity graph not built"}
+        
+        results = [{
+            "name": hit["metadata"]["student_name"] or 'N/A',
+            "roll_number": hit["metadata"]["roll_number"] or 'N/A',
+            "department": hit["metadata"]["department"] or 'N/A',
+            "cgpa": hit["metadata"]["cgpa"] or 'N/A',
+            "similarity": round(hit["similarity_score"], 4)
+        } for hit in graph.similar(roll_number, max(0, limit))]
+        
+        return {"results": results, "count": len(results), "built_at": graph.built_at}
+        
+    except Exception as e:
+        logger.error(f"Error getting similar students: {e}", exc_info=True)
+        return {"error": str(e), "results": [], "count": 0}
+
+
 @app.get("/api/batches/all")
 async def get_all_batches_with_data():
     """
@@ -892,6 +1009,68 @@ async def get_at_risk_students():
     return {"at_risk_students": at_risk}
 
 # AI Query Backend with Cohere
+_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "*",
+    "Access-Control-Allow-Headers": "*"
+}
+
+# Shared across requests: the agent (model client), recently loaded batch
+# data and answered questions, all keyed by the batch-set fingerprint
+answer_cache = AnswerCache(max_entries=AI_ANSWER_CACHE_SIZE)
+_ai_agent = None
+_ai_agent_lock = threading.Lock()
+_batch_frames: "OrderedDict[str, tuple]" = OrderedDict()
+_BATCH_FRAME_CACHE_SIZE = 4
+
+
+def _get_ai_agent():
+    """Get the shared GeminiAIAgent, creating it on first use"""
+    global _ai_agent
+    if _ai_agent is None:
+        with _ai_agent_lock:
+            if _ai_agent is None:
+                from src.core.gemini_ai_agent import GeminiAIAgent
+                _ai_agent = GeminiAIAgent()
+    return _ai_agent
+
+
+def _load_batch_frame(batch_names: List[str], fingerprint: str):
+    """
+    Load and combine the 'Student Data' sheets of the given batches.
+
+    Returns:
+        Tuple of (combined DataFrame or None, names of batches actually loaded)
+    """
+    import pandas as pd
+
+    cached = _batch_frames.get(fingerprint)
+    if cached is not None:
+        _batch_frames.move_to_end(fingerprint)
+        return cached
+
+    all_dfs = []
+    loaded = []
+    for batch_filename in batch_names:
+        try:
+            df_temp = pd.read_excel(EXCEL_DIR / batch_filename, sheet_name='Student Data')
+            all_dfs.append(df_temp)
+            loaded.append(batch_filename)
+            logger.info(f"Loaded {len(df_temp)} students from {batch_filename}")
+        except Exception as e:
+            logger.warning(f"Failed to read {batch_filename}: {e}")
+
+    if not all_dfs:
+        return None, loaded
+
+    df = pd.concat(all_dfs, ignore_index=True)
+    if len(loaded) == len(batch_names):
+        _batch_frames[fingerprint] = (df, loaded)
+        while len(_batch_frames) > _BATCH_FRAME_CACHE_SIZE:
+            _batch_frames.popitem(last=False)
+    return df, loaded
+
+
 @app.post("/api/ai/query")
 async def ai_query_endpoint(request: dict):
     """
@@ -910,18 +1089,13 @@ async def ai_query_endpoint(request: dict):
         if not query:
             return JSONResponse(
                 content={"error": "No query provided", "response": "Please provide a query."},
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "*",
-                    "Access-Control-Allow-Headers": "*"
-                }
+                headers=_CORS_HEADERS
             )
         
         logger.info(f"AI Query: {query} | Batches: {batch_filenames or 'all'}")
         
-        import pandas as pd
         import json
-        from src.core.gemini_ai_agent import GeminiAIAgent
+        from config.settings import GEMINI_MODEL
         
         # Load batch data for context
         batch_metadata_file = EXCEL_DIR / "batch_metadata.json"
@@ -933,80 +1107,61 @@ async def ai_query_endpoint(request: dict):
                     "timestamp": datetime.now().isoformat(),
                     "query": query
                 },
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "*",
-                    "Access-Control-Allow-Headers": "*"
-                }
+                headers=_CORS_HEADERS
             )
         
-        with open(batch_metadata_file, 'r') as f:
-            metadata = json.load(f)
-        
-        # Load data from all selected batches
-        all_dfs = []
-        batch_names = []
-        
-        if batch_filenames:
-            # Use specified batches
-            for batch_filename in batch_filenames:
-                batch_file = EXCEL_DIR / batch_filename
-                if batch_file.exists():
-                    try:
-                        df_temp = pd.read_excel(batch_file, sheet_name='Student Data')
-                        all_dfs.append(df_temp)
-                        batch_names.append(batch_filename)
-                        logger.info(f"Loaded {len(df_temp)} students from {batch_filename}")
-                    except Exception as e:
-                        logger.warning(f"Failed to read {batch_filename}: {e}")
-        else:
+        if not batch_filenames:
             # Use current batch if none specified
+            with open(batch_metadata_file, 'r') as f:
+                metadata = json.load(f)
             current_batch = metadata.get('current_batch')
-            if current_batch:
-                batch_file = EXCEL_DIR / current_batch
-                if batch_file.exists():
-                    df_temp = pd.read_excel(batch_file, sheet_name='Student Data')
-                    all_dfs.append(df_temp)
-                    batch_names.append(current_batch)
-                    logger.info(f"Loaded {len(df_temp)} students from {current_batch}")
+            batch_filenames = [current_batch] if current_batch else []
         
-        if not all_dfs:
+        batch_names = [b for b in batch_filenames if (EXCEL_DIR / b).exists()]
+        fingerprint = batch_fingerprint([EXCEL_DIR / b for b in batch_names])
+        
+        if batch_names and AI_ANSWER_CACHE_ENABLED:
+            cached = answer_cache.get(query, fingerprint, GEMINI_MODEL, batch_names)
+            if cached is not None:
+                logger.info("AI response served from answer cache")
+                cached["cached"] = True
+                return JSONResponse(content=cached, headers=_CORS_HEADERS)
+        
+        df, loaded_names = _load_batch_frame(batch_names, fingerprint) if batch_names else (None, [])
+        
+        if df is None:
             return JSONResponse(
                 content={
                     "response": "No batch data found or unable to read batch files.",
                     "timestamp": datetime.now().isoformat(),
                     "query": query
                 },
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "*",
-                    "Access-Control-Allow-Headers": "*"
-                }
+                headers=_CORS_HEADERS
             )
         
-        # Combine all dataframes
-        df = pd.concat(all_dfs, ignore_index=True)
-        logger.info(f"Combined total: {len(df)} students from {len(batch_names)} batch(es)")
-        
-        # Initialize Gemini AI Agent
-        ai_agent = GeminiAIAgent()
+        # The answer is cached under the requested batches' fingerprint (the
+        # lookup key); the agent's name index/profile use the data actually loaded
+        frame_key = fingerprint
+        if loaded_names != batch_names:
+            frame_key = batch_fingerprint([EXCEL_DIR / b for b in loaded_names])
+        logger.info(f"Combined total: {len(df)} students from {len(loaded_names)} batch(es)")
         
         # Query with Gemini
-        result = ai_agent.query(
+        result = _get_ai_agent().query(
             question=query,
             df=df,
-            batch_name=f"{len(batch_names)} batches: {', '.join([b.split('_')[-1].replace('.xlsx', '') for b in batch_names])}"
+            batch_name=f"{len(loaded_names)} batches: {', '.join([b.split('_')[-1].replace('.xlsx', '') for b in loaded_names])}",
+            cache_key=frame_key
         )
+        # Visible in cached copies too, so a partial load is not mistaken for the full selection
+        result["loaded_batches"] = loaded_names
         
+        if AI_ANSWER_CACHE_ENABLED and "error" not in result:
+            answer_cache.put(query, fingerprint, GEMINI_MODEL, result)
+        
+        result["cached"] = False
         logger.info(f"AI response generated successfully")
-        return JSONResponse(
-            content=result,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "*",
-                "Access-Control-Allow-Headers": "*"
-            }
-        )
+        return JSONResponse(content=result, headers=_CORS_HEADERS)
         
     except Exception as e:
         logger.error(f"AI Query error: {e}", exc_info=True)
@@ -1016,13 +1171,27 @@ async def ai_query_endpoint(request: dict):
                 "response": f"Sorry, I encountered an error: {str(e)}. Please try again.",
                 "timestamp": datetime.now().isoformat()
             },
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "*",
-                "Access-Control-Allow-Headers": "*"
-            }
+            headers=_CORS_HEADERS
         )
 
+@app.get("/api/ai/cache/stats")
+async def ai_cache_stats():
+    """Hit-rate statistics of the AI answer cache and the dataset profile cache"""
+    return {
+        "enabled": AI_ANSWER_CACHE_ENABLED,
+        "answer_cache": answer_cache.get_stats(),
+        "profile_cache": get_profile_cache_stats(),
+        "loaded_batch_sets": len(_batch_frames)
+    }
+
+@app.delete("/api/ai/cache")
+async def clear_ai_cache():
+    """Drop all cached AI answers and loaded batch data"""
+    answer_cache.clear()
+    _batch_frames.clear()
+    logger.info("AI answer cache cleared")
+    return {"success": True, "message": "AI answer cache cleared"}
+
 @app.post("/api/create-demo-data")
 async def create_demo_data_endpoint():
     """Manually trigger demo data creation (for deployment testing)."""
@@ -0,0 +1,87 @@
+"""
+Document Chunking Benchmark
+Compares the legacy ~500-character whitespace chunker with the token-aware
+sentence chunker on synthetic grade-sheet texts:
+
+- chunk count (fewer chunks = fewer embeddings to compute and store)
+- truncated chunks (longer than the model's token window)
+- recall@k: fraction of fact queries whose source document is among the
+  top-k retrieved chunks
+
+Usage:
+    python benchmarks/chunking_benchmark.py --documents 200 --paragraphs 8
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config.settings import CHUNK_OVERLAP_TOKENS
+from src.core.embedding_backends import create_embedding_backend
+from src.core.text_chunker import TextChunker
+from src.core.vector_db_handler import VectorDBHandler
+from synthetic_data import make_document_text, make_students
+
+
+def make_fact_queries(students, count, seed=3):
+    """Queries about one course result of one student; answer = that student's document."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        index = rng.randrange(len(students))
+        student = students[index]
+        course = rng.choice(student["Courses"])
+        queries.append((f"{student['Student Name']} {course['Course Name']} grade", index))
+    return queries
+
+
+def evaluate(name, chunk_fn, backend, texts, queries, top_k):
+    chunks, owners = [], []
+    for doc_index, text in enumerate(texts):
+        for chunk in chunk_fn(text):
+            chunks.append(chunk)
+            owners.append(doc_index)
+    owners = np.array(owners)
+
+    window = backend.max_seq_length - 2
+    truncated = sum(count > window for count in backend.count_tokens(chunks))
+
+    chunk_vectors = backend.encode(chunks)
+    query_vectors = backend.encode([query for query, _ in queries])
+    scores = query_vectors @ chunk_vectors.T
+    top = np.argsort(-scores, axis=1)[:, :top_k]
+    hits = [expected in set(owners[row]) for row, (_, expected) in zip(top, queries)]
+
+    print(f"  {name:<22} chunks {len(chunks):>6}  ({len(chunks) / len(texts):.2f}/doc)  "
+          f"truncated {truncated:>5}  recall@{top_k} {np.mean(hits):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark character vs token-aware chunking")
+    parser.add_argument("--documents", type=int, default=200, help="Number of grade-sheet texts")
+    parser.add_argument("--paragraphs", type=int, default=8, help="Filler paragraphs per text")
+    parser.add_argument("--queries", type=int, default=200, help="Number of fact queries")
+    parser.add_argument("--top-k", type=int, default=5, help="k for recall@k")
+    parser.add_argument("--backend", default=None, help="Embedding backend (default EMBEDDING_BACKEND)")
+    args = parser.parse_args()
+
+    students = make_students(args.documents)
+    texts = [make_document_text(student, args.paragraphs) for student in students]
+    queries = make_fact_queries(students, args.queries)
+    backend = create_embedding_backend(args.backend)
+
+    legacy = lambda text: VectorDBHandler._chunk_text(text, max_length=500)
+    print(f"\n{len(texts)} documents, {len(queries)} queries, backend {backend.name}")
+    evaluate("chars (500)", legacy, backend, texts, queries, args.top_k)
+    for overlap in sorted({0, CHUNK_OVERLAP_TOKENS}):
+        chunker = TextChunker(backend.count_tokens, backend.max_seq_length - 2, overlap)
+        evaluate(f"tokens (overlap {overlap})", chunker.chunk, backend, texts, queries, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Embedding Backend Throughput/Latency Benchmark
+Measures batch-encoding throughput (texts/sec) and single-query latency
+(p50/p95) for each embedding backend on a synthetic student corpus.
+
+Usage:
+    python benchmarks/embedding_backend_benchmark.py --backends sentence-transformers onnx
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config.settings import EMBEDDING_MODEL_NAME
+from src.core.embedding_backends import BACKENDS, create_embedding_backend, embedding_backend_available
+from synthetic_data import make_queries, make_student_texts, make_students
+
+
+def benchmark_backend(name, texts, queries, batch_sizes, repeats):
+    load_start = time.perf_counter()
+    backend = create_embedding_backend(name, EMBEDDING_MODEL_NAME)
+    load_time = time.perf_counter() - load_start
+    backend.encode(texts[:8])  # warm up
+
+    print(f"\n{name}  (load {load_time:.2f}s, {backend.dimension} dims)")
+    for batch_size in batch_sizes:
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            backend.encode(texts, batch_size=batch_size)
+            best = min(best, time.perf_counter() - start)
+        print(f"  batch {batch_size:>4}: {len(texts) / best:10.1f} texts/sec")
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        backend.encode(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"  query latency: p50 {np.percentile(latencies, 50):.2f} ms, "
+          f"p95 {np.percentile(latencies, 95):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), help="Backends to benchmark")
+    parser.add_argument("--students", type=int, default=1000, help="Corpus size")
+    parser.add_argument("--queries", type=int, default=200, help="Single-query latency samples")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64], help="Batch sizes to test")
+    parser.add_argument("--repeats", type=int, default=3, help="Repeats per batch size (best is reported)")
+    args = parser.parse_args()
+
+    texts = make_student_texts(make_students(args.students))
+    queries = make_queries(args.queries)
+
+    for name in args.backends:
+        if not embedding_backend_available(name):
+            print(f"\n{name}: dependencies not installed, skipped")
+            continue
+        try:
+            benchmark_backend(name, texts, queries, args.batch_sizes, args.repeats)
+        except FileNotFoundError as e:
+            print(f"\n{name}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Embedding Backend Parity Check
+Encodes a synthetic student corpus with the torch (sentence-transformers)
+backend and the ONNX backend and reports how closely they agree:
+per-text cosine similarity and top-k search overlap.
+
+Exits with status 1 when the mean cosine falls below --threshold.
+
+Usage:
+    python benchmarks/embedding_parity_check.py --students 500 --threshold 0.99
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config.settings import EMBEDDING_MODEL_NAME, EMBEDDING_ONNX_DIR
+from src.core.embedding_backends import OnnxEmbeddingBackend, SentenceTransformerBackend
+from synthetic_data import make_queries, make_student_texts, make_students
+
+
+def top_k_overlap(reference: np.ndarray, candidate: np.ndarray, queries_ref: np.ndarray,
+                  queries_cand: np.ndarray, k: int) -> float:
+    """Mean fraction of shared top-k results between the two backends."""
+    ref_top = np.argsort(-(queries_ref @ reference.T), axis=1)[:, :k]
+    cand_top = np.argsort(-(queries_cand @ candidate.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ONNX embeddings against sentence-transformers")
+    parser.add_argument("--students", type=int, default=500, help="Number of synthetic students")
+    parser.add_argument("--queries", type=int, default=50, help="Number of search queries")
+    parser.add_argument("--top-k", type=int, default=5, help="k for the search overlap check")
+    parser.add_argument("--threshold", type=float, default=0.99, help="Minimum mean cosine similarity")
+    parser.add_argument("--onnx-dir", default=str(EMBEDDING_ONNX_DIR), help="Directory of the ONNX model")
+    parser.add_argument("--float", action="store_true", help="Check the float ONNX model instead of int8")
+    args = parser.parse_args()
+
+    texts = make_student_texts(make_students(args.students))
+    queries = make_queries(args.queries)
+
+    reference = SentenceTransformerBackend(EMBEDDING_MODEL_NAME)
+    candidate = OnnxEmbeddingBackend(EMBEDDING_MODEL_NAME, args.onnx_dir, quantized=not args.float)
+
+    ref_docs, cand_docs = reference.encode(texts), candidate.encode(texts)
+    ref_queries, cand_queries = reference.encode(queries), candidate.encode(queries)
+
+    # Both backends return L2-normalized vectors, so the dot product is the cosine
+    cosines = np.concatenate([(ref_docs * cand_docs).sum(axis=1), (ref_queries * cand_queries).sum(axis=1)])
+    overlap = top_k_overlap(ref_docs, cand_docs, ref_queries, cand_queries, args.top_k)
+
+    print(f"\nParity: sentence-transformers vs onnx ({candidate.model_path.name})")
+    print(f"  texts compared:      {len(cosines)}")
+    print(f"  cosine mean:         {cosines.mean():.5f}")
+    print(f"  cosine min:          {cosines.min():.5f}")
+    print(f"  cosine p1:           {np.percentile(cosines, 1):.5f}")
+    print(f"  top-{args.top_k} overlap:       {overlap:.3f}")
+
+    passed = cosines.mean() >= args.threshold
+    print(f"\n{'PASS' if passed else 'FAIL'} (threshold {args.threshold})")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
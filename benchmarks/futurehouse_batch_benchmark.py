@@ -0,0 +1,105 @@
+"""
+FutureHouse Batch Evaluation Benchmark
+Runs FutureHouseClient.batch_evaluate against the local API stub
+(futurehouse_stub.py) under clean, faulty and outage conditions, plus a
+cached re-grade and offline (local scorer) grading, and reports throughput,
+fallback rate and retries.
+
+Usage:
+    python benchmarks/futurehouse_batch_benchmark.py --answers 200 --latency 0.2 --workers 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault("FUTUREHOUSE_API_KEY", "stub")
+# Measure the API path; the cached re-grade passes its own in-memory cache
+os.environ["FUTUREHOUSE_CACHE_ENABLED"] = "false"
+
+from src.core.evaluation_cache import EvaluationCache
+from src.core.futurehouse_client import CircuitBreaker, FutureHouseClient
+from futurehouse_stub import StubFutureHouseServer
+
+WORDS = ("energy force mass momentum entropy photon electron field wave "
+         "reaction enzyme cell membrane protein gradient equilibrium").split()
+
+
+def make_answers(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    return [
+        {
+            "question": f"Question {i % 10 + 1}",
+            "answer": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 80))),
+            "max_marks": 10.0,
+        }
+        for i in range(count)
+    ]
+
+
+def run(label, stub, answers, workers, retries, deadline=900.0, breaker_threshold=None, cache=None, offline=False):
+    stub.reset_counts()
+    client = FutureHouseClient(max_workers=workers, max_retries=retries, base_url=stub.base_url, cache=cache)
+    if offline:
+        client.available = False
+    if breaker_threshold is not None:
+        client.breakers["crow"] = CircuitBreaker(threshold=breaker_threshold)
+
+    start = time.perf_counter()
+    results = client.batch_evaluate(answers, deadline_seconds=deadline)
+    elapsed = time.perf_counter() - start
+
+    fallbacks = sum(1 for r in results if r.get("error"))
+    print(f"  {label:<34} {elapsed:7.2f}s  {len(answers) / elapsed:8.1f} ans/s  "
+          f"fallbacks {fallbacks:>4} ({fallbacks / len(answers):5.1%})  "
+          f"retries {client.get_stats()['retries']:>4}  requests {stub.counts['requests']:>5}  "
+          f"connections {len(stub.connections)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FutureHouse batch evaluation offline")
+    parser.add_argument("--answers", type=int, default=200, help="Answers per batch")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub seconds per request")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests")
+    parser.add_argument("--rate-429", type=float, default=0.1, help="Fraction of 429s in the faulty run")
+    parser.add_argument("--rate-5xx", type=float, default=0.1, help="Fraction of 503s in the faulty run")
+    args = parser.parse_args()
+
+    answers = make_answers(args.answers)
+    serial_count = min(len(answers), 40)
+
+    with StubFutureHouseServer(latency=args.latency, retry_after=0.2) as stub:
+        print("\nClean API")
+        run(f"serial ({serial_count} answers)", stub, answers[:serial_count], workers=1, retries=0)
+        run(f"concurrent x{args.workers}", stub, answers, workers=args.workers, retries=0)
+
+        print(f"\nFaults ({args.rate_429:.0%} 429 with Retry-After, {args.rate_5xx:.0%} 503)")
+        stub.rate_429, stub.rate_5xx = args.rate_429, args.rate_5xx
+        run("no retries", stub, answers, workers=args.workers, retries=0)
+        run("retries + backoff", stub, answers, workers=args.workers, retries=3)
+        run("retries + 5s batch deadline", stub, answers, workers=args.workers, retries=3, deadline=5.0)
+
+        print("\nRe-grade with the result cache (10% of answers changed)")
+        stub.rate_429, stub.rate_5xx = 0.0, 0.0
+        cache = EvaluationCache(path=None)
+        run("first grading", stub, answers, workers=args.workers, retries=3, cache=cache)
+        changed = [dict(a, answer=a["answer"] + " revised") if i % 10 == 0 else a for i, a in enumerate(answers)]
+        run("re-grade", stub, changed, workers=args.workers, retries=3, cache=cache)
+
+        print("\nFull outage (every request 503)")
+        stub.rate_429, stub.rate_5xx, stub.outage = 0.0, 0.0, True
+        run("retries, breaker disabled", stub, answers, workers=args.workers, retries=3,
+            breaker_threshold=10 ** 9)
+        run("retries, circuit breaker", stub, answers, workers=args.workers, retries=3)
+
+        print("\nOffline (no API key: every answer scored by the local scorer)")
+        run("local scorer", stub, answers, workers=args.workers, retries=3, offline=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Local FutureHouse API Stub
+Threaded HTTP server answering the FutureHouseClient endpoints
+(/v1/<model>/evaluate, /compare, /analyze-research) with configurable
+latency and injected faults, so batch throughput and the retry/circuit
+breaker behaviour can be measured offline.
+
+Usage (standalone):
+    python benchmarks/futurehouse_stub.py --port 8765 --latency 0.5 --rate-429 0.1 --rate-5xx 0.05
+    FUTUREHOUSE_API_KEY=stub  # then point FutureHouseClient(base_url="http://127.0.0.1:8765/v1") at it
+
+Usage (in a script):
+    with StubFutureHouseServer(latency=0.2, rate_5xx=0.1) as stub:
+        client = FutureHouseClient(base_url=stub.base_url)
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Ignores clients that hang up mid-response (request timeouts, batch deadlines)."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubFutureHouseServer:
+    """FutureHouse API stand-in running on a background thread."""
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.0,
+        rate_429: float = 0.0,
+        rate_5xx: float = 0.0,
+        retry_after: float = 1.0,
+        port: int = 0,
+        seed: int = 0
+    ):
+        """
+        Configure the stub.
+
+        Args:
+            latency: Seconds each request takes
+            jitter: Extra uniform random latency (0..jitter seconds)
+            rate_429: Fraction of requests answered 429 with Retry-After
+            rate_5xx: Fraction of requests answered 503
+            retry_after: Retry-After value sent with 429 responses
+            port: Port to bind (0 picks a free one)
+            seed: Random seed for fault injection
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.outage = False  # answer every request with 503 while set
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"requests": 0, "ok": 0, "429": 0, "5xx": 0}
+        self.connections = set()
+
+        self._server = _QuietHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def start(self) -> "StubFutureHouseServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="futurehouse-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubFutureHouseServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {key: 0 for key in self.counts}
+            self.connections = set()
+
+    def _outcome(self, client_address) -> str:
+        with self._lock:
+            self.counts["requests"] += 1
+            self.connections.add(client_address)
+            roll = self._random.random()
+            if self.outage or roll < self.rate_5xx:
+                outcome = "5xx"
+            elif roll < self.rate_5xx + self.rate_429:
+                outcome = "429"
+            else:
+                outcome = "ok"
+            self.counts[outcome] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+        return outcome
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                payload = json.loads(body or b"{}")
+                outcome = stub._outcome(self.client_address)
+                if outcome == "429":
+                    self._send(429, {"error": "rate limited"}, {"Retry-After": f"{stub.retry_after:g}"})
+                elif outcome == "5xx":
+                    self._send(503, {"error": "service unavailable"})
+                else:
+                    self._send(200, _response_for(self.path, payload))
+
+            def _send(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def _response_for(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Deterministic fake model output for an endpoint."""
+    if path.endswith("/evaluate"):
+        answer = payload.get("student_answer") or ""
+        max_marks = float(payload.get("max_marks") or 10.0)
+        score = round(max_marks * min(1.0, len(answer.split()) / 60), 2)
+        return {"score": score, "feedback": "Stub evaluation", "confidence": "high"}
+    if path.endswith("/compare"):
+        return {"rankings": [a.get("student_id") for a in payload.get("answers", [])]}
+    if path.endswith("/analyze-research"):
+        return {"overall_score": 7.5, "feedback": "Stub analysis"}
+    return {"error": "unknown endpoint"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local FutureHouse API stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency (seconds)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429")
+    args = parser.parse_args()
+
+    stub = StubFutureHouseServer(args.latency, args.jitter, args.rate_429, args.rate_5xx,
+                                 args.retry_after, port=args.port).start()
+    print(f"FutureHouse stub listening on {stub.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
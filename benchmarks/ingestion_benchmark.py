@@ -0,0 +1,346 @@
+"""
+End-to-End Ingestion Benchmark
+Generates a synthetic corpus of UOH grade-sheet PDFs (text layer, scanned
+image, and mixed text/scanned pages; 1-15 pages, varying course counts)
+and runs AcademicEvaluator.process_batch_documents over the first 10, 100
+and 1000 of them against a mocked LLM. Each size runs in a fresh process
+and reports docs/sec, p50/p95 per stage (from the per-document trace
+spans) and peak RSS. Results are saved as JSON so runs can be compared
+across commits:
+
+    python benchmarks/ingestion_benchmark.py --sizes 10,100,1000
+    python benchmarks/ingestion_benchmark.py --sizes 10,100 --compare benchmarks/results/ingestion_<commit>_<time>.json
+
+Scanned pages need the tesseract binary; without it the corpus is text-only
+unless --kinds is given explicitly. Supabase and vector indexing are off.
+The Excel stage re-reads and rewrites the batch workbook for every
+document, so the 1000-document size runs for a long time; use
+--sizes 10,100 for a quick check.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ["USE_SUPABASE"] = "false"
+os.environ["VECTOR_INDEXING_ENABLED"] = "false"
+os.environ["TRACING_ENABLED"] = "true"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import fitz  # PyMuPDF
+
+from synthetic_data import DEPARTMENTS, FIRST_NAMES, GRADES, LAST_NAMES
+
+RESULTS_DIR = Path(__file__).parent / "results"
+KINDS = ("text", "scanned", "mixed")
+CREDITS = (2, 3, 4)
+
+
+def make_grade_sheet(index: int, kind: str, rng: random.Random) -> Dict[str, Any]:
+    """One student's grade sheet: identity, per-semester course tables, one page per semester."""
+    code = rng.choice(list(DEPARTMENTS))
+    department, course_names = DEPARTMENTS[code]
+    pages = rng.randint(1, 15)
+    student = {
+        "Student Name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "Roll Number": f"2{rng.randint(0, 4)}{code}{1000 + index}",
+        "Department": department,
+        "Program": rng.choice(["M.Sc.", "M.Tech.", "Integrated M.Sc.", "Ph.D."]),
+    }
+    page_texts = []
+    for semester in range(1, pages + 1):
+        lines = [
+            "UNIVERSITY OF HYDERABAD",
+            "SCHOOL OF " + department.upper(),
+            f"STATEMENT OF GRADES - SEMESTER {semester}",
+            "",
+            f"Name: {student['Student Name']}",
+            f"Roll No: {student['Roll Number']}",
+            f"Programme: {student['Program']} {department}",
+            "",
+            "Course Code   Course Title                     Credits   Grade",
+        ]
+        for j in range(rng.randint(3, 9)):
+            name = rng.choice(course_names)
+            lines.append(f"{code}{100 * semester + j:<10} {name:<32} {rng.choice(CREDITS):>7}   {rng.choice(GRADES)}")
+        lines += ["", f"SGPA: {rng.uniform(5.0, 10.0):.2f}    CGPA: {rng.uniform(5.0, 10.0):.2f}",
+                  "", "Controller of Examinations"]
+        page_texts.append("\n".join(lines))
+    return {"filename": f"{kind}_{index:05d}.pdf", "kind": kind, "pages": page_texts}
+
+
+def write_pdf(sheet: Dict[str, Any], path: Path, rng: random.Random):
+    """Text pages keep their text layer; scanned pages are rasterized to an image-only page."""
+    document = fitz.open()
+    for number, text in enumerate(sheet["pages"]):
+        scanned = sheet["kind"] == "scanned" or (sheet["kind"] == "mixed" and number % 2 == 1)
+        if not scanned:
+            page = document.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 560, 800), text, fontsize=9, fontname="cour")
+            continue
+        source = fitz.open()
+        source_page = source.new_page()
+        source_page.insert_textbox(fitz.Rect(50, 50, 560, 800), text, fontsize=9, fontname="cour")
+        pixmap = source_page.get_pixmap(dpi=rng.choice((150, 200)))
+        page = document.new_page()
+        page.insert_image(page.rect, pixmap=pixmap)
+        source.close()
+    document.save(str(path))
+    document.close()
+
+
+def make_corpus(directory: Path, count: int, kinds: List[str], seed: int = 13) -> List[str]:
+    """Generate ``count`` PDFs cycling through ``kinds``; returns filenames in order."""
+    rng = random.Random(seed)
+    filenames = []
+    for i in range(count):
+        sheet = make_grade_sheet(i, kinds[i % len(kinds)], rng)
+        write_pdf(sheet, directory / sheet["filename"], rng)
+        filenames.append(sheet["filename"])
+    return filenames
+
+
+def tesseract_available() -> bool:
+    return shutil.which("tesseract") is not None
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+# ---------------------------------------------------------------------------
+# Child process: one corpus size
+# ---------------------------------------------------------------------------
+
+def make_mock_analyzer(latency: float):
+    """AcademicLLMAnalyzer whose Gemini call is replaced by a local, deterministic one."""
+    from src.core.academic_llm_analyzer import AcademicLLMAnalyzer
+
+    course_line = re.compile(r"^([A-Z]{2}\d+)\s+(.+?)\s+(\d)\s+([A-D][+]?)\s*$", re.MULTILINE)
+
+    class MockLLMAnalyzer(AcademicLLMAnalyzer):
+        def __init__(self):
+            self.gemini_client = None
+            self.cohere_client = None
+            self.gemini_available = True
+            self.cohere_available = False
+            self.current_provider = "gemini"
+            self.quota_exceeded = False
+            self.gemini_calls = 0
+            self.cohere_calls = 0
+
+        def _call_gemini(self, prompt: str):
+            # Answer from the document text, like a well-behaved model would
+            time.sleep(latency)
+            text = prompt.split("Document text:", 1)[-1]
+            name = re.search(r"Name:\s*(.+)", text)
+            roll = re.search(r"Roll No:\s*(\S+)", text)
+            cgpa = re.findall(r"CGPA:\s*([\d.]+)", text)
+            response = {
+                "Student Name": name.group(1).strip() if name else None,
+                "Roll Number": roll.group(1) if roll else None,
+                "CGPA": cgpa[-1] if cgpa else None,
+                "Courses": [
+                    {"Course Code": c, "Course Name": n.strip(), "Credits": int(cr), "Grade": g}
+                    for c, n, cr, g in course_line.findall(text)
+                ],
+            }
+            self.gemini_calls += 1
+            return json.dumps(response), {"provider": "gemini", "model": "mock",
+                                          "total_tokens": len(prompt) // 4, "prompt_version": "mock"}
+
+    return MockLLMAnalyzer()
+
+
+def run_child(args) -> Dict[str, Any]:
+    """Process the first ``args.child`` corpus documents and measure them."""
+    from src.core.academic_evaluator import AcademicEvaluator
+    from src.utils.tracing import get_tracer, load_traces
+
+    work_dir = Path(args.work_dir)
+    filenames = json.loads((work_dir / "corpus.json").read_text())[:args.child]
+    paths = [work_dir / "corpus" / name for name in filenames]
+
+    evaluator = AcademicEvaluator()
+    evaluator.llm_analyzer = make_mock_analyzer(args.llm_latency)
+    evaluator.llm_available = True
+    excel_dir = work_dir / f"excel_{args.child}"
+    excel_dir.mkdir(exist_ok=True)
+    evaluator.excel_handler.excel_dir = excel_dir
+    evaluator.excel_handler.batch_metadata_file = excel_dir / "batch_metadata.json"
+    evaluator.excel_handler.batch_metadata = {"batches": [], "current_batch": None}
+
+    start = time.perf_counter()
+    results, _ = evaluator.process_batch_documents(paths, batch_name=f"bench_{args.child}")
+    seconds = time.perf_counter() - start
+
+    durations: Dict[str, List[float]] = {}
+    for spans in load_traces(get_tracer().path):
+        for span in spans:
+            provider = next((a["value"].get("stringValue") for a in span.get("attributes", [])
+                             if a["key"] == "provider"), None)
+            label = f"{span['name']}[{provider}]" if provider else span["name"]
+            seconds_taken = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e9
+            durations.setdefault(label, []).append(seconds_taken)
+
+    succeeded = sum(1 for r in results if r.get("_metadata", {}).get("processing_success"))
+    return {
+        "documents": len(paths),
+        "seconds": round(seconds, 3),
+        "docs_per_sec": round(len(paths) / seconds, 3) if seconds else 0.0,
+        "succeeded": succeeded,
+        "failed": len(paths) - succeeded,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {
+            label: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "total_s": round(sum(values), 3),
+            }
+            for label, values in sorted(durations.items())
+        },
+    }
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ---------------------------------------------------------------------------
+# Parent: corpus, per-size processes, report
+# ---------------------------------------------------------------------------
+
+def git_commit() -> str:
+    try:
+        root = Path(__file__).parent.parent
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except Exception:
+        return "unknown"
+
+
+def run_size(size: int, work_dir: Path, llm_latency: float) -> Dict[str, Any]:
+    output = work_dir / f"result_{size}.json"
+    env = dict(os.environ, TRACE_FILE=str(work_dir / f"traces_{size}.jsonl"))
+    subprocess.run(
+        [sys.executable, __file__, "--child", str(size), "--work-dir", str(work_dir),
+         "--llm-latency", str(llm_latency), "--child-output", str(output)],
+        env=env, check=True
+    )
+    return json.loads(output.read_text())
+
+
+def print_run(run: Dict[str, Any], previous: Dict[str, Any] = None):
+    def delta(new, old, higher_is_better):
+        if not old:
+            return ""
+        change = (new - old) / old
+        if abs(change) < 0.05:
+            return f" ({change:+.0%})"
+        better = change > 0 if higher_is_better else change < 0
+        return f" ({change:+.0%} {'better' if better else 'worse'})"
+
+    print(f"\n  {run['documents']} documents: {run['seconds']:.2f}s, {run['docs_per_sec']:.2f} docs/sec"
+          f"{delta(run['docs_per_sec'], previous and previous['docs_per_sec'], True)}, "
+          f"{run['failed']} failed, peak RSS {run['peak_rss_mb']:.0f} MB"
+          f"{delta(run['peak_rss_mb'], previous and previous['peak_rss_mb'], False)}")
+    print(f"    {'stage':<24} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'total s':>9}")
+    for label, stage in run["stages"].items():
+        old = (previous or {}).get("stages", {}).get(label)
+        print(f"    {label:<24} {stage['count']:>7} {stage['p50_ms']:>10.1f} {stage['p95_ms']:>10.1f} "
+              f"{stage['total_s']:>9.2f}{delta(stage['p95_ms'], old and old['p95_ms'], False)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end document ingestion")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated corpus sizes")
+    parser.add_argument("--kinds", help="Comma-separated document kinds (text,scanned,mixed); "
+                                        "default all if tesseract is installed, else text")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Mocked LLM seconds per call")
+    parser.add_argument("--output", type=Path, help="Results JSON (default benchmarks/results/ingestion_<commit>_<time>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to compare against")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        Path(args.child_output).write_text(json.dumps(run_child(args)))
+        return
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    if args.kinds:
+        kinds = [kind.strip() for kind in args.kinds.split(",")]
+        if any(kind not in KINDS for kind in kinds):
+            parser.error(f"--kinds must be chosen from {', '.join(KINDS)}")
+    else:
+        kinds = list(KINDS) if tesseract_available() else ["text"]
+        if kinds == ["text"]:
+            print("tesseract not installed: text-layer corpus only (pass --kinds to override)")
+
+    previous_runs = {}
+    if args.compare:
+        previous_runs = {run["documents"]: run for run in json.loads(args.compare.read_text())["runs"]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        (work_dir / "corpus").mkdir()
+        start = time.perf_counter()
+        filenames = make_corpus(work_dir / "corpus", sizes[-1], kinds)
+        (work_dir / "corpus.json").write_text(json.dumps(filenames))
+        print(f"Generated {len(filenames)} grade sheets ({', '.join(kinds)}) in {time.perf_counter() - start:.1f}s; "
+              f"mocked LLM latency {args.llm_latency}s")
+
+        runs = []
+        for size in sizes:
+            run = run_size(size, work_dir, args.llm_latency)
+            runs.append(run)
+            print_run(run, previous_runs.get(size))
+
+    results = {
+        "benchmark": "ingestion",
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": {"sizes": sizes, "kinds": kinds, "llm_latency": args.llm_latency},
+        "runs": runs,
+    }
+    output = args.output or RESULTS_DIR / f"ingestion_{results['commit']}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
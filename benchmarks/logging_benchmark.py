@@ -0,0 +1,84 @@
+"""
+Logging Throughput Benchmark
+Measures how long worker threads spend inside logger calls with
+synchronous sinks, loguru's multiprocessing enqueue, and the in-process
+BackgroundLogWriter, against a sink with configurable write latency
+(simulating a slow or contended disk).
+
+Usage:
+    python benchmarks/logging_benchmark.py --threads 8 --messages 500 --write-ms 0.5
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+from src.utils.logger import BackgroundLogWriter
+
+
+class SlowSink:
+    """Stream whose writes take a fixed time."""
+
+    def __init__(self, write_seconds: float):
+        self.write_seconds = write_seconds
+        self.lines = 0
+
+    def write(self, message):
+        time.sleep(self.write_seconds)
+        self.lines += 1
+
+    def flush(self):
+        pass
+
+
+def run(label, mode, threads, messages, write_seconds):
+    logger.remove()
+    sink = SlowSink(write_seconds)
+    writer = None
+    if mode == "background":
+        writer = BackgroundLogWriter()
+        logger.add(writer.add(sink), format="{message}")
+    else:
+        logger.add(sink, format="{message}", enqueue=(mode == "enqueue"))
+
+    def work():
+        for i in range(messages):
+            logger.info(f"Page {i}: direct text extraction successful")
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    in_callers = time.perf_counter() - start
+
+    if writer is not None:
+        writer.close(timeout=600)
+    logger.complete()
+    drained = time.perf_counter() - start
+    total = threads * messages
+    print(f"  {label:<28} callers {in_callers:7.2f}s ({in_callers / total * 1e6:8.1f} us/msg)  "
+          f"all written after {drained:7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark logging sink modes")
+    parser.add_argument("--threads", type=int, default=8, help="Logging threads")
+    parser.add_argument("--messages", type=int, default=500, help="Messages per thread")
+    parser.add_argument("--write-ms", type=float, default=0.5, help="Sink write latency (ms)")
+    args = parser.parse_args()
+
+    print(f"\n{args.threads} threads x {args.messages} messages, {args.write_ms} ms per sink write")
+    run("synchronous", "sync", args.threads, args.messages, args.write_ms / 1000)
+    run("loguru enqueue=True", "enqueue", args.threads, args.messages, args.write_ms / 1000)
+    run("BackgroundLogWriter", "background", args.threads, args.messages, args.write_ms / 1000)
+    logger.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Answer-Script Grading Benchmark
+Generates synthetic answer-script PDFs (text layer, so no Tesseract is
+needed) and grades them with ScriptGrader against the local FutureHouse
+stub, reporting scripts/minute for serial and concurrent runs and the
+cost of resuming a finished run.
+
+Usage:
+    python benchmarks/script_grading_benchmark.py --scripts 40 --questions 5 --latency 0.2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+os.environ.setdefault("FUTUREHOUSE_API_KEY", "stub")
+os.environ["FUTUREHOUSE_CACHE_ENABLED"] = "false"
+
+import fitz  # PyMuPDF
+
+from src.core.excel_handler import ExcelHandler
+from src.core.futurehouse_client import FutureHouseClient
+from src.core.script_grader import ScriptGrader
+from futurehouse_stub import StubFutureHouseServer
+
+WORDS = ("energy force mass momentum entropy photon electron field wave "
+         "reaction enzyme cell membrane protein gradient equilibrium").split()
+
+
+def make_answer_key(questions: int, seed: int = 5):
+    rng = random.Random(seed)
+    return [
+        {
+            "number": n,
+            "question": f"Explain concept {n}.",
+            "max_marks": 10.0,
+            "reference_answer": " ".join(rng.choice(WORDS) for _ in range(40)),
+            "key_points": [],
+        }
+        for n in range(1, questions + 1)
+    ]
+
+
+def make_scripts(directory: Path, count: int, questions: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(count):
+        lines = [f"Name: Student {i}", f"Roll No: 22MCA{i:04d}", ""]
+        for n in range(1, questions + 1):
+            if rng.random() < 0.05:
+                continue  # unanswered question
+            lines.append(f"Q{n}. " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 70))))
+        document = fitz.open()
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(40, 40, 560, 800), "\n".join(lines), fontsize=8)
+        document.save(str(directory / f"script_{i:04d}.pdf"))
+        document.close()
+
+
+def run(label, stub, answer_key, scripts_dir, work_dir, run_name, script_workers, eval_workers):
+    stub.reset_counts()
+    client = FutureHouseClient(max_workers=eval_workers, max_retries=0, base_url=stub.base_url, cache=None)
+    excel_handler = ExcelHandler()
+    excel_handler.excel_dir = work_dir
+    grader = ScriptGrader(answer_key, run_name, client=client, excel_handler=excel_handler,
+                          script_workers=script_workers, eval_workers=eval_workers, grading_dir=work_dir)
+
+    start = time.perf_counter()
+    stats = grader.grade_directory(scripts_dir)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<30} {elapsed:7.2f}s  {stats['scripts_per_minute']:8.1f} scripts/min  "
+          f"graded {stats['graded']:>4}  resumed {stats['resumed']:>4}  requests {stub.counts['requests']:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the answer-script grading pipeline offline")
+    parser.add_argument("--scripts", type=int, default=40, help="Scripts to generate")
+    parser.add_argument("--questions", type=int, default=5, help="Questions per script")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub seconds per evaluation")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent evaluations")
+    args = parser.parse_args()
+
+    answer_key = make_answer_key(args.questions)
+    with tempfile.TemporaryDirectory() as tmp, StubFutureHouseServer(latency=args.latency) as stub:
+        work_dir = Path(tmp)
+        scripts_dir = work_dir / "scripts"
+        scripts_dir.mkdir()
+        make_scripts(scripts_dir, args.scripts, args.questions)
+        (work_dir / "answer_key.json").write_text(json.dumps({"questions": answer_key}))
+
+        print(f"\n{args.scripts} scripts x {args.questions} questions, {args.latency}s per evaluation")
+        run("serial", stub, answer_key, scripts_dir, work_dir, "serial", script_workers=1, eval_workers=1)
+        run(f"concurrent (4 scripts, x{args.workers})", stub, answer_key, scripts_dir, work_dir, "concurrent",
+            script_workers=4, eval_workers=args.workers)
+        run("resume finished run", stub, answer_key, scripts_dir, work_dir, "concurrent",
+            script_workers=4, eval_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
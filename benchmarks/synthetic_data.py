@@ -0,0 +1,131 @@
+"""
+Synthetic Academic Data for Benchmarks
+Deterministic student records and document texts shaped like the output of
+the extraction pipeline, so benchmark runs are comparable across machines.
+"""
+import random
+from typing import Any, Dict, List
+
+FIRST_NAMES = [
+    "Rahul", "Priya", "Arjun", "Sneha", "Vikram", "Ananya", "Karthik", "Divya",
+    "Suresh", "Lakshmi", "Imran", "Fatima", "Rohan", "Meera", "Aditya", "Kavya",
+]
+LAST_NAMES = [
+    "Sharma", "Reddy", "Patel", "Iyer", "Kumar", "Nair", "Rao", "Gupta",
+    "Khan", "Das", "Menon", "Joshi", "Verma", "Pillai", "Singh", "Naidu",
+]
+DEPARTMENTS = {
+    "CS": ("Computer Science", ["Data Structures", "Algorithms", "Operating Systems", "Databases", "Machine Learning"]),
+    "EE": ("Electrical Engineering", ["Power Systems", "Control Systems", "Signals", "Electrical Machines"]),
+    "PH": ("Physics", ["Quantum Mechanics", "Electrodynamics", "Thermodynamics", "Optics"]),
+    "MA": ("Mathematics", ["Linear Algebra", "Real Analysis", "Probability", "Topology"]),
+    "CH": ("Chemistry", ["Organic Chemistry", "Physical Chemistry", "Spectroscopy"]),
+}
+GRADES = ["A+", "A", "B+", "B", "C", "D"]
+
+
+def make_students(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Generate student records in the parsed-document format.
+
+    Args:
+        count: Number of students
+        seed: Random seed
+
+    Returns:
+        List of student dictionaries
+    """
+    rng = random.Random(seed)
+    codes = list(DEPARTMENTS)
+    students = []
+    for i in range(count):
+        code = rng.choice(codes)
+        department, course_names = DEPARTMENTS[code]
+        courses = [
+            {
+                "Course Code": f"{code}{300 + j}",
+                "Course Name": name,
+                "Grade": rng.choice(GRADES),
+            }
+            for j, name in enumerate(rng.sample(course_names, k=min(3, len(course_names))))
+        ]
+        students.append({
+            "Student Name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "Roll Number": f"21{code}{1000 + i}",
+            "Department": department,
+            "Semester": str(rng.randint(1, 8)),
+            "CGPA": round(rng.uniform(5.0, 10.0), 2),
+            "Courses": courses,
+        })
+    return students
+
+
+def make_document_text(student: Dict[str, Any], paragraphs: int = 4, seed: int = 0) -> str:
+    """
+    Generate a transcript-like document text for a student.
+
+    Args:
+        student: Student record from ``make_students``
+        paragraphs: Number of filler paragraphs after the header
+        seed: Random seed
+
+    Returns:
+        Document text (roughly 400 characters per paragraph)
+    """
+    rng = random.Random(f"{student['Roll Number']}:{seed}")
+    lines = [
+        "UNIVERSITY OF HYDERABAD - STATEMENT OF GRADES",
+        f"Name: {student['Student Name']}  Roll No: {student['Roll Number']}",
+        f"Department: {student['Department']}  Semester: {student['Semester']}",
+    ]
+    for course in student["Courses"]:
+        lines.append(f"{course['Course Code']} {course['Course Name']} 4 credits Grade {course['Grade']}")
+    lines.append(f"CGPA: {student['CGPA']}")
+
+    words = [c["Course Name"].lower() for c in student["Courses"]] + [
+        "assessment", "semester", "examination", "credits", "performance",
+        "laboratory", "assignment", "project", "attendance", "evaluation",
+    ]
+    for _ in range(paragraphs):
+        lines.append(" ".join(rng.choice(words) for _ in range(50)) + ".")
+    return "\n".join(lines)
+
+
+def make_documents(students: List[Dict[str, Any]], paragraphs: int = 4) -> List[Dict[str, Any]]:
+    """Build ``add_documents_bulk`` inputs for a list of students."""
+    return [
+        {
+            "text": make_document_text(student, paragraphs),
+            "filename": f"{student['Roll Number']}_transcript.pdf",
+            "metadata": {"roll_number": student["Roll Number"]},
+        }
+        for student in students
+    ]
+
+
+def make_student_texts(students: List[Dict[str, Any]]) -> List[str]:
+    """Render students exactly as VectorDBHandler indexes them."""
+    from src.core.vector_db_handler import VectorDBHandler
+    return [VectorDBHandler._create_student_text(student) for student in students]
+
+
+def make_queries(count: int, seed: int = 7) -> List[str]:
+    """Generate natural-language search queries over the synthetic corpus."""
+    rng = random.Random(seed)
+    templates = [
+        "{dept} student with good grades",
+        "students who scored {grade} in {course}",
+        "{first} from {dept}",
+        "weak performance in {course}",
+        "top {dept} students with CGPA above 9",
+    ]
+    queries = []
+    for _ in range(count):
+        department, courses = DEPARTMENTS[rng.choice(list(DEPARTMENTS))]
+        queries.append(rng.choice(templates).format(
+            dept=department,
+            course=rng.choice(courses),
+            grade=rng.choice(GRADES),
+            first=rng.choice(FIRST_NAMES),
+        ))
+    return queries
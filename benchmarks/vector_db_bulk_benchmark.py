@@ -0,0 +1,71 @@
+"""
+Vector DB Bulk Insert Benchmark
+Compares the per-item VectorDBHandler path (add_student_record / add_document)
+with the batched bulk APIs (add_students_bulk / add_documents_bulk).
+
+Usage:
+    python benchmarks/vector_db_bulk_benchmark.py --students 500 --documents 200
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.core.vector_db_handler import VectorDBHandler
+from synthetic_data import make_documents, make_students
+
+
+def _timed(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"  {label:<28} {count:>6} items  {elapsed:8.2f}s  {rate:10.1f} items/sec")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-item vs bulk vector DB inserts")
+    parser.add_argument("--students", type=int, default=500, help="Number of synthetic students")
+    parser.add_argument("--documents", type=int, default=200, help="Number of synthetic documents")
+    parser.add_argument("--batch-size", type=int, default=None, help="Records per Chroma write")
+    args = parser.parse_args()
+
+    students = make_students(args.students)
+    documents = make_documents(students[:args.documents])
+
+    with tempfile.TemporaryDirectory() as per_item_dir, tempfile.TemporaryDirectory() as bulk_dir:
+        per_item_db = VectorDBHandler(persist_directory=per_item_dir)
+        bulk_db = VectorDBHandler(persist_directory=bulk_dir)
+        # Measure encoding, not the shared embedding cache
+        per_item_db.embedding_cache = None
+        bulk_db.embedding_cache = None
+
+        # Load the shared embedding model so the first timed call does not pay for it
+        per_item_db.search_students("warm up")
+
+        print("\nStudents")
+        slow = _timed("add_student_record (loop)", len(students),
+                      lambda: [per_item_db.add_student_record(s, "bench.pdf") for s in students])
+        fast = _timed("add_students_bulk", len(students),
+                      lambda: bulk_db.add_students_bulk(students, "bench.pdf", batch_size=args.batch_size))
+        print(f"  speedup: {fast / slow:.1f}x")
+
+        print("\nDocuments")
+        slow = _timed("add_document (loop)", len(documents),
+                      lambda: [per_item_db.add_document(d["text"], d["filename"], d["metadata"]) for d in documents])
+        fast = _timed("add_documents_bulk", len(documents),
+                      lambda: bulk_db.add_documents_bulk(documents, batch_size=args.batch_size))
+        print(f"  speedup: {fast / slow:.1f}x")
+
+        print(f"\nCounts (per-item / bulk): "
+              f"students {per_item_db.students_collection.count()} / {bulk_db.students_collection.count()}, "
+              f"chunks {per_item_db.documents_collection.count()} / {bulk_db.documents_collection.count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,117 @@ COHERE_MODEL = os.getenv("COHERE_MODEL", "command-r")
 LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "2000"))
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.1"))
 
+# ==================== AI QUERY CONFIGURATION ====================
+
+# Token budget for student rows retrieved into an AI query prompt
+# (aggregate statistics are always included on top of this)
+AI_CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "6000"))
+
+# Answer aggregate/lookup questions locally with pandas before calling the LLM
+AI_QUERY_PLANNER_ENABLED = os.getenv("AI_QUERY_PLANNER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Let the LLM rephrase planner answers (tiny prompt, no student table)
+AI_QUERY_PLANNER_LLM_PHRASING = os.getenv("AI_QUERY_PLANNER_LLM_PHRASING", "false").lower() in ("1", "true", "yes")
+
+# Cache of /api/ai/query responses (keyed on question, batch fingerprint and model)
+AI_ANSWER_CACHE_ENABLED = os.getenv("AI_ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+AI_ANSWER_CACHE_SIZE = int(os.getenv("AI_ANSWER_CACHE_SIZE", "256"))
+
+# ==================== VECTOR DB CONFIGURATION ====================
+
+VECTOR_DB_DIR = DATA_DIR / "vector_db"
+
+# Vector store: "chroma" (SQLite + HNSW) or "flat" (memory-mapped NumPy,
+# exact search; migrate with: python main.py --mode migrate-vectors)
+VECTOR_DB_BACKEND = os.getenv("VECTOR_DB_BACKEND", "chroma")
+
+# Index processed records and extracted text into the vector DB in the
+# background after each batch write (needs chromadb + an embedding backend)
+VECTOR_INDEXING_ENABLED = os.getenv("VECTOR_INDEXING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Records per background indexing micro-batch, and the longest wait to fill one
+VECTOR_INDEX_BATCH_SIZE = int(os.getenv("VECTOR_INDEX_BATCH_SIZE", "32"))
+VECTOR_INDEX_FLUSH_SECONDS = float(os.getenv("VECTOR_INDEX_FLUSH_SECONDS", "2.0"))
+
+# Sentence-transformers model used for all embeddings
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+# Embedding backend: "sentence-transformers" (torch) or "onnx" (int8 ONNX Runtime, CPU)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+# Directory holding the exported ONNX model and tokenizer.json
+# (create with: python -m src.core.embedding_backends)
+EMBEDDING_ONNX_DIR = Path(os.getenv("EMBEDDING_ONNX_DIR", str(DATA_DIR / "models" / f"{EMBEDDING_MODEL_NAME}-onnx")))
+# ONNX Runtime intra-op threads (0 = let ONNX Runtime decide)
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+# Load the model in a background thread when a VectorDBHandler is created
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "false").lower() in ("1", "true", "yes")
+# Load the model when the API module is imported, so a preforking server
+# (gunicorn --preload) shares it copy-on-write across workers
+EMBEDDING_PRELOAD = os.getenv("EMBEDDING_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+# Cache of computed embeddings (in-memory LRU in front of a SQLite file),
+# keyed by backend/model and text hash
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+EMBEDDING_CACHE_PATH = Path(os.getenv("EMBEDDING_CACHE_PATH", str(VECTOR_DB_DIR / "embedding_cache.sqlite3")))
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "4096"))
+
+# Document chunking: "tokens" packs sentences into the model's token window
+# with overlap; "chars" is the legacy ~500-character whitespace split
+DOCUMENT_CHUNKING = os.getenv("DOCUMENT_CHUNKING", "tokens")
+# Tokens repeated between consecutive chunks ("tokens" chunking)
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+# Texts per SentenceTransformer.encode() batch
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# Records per Chroma add/upsert call in the bulk APIs
+VECTOR_DB_WRITE_BATCH_SIZE = int(os.getenv("VECTOR_DB_WRITE_BATCH_SIZE", "512"))
+
+# Precomputed similar-students graph (built by: python main.py --mode build-similarity-graph)
+SIMILARITY_GRAPH_PATH = Path(os.getenv("SIMILARITY_GRAPH_PATH", str(VECTOR_DB_DIR / "similar_students.npz")))
+# Neighbours stored per student
+SIMILARITY_GRAPH_K = int(os.getenv("SIMILARITY_GRAPH_K", "20"))
+# Rows per block of the all-pairs matrix multiplication
+SIMILARITY_GRAPH_BLOCK_SIZE = int(os.getenv("SIMILARITY_GRAPH_BLOCK_SIZE", "1024"))
+
+# ==================== FUTUREHOUSE CONFIGURATION ====================
+
+# Concurrent requests in FutureHouseClient.batch_evaluate (also the size of
+# the shared keep-alive connection pool)
+FUTUREHOUSE_MAX_WORKERS = int(os.getenv("FUTUREHOUSE_MAX_WORKERS", "8"))
+# Retries of a request after 429/5xx/connection errors (exponential backoff
+# with full jitter; a Retry-After header overrides the computed delay)
+FUTUREHOUSE_MAX_RETRIES = int(os.getenv("FUTUREHOUSE_MAX_RETRIES", "3"))
+FUTUREHOUSE_BACKOFF_BASE = float(os.getenv("FUTUREHOUSE_BACKOFF_BASE", "0.5"))
+# Longest single wait; a longer Retry-After gives up instead of waiting
+FUTUREHOUSE_BACKOFF_MAX = float(os.getenv("FUTUREHOUSE_BACKOFF_MAX", "30"))
+# Per-model circuit breaker: consecutive failures before opening, and
+# seconds before a trial request is let through
+FUTUREHOUSE_BREAKER_THRESHOLD = int(os.getenv("FUTUREHOUSE_BREAKER_THRESHOLD", "5"))
+FUTUREHOUSE_BREAKER_RESET_SECONDS = float(os.getenv("FUTUREHOUSE_BREAKER_RESET_SECONDS", "30"))
+# Overall time budget of one batch_evaluate call (items not evaluated in time fall back)
+FUTUREHOUSE_BATCH_DEADLINE_SECONDS = float(os.getenv("FUTUREHOUSE_BATCH_DEADLINE_SECONDS", "900"))
+# Persistent cache of evaluation results, keyed by model and all scoring inputs
+FUTUREHOUSE_CACHE_ENABLED = os.getenv("FUTUREHOUSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+FUTUREHOUSE_CACHE_PATH = Path(os.getenv("FUTUREHOUSE_CACHE_PATH", str(DATA_DIR / "cache" / "futurehouse_evaluations.sqlite3")))
+# Entries older than this are re-evaluated (0 = never expire); default 30 days
+FUTUREHOUSE_CACHE_TTL_SECONDS = float(os.getenv("FUTUREHOUSE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# Offline scorer used when the API is unavailable: add embedding similarity
+# (needs a local embedding backend) to TF-IDF and key-point coverage
+LOCAL_SCORER_USE_EMBEDDINGS = os.getenv("LOCAL_SCORER_USE_EMBEDDINGS", "true").lower() in ("1", "true", "yes")
+
+# ==================== ANSWER-SCRIPT GRADING CONFIGURATION ====================
+
+# Per-run progress files of the grading pipeline (resume state)
+GRADING_DIR = Path(os.getenv("GRADING_DIR", str(DATA_DIR / "grading")))
+# Scripts extracted (OCR) in parallel; answer evaluation concurrency is
+# bounded separately by FUTUREHOUSE_MAX_WORKERS
+SCRIPT_GRADING_WORKERS = int(os.getenv("SCRIPT_GRADING_WORKERS", "4"))
+# Near-identical answer detection written to the grading workbook: pairs
+# sharing this fraction of word 3-grams (outside the reference answer), or
+# with at least this embedding cosine similarity, are reported
+COLLUSION_DETECTION_ENABLED = os.getenv("COLLUSION_DETECTION_ENABLED", "true").lower() in ("1", "true", "yes")
+COLLUSION_JACCARD_THRESHOLD = float(os.getenv("COLLUSION_JACCARD_THRESHOLD", "0.5"))
+COLLUSION_SIMILARITY_THRESHOLD = float(os.getenv("COLLUSION_SIMILARITY_THRESHOLD", "0.95"))
+# Answers shorter than this (words) are not compared
+COLLUSION_MIN_WORDS = int(os.getenv("COLLUSION_MIN_WORDS", "15"))
+
 # ==================== EXCEL CONFIGURATION ====================
 
 EXCEL_FILENAME = "academic_evaluation_results.xlsx"
@@ -44,6 +155,28 @@ EXCEL_COURSES_SHEET_NAME = "Course Details"
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} | {message}"
+# Write log records from a background thread so callers never block on sink I/O
+LOG_ENQUEUE = os.getenv("LOG_ENQUEUE", "true").lower() in ("1", "true", "yes")
+# One JSON object per line in the log files (console output stays human-readable)
+LOG_JSON = os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes")
+# Per-module level overrides, e.g. "src.core.ocr_processor=WARNING,src.core.futurehouse_client=DEBUG"
+LOG_MODULE_LEVELS = os.getenv("LOG_MODULE_LEVELS", "")
+# Sampled messages (per page / per call) are written at most once per key
+# and level in this many seconds, with a count of the ones suppressed
+LOG_SAMPLE_INTERVAL_SECONDS = float(os.getenv("LOG_SAMPLE_INTERVAL_SECONDS", "5"))
+
+# ==================== METRICS CONFIGURATION ====================
+# Serve per-stage latency histograms and counters on GET /metrics
+# (Prometheus text format; see src/utils/metrics.py)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# ==================== TRACING CONFIGURATION ====================
+# Per-document trace spans (one OTLP/JSON line per document; inspect with:
+# python main.py --mode traces)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_FILE = Path(os.getenv("TRACE_FILE", str(LOG_DIR / "traces.jsonl")))
+# Rotate the trace file to <name>.1.jsonl beyond this size
+TRACE_FILE_MAX_MB = float(os.getenv("TRACE_FILE_MAX_MB", "50"))
 
 # ==================== STREAMLIT CONFIGURATION ====================
 
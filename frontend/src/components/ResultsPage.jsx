@@ -9,6 +9,7 @@ export default function ResultsPage() {
   const [searchResults, setSearchResults] = useState([])
   const [searching, setSearching] = useState(false)
   const [hasSearched, setHasSearched] = useState(false)
+  const [fuzzySearch, setFuzzySearch] = useState(false)
   
   // Filter states
   const [showFilters, setShowFilters] = useState(false)
@@ -70,6 +71,11 @@ export default function ResultsPage() {
         query: searchQuery.trim()
       }
       
+      // Typo-tolerant matching is opt-in; plain search matches substrings
+      if (fuzzySearch) {
+        params.fuzzy = true
+      }
+      
       // Only add filters if they are not at default values
       if (selectedDepartment) {
         params.department = selectedDepartment
@@ -175,10 +181,21 @@ export default function ResultsPage() {
           </button>
         </div>
         
-        {/* Quick tip */}
-        <p className="text-sm text-gray-500 mt-3">
-          💡 Tip: Leave empty and click Search to see all students
-        </p>
+        <div className="flex items-center justify-between mt-3">
+          {/* Quick tip */}
+          <p className="text-sm text-gray-500">
+            💡 Tip: Leave empty and click Search to see all students
+          </p>
+          <label className="flex items-center gap-2 text-sm text-gray-600 cursor-pointer">
+            <input
+              type="checkbox"
+              checked={fuzzySearch}
+              onChange={(e) => setFuzzySearch(e.target.checked)}
+              className="accent-blue-600"
+            />
+            Tolerate typos
+          </label>
+        </div>
       </div>
 
       {/* Filters Panel */}
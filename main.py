@@ -14,7 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from src.core.academic_evaluator import AcademicEvaluator
 from src.utils.logger import get_logger, log_system_event
-from config.settings import DOCUMENT_DIR, EXCEL_DIR
+from config.settings import DATA_DIR, DOCUMENT_DIR, EXCEL_DIR, TRACE_FILE
 
 
 def main():
@@ -24,7 +24,8 @@ def main():
     )
     parser.add_argument(
         "--mode",
-        choices=["streamlit", "cli", "validate"],
+        choices=["streamlit", "cli", "validate", "compact-vectors", "build-similarity-graph",
+                 "migrate-vectors", "grade-scripts", "traces"],
         default="streamlit",
         help="Application mode"
     )
@@ -44,6 +45,30 @@ def main():
         type=str,
         help="Custom analysis prompt"
     )
+    parser.add_argument(
+        "--vector-db-dir",
+        type=Path,
+        default=DATA_DIR / "vector_db",
+        help="Vector database directory (compact-vectors, build-similarity-graph, migrate-vectors modes)"
+    )
+    parser.add_argument(
+        "--answer-key",
+        type=Path,
+        help="Answer key JSON (grade-scripts mode; --document-dir holds the scripts, "
+             "--batch-name names the run so it can be resumed)"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of slowest documents to show (traces mode)"
+    )
+    parser.add_argument(
+        "--trace-file",
+        type=Path,
+        default=TRACE_FILE,
+        help="Trace file to read (traces mode)"
+    )
     
     args = parser.parse_args()
     
@@ -57,6 +82,16 @@ def main():
             run_cli_mode(args)
         elif args.mode == "validate":
             run_validation_mode()
+        elif args.mode == "compact-vectors":
+            run_compact_mode(args)
+        elif args.mode == "build-similarity-graph":
+            run_similarity_graph_mode(args)
+        elif args.mode == "migrate-vectors":
+            run_migrate_vectors_mode(args)
+        elif args.mode == "grade-scripts":
+            run_grade_scripts_mode(args)
+        elif args.mode == "traces":
+            run_traces_mode(args)
             
     except KeyboardInterrupt:
         logger.info("Application interrupted by user")
@@ -153,6 +188,11 @@ def run_cli_mode(args):
         print(f"📁 Location: {EXCEL_DIR}")
         print("=" * 70)
         
+        # The CLI exits after the batch, so let background indexing finish
+        if evaluator.vector_indexer is not None:
+            print("🔎 Finishing vector indexing...")
+            evaluator.vector_indexer.flush()
+        
     except Exception as e:
         logger.error(f"Batch processing error: {e}")
         print(f"\n❌ Error: {e}")
@@ -214,5 +254,140 @@ def run_validation_mode():
     print("=" * 70)
 
 
+def run_compact_mode(args):
+    """Deduplicate the vector database (records written with timestamped IDs)."""
+    from src.core.vector_db_handler import VectorDBHandler
+    
+    print("\n" + "=" * 70)
+    print("🧹 VECTOR DATABASE COMPACTION")
+    print("=" * 70)
+    
+    if not args.vector_db_dir.exists():
+        print(f"\n❌ Directory not found: {args.vector_db_dir}")
+        sys.exit(1)
+    
+    vector_db = VectorDBHandler(persist_directory=str(args.vector_db_dir))
+    stats = vector_db.compact()
+    
+    print(f"\n   Students: {stats['students_before']} → {stats['students_after']}")
+    print(f"   Document chunks: {stats['document_chunks_before']} → {stats['document_chunks_after']}")
+    print("\n✅ COMPACTION COMPLETED")
+    print("=" * 70)
+
+
+def run_similarity_graph_mode(args):
+    """Precompute the similar-students graph from the stored embeddings."""
+    from src.core.vector_db_handler import VectorDBHandler
+    
+    print("\n" + "=" * 70)
+    print("🕸️  SIMILAR-STUDENTS GRAPH")
+    print("=" * 70)
+    
+    if not args.vector_db_dir.exists():
+        print(f"\n❌ Directory not found: {args.vector_db_dir}")
+        sys.exit(1)
+    
+    vector_db = VectorDBHandler(persist_directory=str(args.vector_db_dir))
+    stats = vector_db.build_similarity_graph()
+    
+    print(f"\n   Students: {stats['students']} (k={stats['k']})")
+    print(f"   Built in {stats['seconds']}s → {stats['path']}")
+    print("\n✅ GRAPH BUILT")
+    print("=" * 70)
+
+
+def run_migrate_vectors_mode(args):
+    """Copy the Chroma store (with its embeddings) into the flat vector store."""
+    from src.core.flat_vector_store import FLAT_STORE_DIRNAME, migrate_from_chroma
+    
+    print("\n" + "=" * 70)
+    print("📦 MIGRATE VECTORS: CHROMA → FLAT")
+    print("=" * 70)
+    
+    if not args.vector_db_dir.exists():
+        print(f"\n❌ Directory not found: {args.vector_db_dir}")
+        sys.exit(1)
+    
+    flat_dir = args.vector_db_dir / FLAT_STORE_DIRNAME
+    copied = migrate_from_chroma(args.vector_db_dir, flat_dir)
+    
+    for name, count in copied.items():
+        print(f"\n   {name}: {count} records")
+    print(f"\n   Flat store: {flat_dir}")
+    print("   Set VECTOR_DB_BACKEND=flat to use it")
+    print("\n✅ MIGRATION COMPLETED")
+    print("=" * 70)
+
+
+def run_grade_scripts_mode(args):
+    """Grade a directory of answer-script PDFs against an answer key."""
+    from src.core.script_grader import ScriptGrader, load_answer_key
+    
+    print("\n" + "=" * 70)
+    print("📝 ANSWER-SCRIPT GRADING")
+    print("=" * 70)
+    
+    if not args.answer_key or not args.answer_key.exists():
+        print("\n❌ --answer-key must point to an answer key JSON file")
+        sys.exit(1)
+    if not args.document_dir.exists():
+        print(f"\n❌ Directory not found: {args.document_dir}")
+        sys.exit(1)
+    
+    answer_key = load_answer_key(args.answer_key)
+    run_name = args.batch_name or args.answer_key.stem
+    grader = ScriptGrader(answer_key, run_name)
+    
+    def show_progress(current, total, filename):
+        print(f"  [{current}/{total}] Graded: {filename}")
+    
+    stats = grader.grade_directory(args.document_dir, show_progress)
+    
+    print(f"\n   Run: {stats['run']} ({len(answer_key)} questions)")
+    print(f"   Scripts: {stats['scripts']} ({stats['graded']} graded, "
+          f"{stats['resumed']} already graded, {stats['reevaluated']} provisional re-evaluated, "
+          f"{stats['failed']} failed)")
+    print(f"   Provisional answers (API fallback): {stats['fallbacks']}/{stats['answers']}")
+    print(f"   Throughput: {stats['scripts_per_minute']} scripts/min ({stats['seconds']}s)")
+    print(f"   Flagged answer pairs (possible collusion): {stats['collusion_pairs']}")
+    if stats['workbook']:
+        print(f"\n📊 Excel File: {EXCEL_DIR / stats['workbook']}")
+    if stats['failed']:
+        print("   Re-run the same command to retry failed scripts")
+    print("\n✅ GRADING COMPLETED")
+    print("=" * 70)
+
+
+def run_traces_mode(args):
+    """Print the slowest traced documents with their per-stage breakdown."""
+    from src.utils.tracing import slowest_documents
+    
+    print("\n" + "=" * 70)
+    print(f"🐢 SLOWEST DOCUMENTS (top {args.top})")
+    print("=" * 70)
+    
+    documents = slowest_documents(args.trace_file, args.top)
+    if not documents:
+        print(f"\nNo traces found in {args.trace_file}")
+        print("   Process some documents first (TRACING_ENABLED=true)")
+        return
+    
+    for rank, doc in enumerate(documents, 1):
+        attributes = doc["attributes"]
+        status = "  ❌ failed" if doc["status"] == 2 else ""
+        print(f"\n{rank:>2}. {attributes.get('filename', doc['name'])}  {doc['seconds']:.2f}s{status}")
+        print(f"    trace {doc['trace_id']}" + (f"  batch {attributes['batch']}" if attributes.get("batch") else ""))
+        for stage in doc["breakdown"]:
+            share = stage["seconds"] / doc["seconds"] if doc["seconds"] else 0.0
+            count = f" x{stage['count']}" if stage["count"] > 1 else ""
+            errors = f"  ({stage['errors']} failed)" if stage["errors"] else ""
+            label = "  " * stage["depth"] + stage["stage"] + count
+            print(f"      {label:<36} {stage['seconds']:8.2f}s {share:6.1%}{errors}")
+        if doc["events"]:
+            print("      events: " + ", ".join(f"{name} x{n}" for name, n in sorted(doc["events"].items())))
+    
+    print("\n" + "=" * 70)
+
+
 if __name__ == "__main__":
     main()
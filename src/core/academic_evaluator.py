@@ -13,7 +13,7 @@ LAST UPDATED: 2026-01-23
 
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 from src.core.pdf_processor import PDFProcessor
@@ -26,7 +26,17 @@ from src.utils.logger import (
     log_user_action,
     log_system_event,
 )
-from config.settings import DOCUMENT_DIR, EXCEL_DIR, SUPABASE_URL, SUPABASE_KEY, USE_SUPABASE
+from src.utils.metrics import DOCUMENTS_PROCESSED, STAGE_FAILURES, track_stage
+from src.utils.tracing import current_span, get_tracer
+from src.core.vector_indexer import get_vector_indexer
+from config.settings import (
+    DOCUMENT_DIR,
+    EXCEL_DIR,
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    USE_SUPABASE,
+    VECTOR_INDEXING_ENABLED,
+)
 
 
 class AcademicEvaluator:
@@ -38,6 +48,7 @@ class AcademicEvaluator:
         self.pdf_processor = PDFProcessor(DOCUMENT_DIR)
         self.ocr_processor = OCRProcessor(DOCUMENT_DIR)
         self.excel_handler = ExcelHandler()
+        self.tracer = get_tracer()
 
         # Initialize LLM
         try:
@@ -64,9 +75,13 @@ class AcademicEvaluator:
             except Exception as e:
                 self.logger.error(f"Supabase init failed: {e}")
 
+        # Vector indexing (optional, background post-write stage)
+        self.vector_indexer = get_vector_indexer() if VECTOR_INDEXING_ENABLED else None
+
         log_system_event("AcademicEvaluator initialized", {
             "llm_available": self.llm_available,
             "supabase_available": self.supabase_available,
+            "vector_indexing": self.vector_indexer is not None,
         })
 
     # ------------------------------------------------------------------
@@ -143,30 +158,44 @@ class AcademicEvaluator:
         save_to_excel: bool = True,
     ) -> Dict[str, Any]:
 
+        with self.tracer.trace("document", filename=document_path.name):
+            result, _ = self._process_document(document_path, custom_prompt)
+        return result
+
+    def _process_document(
+        self,
+        document_path: Path,
+        custom_prompt: Optional[str] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Extract, analyze and normalize one document; returns (result, extracted text)."""
+
         if not self.llm_available:
             raise RuntimeError("LLM not available")
 
         start_time = time.time()
         log_user_action("process_single_document", {"file": document_path.name})
 
-        is_image_based = self.ocr_processor.is_image_based_pdf(document_path)
+        with self.tracer.span("pdf_type_check"):
+            is_image_based = self.ocr_processor.is_image_based_pdf(document_path)
 
-        if is_image_based:
-            text = self.ocr_processor.extract_text_with_ocr(document_path)
-            extraction_method = "OCR"
-        else:
-            text = self.pdf_processor.extract_text_from_pdf(document_path)
-            extraction_method = "Regular"
+        with track_stage("extraction", method="OCR" if is_image_based else "Regular"):
+            if is_image_based:
+                text = self.ocr_processor.extract_text_with_ocr(document_path)
+                extraction_method = "OCR"
+            else:
+                text = self.pdf_processor.extract_text_from_pdf(document_path)
+                extraction_method = "Regular"
 
-        if not text:
-            raise ValueError("Text extraction failed")
+            if not text:
+                raise ValueError("Text extraction failed")
 
-        raw_result = self.llm_analyzer.analyze_document(text, custom_prompt)
+        with self.tracer.span("llm_analysis", text_length=len(text)):
+            raw_result = self.llm_analyzer.analyze_document(text, custom_prompt)
         
         # Handle None result (API/parsing error)
         if raw_result is None:
             self.logger.error(f"LLM analysis returned None for {document_path.name}")
-            return None
+            return None, text
         
         result = self._normalize_analysis_result(raw_result)
 
@@ -176,11 +205,14 @@ class AcademicEvaluator:
             "extraction_method": extraction_method,
             "text_length": len(text),
         })
+        span = current_span()
+        if span is not None:
+            result["_file_info"]["trace_id"] = span.trace_id
 
         duration = time.time() - start_time
         log_performance("process_single_document", duration)
 
-        return result
+        return result, text
 
     # ------------------------------------------------------------------
     # BATCH PROCESSING
@@ -206,60 +238,78 @@ class AcademicEvaluator:
             if progress_callback:
                 progress_callback(idx + 1, len(document_paths), doc_path.name)
 
-            try:
-                result = self.process_single_document(doc_path, custom_prompt, save_to_excel=False)
+            with self.tracer.trace("document", filename=doc_path.name, batch=batch_filename) as span:
+                try:
+                    result, text = self._process_document(doc_path, custom_prompt)
                 
-                # SKIP if result is None (parsing/processing error)
-                if result is None:
-                    self.logger.warning(f"Skipping {doc_path.name} - processing returned None (likely API error)")
-                    continue
+                    # SKIP if result is None (parsing/processing error)
+                    if result is None:
+                        self.logger.warning(f"Skipping {doc_path.name} - processing returned None (likely API error)")
+                        DOCUMENTS_PROCESSED.inc(status="failed")
+                        if span is not None:
+                            span.set_attribute("skipped", True)
+                        continue
                 
-                # Add processing metadata
-                if "_metadata" not in result:
-                    result["_metadata"] = {}
-                result["_metadata"]["processing_success"] = True
-                result["_metadata"]["error"] = None
+                    # Add processing metadata
+                    if "_metadata" not in result:
+                        result["_metadata"] = {}
+                    result["_metadata"]["processing_success"] = True
+                    result["_metadata"]["error"] = None
                 
-                results.append(result)
-
-                # Excel write (always write, regardless of identity fields)
-                self.excel_handler.append_data_to_batch(result, doc_path.name, batch_filename)
-
-                if result.get("Courses"):
-                    self.excel_handler.append_courses_data(
-                        result["Courses"],
-                        result.get("Student Name"),
-                        result.get("Roll Number"),
-                        doc_path.name,
-                        batch_filename,
-                    )
-
-                # Supabase write (only if identity exists)
-                if result.get("_has_identity"):
-                    if self._write_to_supabase(result, doc_path.name):
-                        supabase_success += 1
+                    results.append(result)
+
+                    # Excel write (always write, regardless of identity fields)
+                    with track_stage("excel_write"):
+                        written = self.excel_handler.append_data_to_batch(result, doc_path.name, batch_filename)
+
+                        if result.get("Courses"):
+                            written = self.excel_handler.append_courses_data(
+                                result["Courses"],
+                                result.get("Student Name"),
+                                result.get("Roll Number"),
+                                doc_path.name,
+                                batch_filename,
+                            ) and written
+                    if not written:
+                        STAGE_FAILURES.inc(stage="excel_write")
+
+                    # Supabase write (only if identity exists)
+                    if result.get("_has_identity"):
+                        if self._write_to_supabase(result, doc_path.name):
+                            supabase_success += 1
+                        else:
+                            supabase_fail += 1
                     else:
-                        supabase_fail += 1
-                else:
-                    self.logger.info(f"Skipping Supabase (no identity): {doc_path.name}")
-
-            except Exception as e:
-                self.logger.error(f"Failed {doc_path.name}: {e}")
-                # Add error result
-                error_result = {
-                    "_metadata": {
-                        "processing_success": False,
-                        "error": str(e),
-                    },
-                    "_file_info": {
-                        "filename": doc_path.name,
-                        "filepath": str(doc_path),
-                    },
-                    "_document_status": "PROCESSING_ERROR",
-                    "_has_identity": False,
-                    "_has_academic_data": False,
-                }
-                results.append(error_result)
+                        self.logger.info(f"Skipping Supabase (no identity): {doc_path.name}")
+
+                    # Vector indexing runs in the background (never blocks this loop)
+                    if self.vector_indexer is not None:
+                        with self.tracer.span("vector_submit"):
+                            self.vector_indexer.submit(result, text, doc_path.name)
+
+                    DOCUMENTS_PROCESSED.inc(status="success")
+
+                except Exception as e:
+                    self.logger.error(f"Failed {doc_path.name}: {e}")
+                    DOCUMENTS_PROCESSED.inc(status="failed")
+                    if span is not None:
+                        span.record_exception(e)
+                    # Add error result
+                    error_result = {
+                        "_metadata": {
+                            "processing_success": False,
+                            "error": str(e),
+                        },
+                        "_file_info": {
+                            "filename": doc_path.name,
+                            "filepath": str(doc_path),
+                            "trace_id": span.trace_id if span is not None else None,
+                        },
+                        "_document_status": "PROCESSING_ERROR",
+                        "_has_identity": False,
+                        "_has_academic_data": False,
+                    }
+                    results.append(error_result)
 
         self.logger.info(
             f"Supabase writes: {supabase_success} success, {supabase_fail} failed"
@@ -280,22 +330,24 @@ class AcademicEvaluator:
             return False
 
         try:
-            res = self.supabase_client.insert_student(data)
-            if not res.get("success"):
-                return False
-
-            student_id = res.get("id")
-
-            if data.get("Courses"):
-                self.supabase_client.insert_courses(data["Courses"], student_id)
-            if data.get("Academic Projects"):
-                self.supabase_client.insert_projects(data["Academic Projects"], student_id)
-            if data.get("Internships"):
-                self.supabase_client.insert_internships(data["Internships"], student_id)
-            if data.get("Certifications"):
-                self.supabase_client.insert_certifications(data["Certifications"], student_id)
-            if data.get("Publications"):
-                self.supabase_client.insert_publications(data["Publications"], student_id)
+            with track_stage("supabase_write"):
+                res = self.supabase_client.insert_student(data)
+                if not res.get("success"):
+                    STAGE_FAILURES.inc(stage="supabase_write")
+                    return False
+
+                student_id = res.get("id")
+
+                if data.get("Courses"):
+                    self.supabase_client.insert_courses(data["Courses"], student_id)
+                if data.get("Academic Projects"):
+                    self.supabase_client.insert_projects(data["Academic Projects"], student_id)
+                if data.get("Internships"):
+                    self.supabase_client.insert_internships(data["Internships"], student_id)
+                if data.get("Certifications"):
+                    self.supabase_client.insert_certifications(data["Certifications"], student_id)
+                if data.get("Publications"):
+                    self.supabase_client.insert_publications(data["Publications"], student_id)
 
             return True
 
@@ -338,6 +390,7 @@ class AcademicEvaluator:
                 'excel_directory': str(EXCEL_DIR),
                 'current_batch': current_batch,
                 'available_batches': len(batches),
+                'vector_indexing': self.vector_indexer.get_stats() if self.vector_indexer else None,
             }
         except Exception as e:
             self.logger.error(f"Error getting system info: {e}")
@@ -33,6 +33,8 @@ from config.settings import (
     LLM_TEMPERATURE,
     ACADEMIC_ANALYSIS_PROMPT,
 )
+from src.utils.metrics import LLM_CALL_SECONDS, LLM_TOKENS, STAGE_FAILURES, STAGE_SECONDS
+from src.utils.tracing import add_event, get_tracer
 
 
 def _clean_model_output(text: str) -> str:
@@ -240,12 +242,12 @@ REMEMBER:
             metadata = {
                 "provider": "gemini",
                 "model": GEMINI_MODEL,
-                "total_tokens": getattr(response, 'total_token_count', None),
+                "total_tokens": getattr(getattr(response, 'usage_metadata', None), 'total_token_count', None),
                 "prompt_version": "simplified_demo_v1"
             }
             
             self.gemini_calls += 1
-            logger.info(f"Gemini call successful (total: {self.gemini_calls})")
+            logger.bind(sample="llm.call").info(f"Gemini call successful (total: {self.gemini_calls})")
             
             return response_text, metadata
             
@@ -273,15 +275,18 @@ REMEMBER:
             
             response_text = response.text
             
+            billed = getattr(getattr(response, 'meta', None), 'billed_units', None)
+            tokens = [getattr(billed, field, None) for field in ('input_tokens', 'output_tokens')]
+            
             metadata = {
                 "provider": "cohere",
                 "model": COHERE_MODEL,
-                "total_tokens": None,
+                "total_tokens": int(sum(t for t in tokens if t)) if any(tokens) else None,
                 "prompt_version": "simplified_demo_v1"
             }
             
             self.cohere_calls += 1
-            logger.info(f"Cohere call successful (total: {self.cohere_calls})")
+            logger.bind(sample="llm.call").info(f"Cohere call successful (total: {self.cohere_calls})")
             
             return response_text, metadata
             
@@ -289,6 +294,22 @@ REMEMBER:
             logger.error(f"Cohere API error: {e}")
             raise
     
+    def _call_provider(self, provider: str, prompt: str) -> tuple[str, Dict[str, Any]]:
+        """Call one provider, recording its latency, failures and token usage."""
+        call = self._call_gemini if provider == "gemini" else self._call_cohere
+        try:
+            with get_tracer().span("llm_call", provider=provider, prompt_chars=len(prompt)) as span, \
+                    LLM_CALL_SECONDS.time(provider=provider):
+                response_text, metadata = call(prompt)
+                if span is not None and metadata.get("total_tokens"):
+                    span.set_attribute("tokens", metadata["total_tokens"])
+        except Exception:
+            STAGE_FAILURES.inc(stage="llm_call")
+            raise
+        if metadata.get("total_tokens"):
+            LLM_TOKENS.inc(metadata["total_tokens"], provider=provider)
+        return response_text, metadata
+    
     def analyze_document(
         self, 
         document_text: str, 
@@ -325,15 +346,17 @@ REMEMBER:
             # Try Gemini first
             if self.gemini_available and not self.quota_exceeded:
                 try:
-                    response_text, metadata = self._call_gemini(full_prompt)
+                    response_text, metadata = self._call_provider("gemini", full_prompt)
                 except ValueError as e:
                     if "QUOTA_EXCEEDED" in str(e):
                         logger.warning("Gemini quota exceeded, switching to Cohere")
+                        add_event("llm_quota_exceeded", provider="gemini")
             
             # Fallback to Cohere
             if response_text is None and self.cohere_available:
                 logger.info("Using Cohere API (Gemini unavailable or quota exceeded)")
-                response_text, metadata = self._call_cohere(full_prompt)
+                add_event("llm_fallback", from_provider="gemini", to_provider="cohere")
+                response_text, metadata = self._call_provider("cohere", full_prompt)
             
             if response_text is None:
                 raise RuntimeError("All LLM providers failed")
@@ -342,39 +365,47 @@ REMEMBER:
             cleaned = _clean_model_output(response_text)
             
             # Log the cleaned response for debugging
-            logger.info(f"Cleaned response preview: {cleaned[:200]}...")
+            logger.debug(f"Cleaned response preview: {cleaned[:200]}...")
             
             parsed = None
             parse_error = None
             
-            # Attempt 1: Direct parsing
-            try:
-                parsed = json.loads(cleaned)
-            except json.JSONDecodeError as e1:
-                parse_error = e1
-                logger.warning(f"Attempt 1 failed: {e1}")
-                
-                # Attempt 2: Try to fix common JSON issues
+            with get_tracer().span("json_parse") as parse_span, STAGE_SECONDS.time(stage="json_parse"):
+                # Attempt 1: Direct parsing
                 try:
-                    # Replace single quotes with double quotes
-                    fixed = cleaned.replace("'", '"')
-                    # Remove trailing commas
-                    fixed = re.sub(r',\s*}', '}', fixed)
-                    fixed = re.sub(r',\s*]', ']', fixed)
-                    parsed = json.loads(fixed)
-                    logger.info("Attempt 2 succeeded with fixes")
-                except json.JSONDecodeError as e2:
-                    logger.warning(f"Attempt 2 failed: {e2}")
-                    
-                    # Attempt 3: Extract key-value pairs manually
+                    parsed = json.loads(cleaned)
+                except json.JSONDecodeError as e1:
+                    parse_error = e1
+                    logger.warning(f"Attempt 1 failed: {e1}")
+                
+                    # Attempt 2: Try to fix common JSON issues
                     try:
-                        logger.info("Attempting manual extraction from text...")
-                        parsed = self._manual_extract(cleaned)
-                        if parsed:
-                            logger.info("Attempt 3 succeeded with manual extraction")
-                    except Exception as e3:
-                        logger.warning(f"Attempt 3 failed: {e3}")
-                        parse_error = e2  # Use error from attempt 2
+                        # Replace single quotes with double quotes
+                        fixed = cleaned.replace("'", '"')
+                        # Remove trailing commas
+                        fixed = re.sub(r',\s*}', '}', fixed)
+                        fixed = re.sub(r',\s*]', ']', fixed)
+                        parsed = json.loads(fixed)
+                        logger.info("Attempt 2 succeeded with fixes")
+                        add_event("json_parse_retry", attempt=2)
+                    except json.JSONDecodeError as e2:
+                        logger.warning(f"Attempt 2 failed: {e2}")
+                    
+                        # Attempt 3: Extract key-value pairs manually
+                        try:
+                            logger.info("Attempting manual extraction from text...")
+                            add_event("json_parse_retry", attempt=3)
+                            parsed = self._manual_extract(cleaned)
+                            if parsed:
+                                logger.info("Attempt 3 succeeded with manual extraction")
+                        except Exception as e3:
+                            logger.warning(f"Attempt 3 failed: {e3}")
+                            parse_error = e2  # Use error from attempt 2
+            
+            if not parsed:
+                STAGE_FAILURES.inc(stage="json_parse")
+                if parse_span is not None:
+                    parse_span.set_attribute("error", str(parse_error))
             
             if parsed:
                 
@@ -397,8 +428,8 @@ REMEMBER:
             else:
                 # All parsing attempts failed
                 logger.error(f"All parsing attempts failed: {parse_error}")
-                logger.error(f"Raw response: {response_text[:500]}")
-                logger.error(f"Cleaned response: {cleaned[:500]}")
+                logger.debug(f"Raw response: {response_text[:500]}")
+                logger.debug(f"Cleaned response: {cleaned[:500]}")
                 return self._create_parse_error_response(str(parse_error), response_text, metadata)
         
         except Exception as ex:
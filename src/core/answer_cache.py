@@ -0,0 +1,128 @@
+"""
+Answer Cache for AI Queries
+LRU cache of AI query responses keyed by the normalized question, the
+batch-set fingerprint and the model, so canned dashboard questions skip
+the Excel reads and the LLM call.
+
+Entries are invalidated automatically: the fingerprint changes whenever a
+selected batch file changes, and entries for a superseded fingerprint of
+the same batch selection are dropped as soon as the new one is seen.
+"""
+import copy
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from loguru import logger
+from src.utils.metrics import record_cache_lookups
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Normalize question text so trivially different phrasings share an entry."""
+    text = _WHITESPACE.sub(" ", question.strip().lower())
+    return text.rstrip(" ?!.")
+
+
+class AnswerCache:
+    """Thread-safe, size-bounded LRU cache of AI query responses."""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached responses
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        # batch selection (sorted filenames) -> latest fingerprint seen for it
+        self._fingerprints: Dict[Tuple[str, ...], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _track_fingerprint(self, batches: Tuple[str, ...], fingerprint: str):
+        """Drop entries of a batch selection whose files have since changed."""
+        previous = self._fingerprints.get(batches)
+        if previous is not None and previous != fingerprint:
+            stale = [key for key in self._entries if key[1] == previous]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            if stale:
+                logger.info(f"Answer cache: invalidated {len(stale)} entries after batch change")
+        self._fingerprints[batches] = fingerprint
+
+    def get(
+        self,
+        question: str,
+        fingerprint: str,
+        model: str,
+        batches: Iterable[str] = ()
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            question: User's question
+            fingerprint: Batch-set fingerprint of the selected data
+            model: Model that would answer the question
+            batches: Selected batch filenames (used for invalidation)
+
+        Returns:
+            Copy of the cached response, or None on a miss
+        """
+        key = (normalize_question(question), fingerprint, model)
+        with self._lock:
+            self._track_fingerprint(tuple(sorted(batches)), fingerprint)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                record_cache_lookups("ai_answer", misses=1)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            record_cache_lookups("ai_answer", hits=1)
+            return copy.deepcopy(entry)
+
+    def put(self, question: str, fingerprint: str, model: str, response: Dict[str, Any]):
+        """
+        Store a response.
+
+        Args:
+            question: User's question
+            fingerprint: Batch-set fingerprint of the selected data
+            model: Model that answered the question
+            response: Response dictionary to cache
+        """
+        key = (normalize_question(question), fingerprint, model)
+        with self._lock:
+            self._entries[key] = copy.deepcopy(response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit-rate statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,320 @@
+"""
+Offline Answer Scorer
+Local grading engine used when the FutureHouse API is unavailable,
+throttled or failing: provisional marks from the similarity between each
+student answer and the reference answer.
+
+SIGNALS (vectorized per question across the whole batch):
+- TF-IDF cosine similarity (IDF over the reference's sentences + question)
+- Embedding cosine similarity (local embedding backend, if installed)
+- Key-point coverage: explicit key points, or the reference's highest
+  TF-IDF terms, matched as stemmed terms
+
+Term weights and key points depend only on the question and reference,
+never on the other answers in the batch, so an answer's mark is the same
+whether it is scored alone or with a whole class.
+
+Without a reference answer the question text is used as the reference and
+the result is marked low confidence.
+"""
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from loguru import logger
+from config.settings import LOCAL_SCORER_USE_EMBEDDINGS
+from src.core.lexical_index import tokenize
+
+STOPWORDS = frozenset("""
+a an and are as at be been being but by can could did do does for from had has have
+how i if in into is it its may might more most must no not of on or our should so
+such than that the their them then there these they this those to was we were what
+when where which while who why will with would you your also each other any all
+explain describe define discuss write give state briefly question answer marks
+use used uses using
+""".split())
+
+_SENTENCE_SPLIT = re.compile(r"[.;:!?\n]+")
+
+_SUFFIXES = ("ations", "ation", "ings", "ing", "edly", "ies", "ied", "ed", "es", "ly", "s")
+
+# Calibration: raw similarity -> credit in [0, 1] (linear between low and high)
+TFIDF_RANGE = (0.10, 0.60)
+EMBEDDING_RANGE = (0.30, 0.85)
+
+# Component weights (with / without embeddings)
+WEIGHTS_WITH_EMBEDDINGS = {"embedding": 0.45, "tfidf": 0.20, "coverage": 0.35}
+WEIGHTS_LEXICAL_ONLY = {"tfidf": 0.40, "coverage": 0.60}
+
+# Key points derived from the reference when none are given
+DERIVED_KEY_POINTS = 8
+# Fraction of a key point's terms an answer must contain to cover it
+KEY_POINT_MATCH = 0.6
+
+
+def stem(term: str) -> str:
+    """
+    Strip a common English suffix (light stemming for term matching).
+
+    A trailing "e"/"y" is dropped as well, so inflected and base forms
+    share a stem ("stored"/"store" -> "stor", "energies"/"energy" -> "energ").
+    """
+    if term.isdigit():
+        return term
+    if len(term) > 4:
+        for suffix in _SUFFIXES:
+            if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+                if suffix == "s" and term.endswith("ss"):
+                    break  # "process", not "proces"
+                term = term[:-len(suffix)]
+                break
+    if term[-1:] in ("e", "y") and len(term) > 3:
+        term = term[:-1]
+    return term
+
+
+def content_terms(text: str) -> List[str]:
+    """Stemmed, stopword-free terms of a text."""
+    return [stem(token) for token in tokenize(text) if token not in STOPWORDS and len(token) > 1]
+
+
+class AnswerScorer:
+    """Vectorized similarity scorer for batches of (answer, reference) pairs."""
+
+    def __init__(self, use_embeddings: bool = LOCAL_SCORER_USE_EMBEDDINGS):
+        """
+        Initialize the scorer.
+
+        Args:
+            use_embeddings: Add embedding similarity when a local embedding
+                backend is installed
+        """
+        self.use_embeddings = use_embeddings
+        self._embedding_model = None
+        self._embeddings_failed = False
+
+    def score_batch(self, items: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score a batch of answers.
+
+        Args:
+            items: Dicts with 'answer', 'question', 'max_marks' and optional
+                'reference_answer' and 'key_points' (list of strings)
+
+        Returns:
+            Evaluation dicts (same shape as FutureHouseClient results), in
+            input order
+        """
+        if not items:
+            return []
+
+        # Group answers to the same question/reference so IDF and key points are per question
+        groups: "OrderedDict[Tuple[str, str], List[int]]" = OrderedDict()
+        for i, item in enumerate(items):
+            reference = (item.get("reference_answer") or "").strip()
+            groups.setdefault((str(item.get("question") or "").strip(), reference), []).append(i)
+
+        embedding_similarity = self._embedding_similarities(items)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        for (question, reference), positions in groups.items():
+            scored = self._score_group(question, reference, [items[i] for i in positions],
+                                       embedding_similarity[positions] if embedding_similarity is not None else None)
+            for i, result in zip(positions, scored):
+                results[i] = result
+        return results
+
+    # ------------------------------------------------------------------
+    # SIGNALS
+    # ------------------------------------------------------------------
+
+    def _score_group(
+        self,
+        question: str,
+        reference: str,
+        items: List[Dict[str, Any]],
+        embedding_similarity: Optional[np.ndarray]
+    ) -> List[Dict[str, Any]]:
+        """Score all answers to one question against its reference."""
+        has_reference = bool(reference)
+        reference = reference or question
+        answers = [content_terms(item.get("answer") or "") for item in items]
+        reference_terms = content_terms(reference)
+
+        vocabulary = {term: j for j, term in enumerate(dict.fromkeys(
+            reference_terms + [term for terms in answers for term in terms]
+        ))}
+        counts = np.zeros((len(items) + 1, len(vocabulary)), dtype=np.float32)
+        for row, terms in enumerate([reference_terms] + answers):
+            for term in terms:
+                counts[row, vocabulary[term]] += 1
+
+        # Smoothed IDF over the reference's sentences and the question (never the
+        # answers, so a mark does not depend on the batch); sublinear TF. Terms
+        # repeated from the question weigh less, terms in neither weigh most.
+        documents = [set(content_terms(sentence)) for sentence in _SENTENCE_SPLIT.split(reference)]
+        if has_reference:
+            documents.append(set(content_terms(question)))
+        documents = [terms for terms in documents if terms]
+        document_frequency = np.zeros(len(vocabulary), dtype=np.float32)
+        for terms in documents:
+            document_frequency[[vocabulary[term] for term in terms]] += 1
+        idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+        tfidf = np.where(counts > 0, 1 + np.log(np.maximum(counts, 1)), 0) * idf
+        tfidf /= np.clip(np.linalg.norm(tfidf, axis=1, keepdims=True), 1e-12, None)
+        tfidf_similarity = tfidf[1:] @ tfidf[0]
+
+        key_points, key_matrix, key_sizes = self._key_points(
+            items[0].get("key_points"), reference, reference_terms, tfidf[0], vocabulary
+        )
+        if key_points:
+            present = (counts[1:] > 0).astype(np.float32)
+            matched = (present @ key_matrix.T) / key_sizes
+            covered = matched >= KEY_POINT_MATCH
+            coverage = covered.mean(axis=1)
+        else:
+            covered = np.zeros((len(items), 0), dtype=bool)
+            coverage = np.zeros(len(items), dtype=np.float32)
+
+        components = {
+            "tfidf": _calibrate(tfidf_similarity, TFIDF_RANGE),
+            "coverage": coverage,
+        }
+        weights = WEIGHTS_LEXICAL_ONLY
+        if embedding_similarity is not None:
+            components["embedding"] = _calibrate(embedding_similarity, EMBEDDING_RANGE)
+            weights = WEIGHTS_WITH_EMBEDDINGS
+        fraction = sum(weights[name] * components[name] for name in weights)
+        fraction[[not terms for terms in answers]] = 0.0
+
+        results = []
+        for i, item in enumerate(items):
+            max_marks = float(item.get("max_marks", 10.0) or 0.0)
+            score = round(max_marks * float(fraction[i]) * 2) / 2  # nearest half mark
+            covered_points = [point for point, hit in zip(key_points, covered[i]) if hit]
+            missing_points = [point for point, hit in zip(key_points, covered[i]) if not hit]
+            similarity = {
+                "tfidf": round(float(tfidf_similarity[i]), 3),
+                "key_point_coverage": round(float(coverage[i]), 3),
+            }
+            if embedding_similarity is not None:
+                similarity["embedding"] = round(float(embedding_similarity[i]), 3)
+
+            results.append({
+                "score": score,
+                "max_score": max_marks,
+                "percentage": (score / max_marks) * 100 if max_marks > 0 else 0,
+                "feedback": (
+                    f"Provisional local evaluation: {len(covered_points)}/{len(key_points)} key points covered"
+                    + ("" if has_reference else " (no reference answer; compared with the question)")
+                ),
+                "strengths": [f"Covers: {', '.join(covered_points[:5])}"] if covered_points else [],
+                "improvements": ([f"Missing: {', '.join(missing_points[:5])}"] if missing_points else [])
+                + ["Manual review recommended"],
+                "key_points_covered": covered_points,
+                "key_points_missing": missing_points,
+                "model_used": "local",
+                "evaluation_confidence": "medium" if has_reference else "low",
+                "similarity": similarity,
+                "provisional": True,
+                "evaluated_at": datetime.now().isoformat(),
+            })
+        return results
+
+    @staticmethod
+    def _key_points(
+        explicit: Optional[Sequence[str]],
+        reference: str,
+        reference_terms: List[str],
+        reference_tfidf: np.ndarray,
+        vocabulary: Dict[str, int]
+    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Key points for a question.
+
+        Returns:
+            (labels, points x vocabulary binary term matrix, terms per point);
+            explicit key point terms no answer used count in the size but
+            not the matrix
+        """
+        if explicit:
+            points = [(label, set(content_terms(label))) for label in explicit]
+            points = [(label, terms) for label, terms in points if terms]
+        else:
+            # Label derived points with the word as written in the reference
+            surface: Dict[str, str] = {}
+            for token in tokenize(reference):
+                surface.setdefault(stem(token), token)
+            terms = list(dict.fromkeys(reference_terms))
+            weights = reference_tfidf[[vocabulary[term] for term in terms]]
+            # Ties (same TF and IDF) go to longer, more specific terms
+            lengths = np.array([len(term) for term in terms])
+            points = [(surface.get(terms[j], terms[j]), {terms[j]})
+                      for j in np.lexsort((-lengths, -weights))[:DERIVED_KEY_POINTS]]
+
+        matrix = np.zeros((len(points), len(vocabulary)), dtype=np.float32)
+        for row, (_, terms) in enumerate(points):
+            matrix[row, [vocabulary[term] for term in terms if term in vocabulary]] = 1
+        sizes = np.array([len(terms) for _, terms in points], dtype=np.float32)
+        return [label for label, _ in points], matrix, sizes
+
+    def _embedding_similarities(self, items: Sequence[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Cosine similarity of each answer to its reference, or None without a backend."""
+        model = self._get_embedding_model()
+        if model is None:
+            return None
+        answers = [item.get("answer") or "" for item in items]
+        references = [(item.get("reference_answer") or "").strip() or str(item.get("question") or "") for item in items]
+        unique_references = list(dict.fromkeys(references))
+        try:
+            from src.core.embedding_cache import get_embedding_cache
+            cache = get_embedding_cache()
+            texts = answers + unique_references
+            vectors = cache.encode(model, texts) if cache is not None else model.encode(texts)
+        except Exception as e:
+            logger.warning(f"Embedding similarity unavailable, scoring lexically: {e}")
+            self._embeddings_failed = True
+            return None
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        answer_vectors = vectors[:len(answers)]
+        reference_rows = {text: len(answers) + j for j, text in enumerate(unique_references)}
+        reference_vectors = vectors[[reference_rows[text] for text in references]]
+        return np.einsum("ij,ij->i", answer_vectors, reference_vectors)
+
+    def _get_embedding_model(self):
+        if not self.use_embeddings or self._embeddings_failed:
+            return None
+        if self._embedding_model is None:
+            try:
+                from src.core.embedding_backends import embedding_backend_available, get_embedding_model
+                if not embedding_backend_available():
+                    self._embeddings_failed = True
+                    return None
+                self._embedding_model = get_embedding_model()
+            except Exception as e:
+                logger.warning(f"Embedding backend unavailable for local scoring: {e}")
+                self._embeddings_failed = True
+                return None
+        return self._embedding_model
+
+
+def _calibrate(similarity: np.ndarray, bounds: Tuple[float, float]) -> np.ndarray:
+    low, high = bounds
+    return np.clip((similarity - low) / (high - low), 0.0, 1.0)
+
+
+_answer_scorer: Optional[AnswerScorer] = None
+_answer_scorer_lock = threading.Lock()
+
+
+def get_answer_scorer() -> AnswerScorer:
+    """Get the process-wide offline scorer."""
+    global _answer_scorer
+    if _answer_scorer is None:
+        with _answer_scorer_lock:
+            if _answer_scorer is None:
+                _answer_scorer = AnswerScorer()
+    return _answer_scorer
@@ -8,6 +8,7 @@ import json
 from typing import Dict, Any, Optional
 from datetime import datetime
 from loguru import logger
+from src.core.dataset_profile import get_profile
 from config.settings import COHERE_API_KEY, COHERE_MODEL
 
 
@@ -23,66 +24,29 @@ class CohereAIAgent:
         self.model = COHERE_MODEL or "command"
         logger.info(f"✓ Cohere AI Agent initialized with model: {self.model}")
     
-    def _prepare_context(self, df: pd.DataFrame, batch_name: str = None) -> str:
+    def _prepare_context(
+        self,
+        df: pd.DataFrame,
+        batch_name: str = None,
+        cache_key: Optional[str] = None,
+        profile: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Prepare comprehensive context from DataFrame
         
         Args:
             df: Student data DataFrame
             batch_name: Name of the batch
+            cache_key: Optional batch fingerprint for reusing the dataset profile
+            profile: Optional precomputed dataset profile
             
         Returns:
             Formatted context string for Cohere
         """
-        # Basic stats
-        total_students = len(df)
-        
-        # CGPA statistics
-        cgpa_col = df.get('CGPA')
-        if cgpa_col is not None:
-            cgpa_values = pd.to_numeric(cgpa_col, errors='coerce').dropna()
-            avg_cgpa = round(cgpa_values.mean(), 2) if len(cgpa_values) > 0 else 0
-            max_cgpa = round(cgpa_values.max(), 2) if len(cgpa_values) > 0 else 0
-            min_cgpa = round(cgpa_values.min(), 2) if len(cgpa_values) > 0 else 0
-        else:
-            avg_cgpa = max_cgpa = min_cgpa = 0
-            cgpa_values = pd.Series([])
-        
-        # Department distribution
-        dept_counts = {}
-        if 'Department' in df.columns:
-            dept_counts = df['Department'].value_counts().to_dict()
-        
-        # CGPA distribution
-        cgpa_dist = {
-            '9.0-10.0': len(cgpa_values[(cgpa_values >= 9.0) & (cgpa_values <= 10.0)]) if len(cgpa_values) > 0 else 0,
-            '8.0-8.9': len(cgpa_values[(cgpa_values >= 8.0) & (cgpa_values < 9.0)]) if len(cgpa_values) > 0 else 0,
-            '7.0-7.9': len(cgpa_values[(cgpa_values >= 7.0) & (cgpa_values < 8.0)]) if len(cgpa_values) > 0 else 0,
-            '6.0-6.9': len(cgpa_values[(cgpa_values >= 6.0) & (cgpa_values < 7.0)]) if len(cgpa_values) > 0 else 0,
-            'Below 6.0': len(cgpa_values[cgpa_values < 6.0]) if len(cgpa_values) > 0 else 0
-        }
-        
-        # Top performers
-        top_students_list = []
-        if 'CGPA' in df.columns and 'Student Name' in df.columns:
-            top_df = df.nlargest(10, 'CGPA')
-            for idx, row in top_df.iterrows():
-                student_info = {
-                    'name': str(row.get('Student Name', 'N/A')),
-                    'roll_number': str(row.get('Roll Number', 'N/A')),
-                    'cgpa': round(float(row.get('CGPA', 0)), 2) if pd.notna(row.get('CGPA')) else 0,
-                    'department': str(row.get('Department', 'N/A'))
-                }
-                top_students_list.append(student_info)
-        
-        # Department-wise averages
-        dept_avg = {}
-        if 'Department' in df.columns and 'CGPA' in df.columns:
-            dept_groups = df.groupby('Department')['CGPA']
-            for dept, values in dept_groups:
-                numeric_values = pd.to_numeric(values, errors='coerce').dropna()
-                if len(numeric_values) > 0:
-                    dept_avg[dept] = round(numeric_values.mean(), 2)
+        # Precomputed aggregates (cached per batch fingerprint)
+        profile = profile or get_profile(df, cache_key)
+        cgpa_stats = profile['cgpa_stats']
+        dept_counts = profile['department_counts']
         
         # Build comprehensive context
         context = f"""You are an intelligent academic data analyst for the University of Hyderabad.
@@ -91,18 +55,18 @@ class CohereAIAgent:
 DATASET INFORMATION
 ==================================================
 Batch: {batch_name or 'Current Academic Data'}
-Total Students: {total_students}
+Total Students: {profile['total_students']}
 Data Source: Processed PDF documents containing grade sheets and academic records
 
 ==================================================
 CGPA STATISTICS
 ==================================================
-Average CGPA: {avg_cgpa}
-Highest CGPA: {max_cgpa}
-Lowest CGPA: {min_cgpa}
+Average CGPA: {cgpa_stats.get('average', 0)}
+Highest CGPA: {cgpa_stats.get('highest', 0)}
+Lowest CGPA: {cgpa_stats.get('lowest', 0)}
 
 CGPA Distribution Across All Students:
-{json.dumps(cgpa_dist, indent=2)}
+{json.dumps(profile['cgpa_distribution'], indent=2)}
 
 ==================================================
 DEPARTMENT BREAKDOWN
@@ -113,12 +77,12 @@ Student Count by Department:
 {json.dumps(dept_counts, indent=2)}
 
 Average CGPA by Department:
-{json.dumps(dept_avg, indent=2)}
+{json.dumps(profile['department_averages'], indent=2)}
 
 ==================================================
 TOP 10 PERFORMING STUDENTS
 ==================================================
-{json.dumps(top_students_list, indent=2)}
+{json.dumps(profile['top_performers'], indent=2)}
 
 ==================================================
 SAMPLE DATA (First 10 Students)
@@ -151,7 +115,8 @@ INSTRUCTIONS FOR ANSWERING
         self, 
         question: str, 
         df: pd.DataFrame, 
-        batch_name: Optional[str] = None
+        batch_name: Optional[str] = None,
+        cache_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Query the academic data using Cohere AI
@@ -160,13 +125,15 @@ INSTRUCTIONS FOR ANSWERING
             question: User's question
             df: Student data DataFrame
             batch_name: Name of the batch
+            cache_key: Optional batch fingerprint for reusing the dataset profile
             
         Returns:
             Response dictionary with answer and metadata
         """
         try:
-            # Prepare context from data
-            context = self._prepare_context(df, batch_name)
+            # Prepare context from data (aggregates cached per batch fingerprint)
+            profile = get_profile(df, cache_key)
+            context = self._prepare_context(df, batch_name, cache_key, profile)
             
             # Build the full prompt
             prompt = f"""{context}
@@ -199,20 +166,15 @@ YOUR ANSWER
             
             answer = response.text.strip()
             
-            # Calculate context stats
-            cgpa_values = pd.to_numeric(df['CGPA'], errors='coerce').dropna()
-            avg_cgpa = round(cgpa_values.mean(), 2) if len(cgpa_values) > 0 else 0
-            dept_count = len(df['Department'].unique()) if 'Department' in df.columns else 0
-            
             result = {
                 "response": answer,
                 "timestamp": datetime.now().isoformat(),
                 "query": question,
                 "batch_used": batch_name or "all_data",
                 "context_stats": {
-                    "total_students": len(df),
-                    "avg_cgpa": avg_cgpa,
-                    "departments": dept_count
+                    "total_students": profile['total_students'],
+                    "avg_cgpa": profile['cgpa_stats'].get('average', 0),
+                    "departments": profile['department_count']
                 },
                 "model": self.model,
                 "provider": "cohere"
@@ -15,6 +15,7 @@ except ImportError:
     COHERE_AVAILABLE = False
     logger.warning("cohere not installed. Install with: pip install cohere")
 
+from src.core.dataset_profile import get_profile
 from config.settings import COHERE_API_KEY, COHERE_MODEL
 
 
@@ -44,7 +45,8 @@ class CohereQueryHandler:
         self, 
         question: str, 
         context_data: pd.DataFrame,
-        batch_name: Optional[str] = None
+        batch_name: Optional[str] = None,
+        cache_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Answer a question about the academic data
@@ -53,6 +55,7 @@ class CohereQueryHandler:
             question: User's question about the data
             context_data: DataFrame containing student records
             batch_name: Optional batch identifier
+            cache_key: Optional batch fingerprint for reusing the dataset profile
             
         Returns:
             Dictionary with answer, metadata, and context stats
@@ -61,7 +64,7 @@ class CohereQueryHandler:
             logger.info(f"Processing query: '{question}' over {len(context_data)} records")
             
             # Build comprehensive context
-            context = self._build_context(context_data, batch_name)
+            context = self._build_context(context_data, batch_name, cache_key)
             
             # Create the prompt
             prompt = self._create_prompt(question, context)
@@ -78,7 +81,7 @@ class CohereQueryHandler:
             answer = response.generations[0].text.strip()
             
             # Calculate context statistics
-            context_stats = self._calculate_stats(context_data)
+            context_stats = self._calculate_stats(context_data, cache_key)
             
             result = {
                 "response": answer,
@@ -102,68 +105,37 @@ class CohereQueryHandler:
                 "query": question
             }
     
-    def _build_context(self, df: pd.DataFrame, batch_name: Optional[str]) -> str:
+    def _build_context(self, df: pd.DataFrame, batch_name: Optional[str], cache_key: Optional[str] = None) -> str:
         """
         Build comprehensive context string from DataFrame
         
         Args:
             df: Student data DataFrame
             batch_name: Optional batch identifier
+            cache_key: Optional batch fingerprint for reusing the dataset profile
             
         Returns:
             Formatted context string for the LLM
         """
-        total_students = len(df)
-        
-        # Calculate statistics
-        cgpa_stats = {}
-        if 'CGPA' in df.columns:
-            cgpa_values = pd.to_numeric(df['CGPA'], errors='coerce').dropna()
-            if len(cgpa_values) > 0:
-                cgpa_stats = {
-                    'average': round(cgpa_values.mean(), 2),
-                    'highest': round(cgpa_values.max(), 2),
-                    'lowest': round(cgpa_values.min(), 2),
-                    'median': round(cgpa_values.median(), 2)
-                }
-        
-        # Department distribution
-        dept_dist = {}
-        if 'Department' in df.columns:
-            dept_dist = df['Department'].value_counts().to_dict()
-        
-        # Top performers
-        top_students = []
-        if 'CGPA' in df.columns and 'Student Name' in df.columns:
-            top_df = df.nlargest(5, 'CGPA')
-            top_students = top_df[['Student Name', 'Roll Number', 'CGPA', 'Department']].to_dict('records')
-        
-        # CGPA distribution
-        cgpa_distribution = {}
-        if 'CGPA' in df.columns:
-            cgpa_values = pd.to_numeric(df['CGPA'], errors='coerce').dropna()
-            cgpa_distribution = {
-                '9.0-10.0': len(cgpa_values[(cgpa_values >= 9.0) & (cgpa_values <= 10.0)]),
-                '8.0-8.9': len(cgpa_values[(cgpa_values >= 8.0) & (cgpa_values < 9.0)]),
-                '7.0-7.9': len(cgpa_values[(cgpa_values >= 7.0) & (cgpa_values < 8.0)]),
-                '6.0-6.9': len(cgpa_values[(cgpa_values >= 6.0) & (cgpa_values < 7.0)]),
-                'Below 6.0': len(cgpa_values[cgpa_values < 6.0])
-            }
+        # Precomputed aggregates (cached per batch fingerprint)
+        profile = get_profile(df, cache_key)
+        cgpa_stats = {k: v for k, v in profile['cgpa_stats'].items() if k != 'count'}
+        top_students = profile['top_performers'][:5]
         
         # Build context string
         context = f"""Academic Data Context:
 
 Batch: {batch_name or 'All Data'}
-Total Students: {total_students}
+Total Students: {profile['total_students']}
 
 CGPA Statistics:
 {json.dumps(cgpa_stats, indent=2)}
 
 CGPA Distribution:
-{json.dumps(cgpa_distribution, indent=2)}
+{json.dumps(profile['cgpa_distribution'], indent=2)}
 
 Department Distribution:
-{json.dumps(dept_dist, indent=2)}
+{json.dumps(profile['department_counts'], indent=2)}
 
 Top 5 Performers:
 {json.dumps(top_students, indent=2)}
@@ -206,31 +178,23 @@ Answer (be specific and cite actual data):"""
         
         return prompt
     
-    def _calculate_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _calculate_stats(self, df: pd.DataFrame, cache_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Calculate summary statistics for response metadata
         
         Args:
             df: Student data DataFrame
+            cache_key: Optional batch fingerprint for reusing the dataset profile
             
         Returns:
             Dictionary of statistics
         """
-        stats = {
-            "total_students": len(df),
-            "avg_cgpa": 0,
-            "departments": 0
+        profile = get_profile(df, cache_key)
+        return {
+            "total_students": profile['total_students'],
+            "avg_cgpa": profile['cgpa_stats'].get('average', 0),
+            "departments": profile['department_count']
         }
-        
-        if 'CGPA' in df.columns:
-            cgpa_values = pd.to_numeric(df['CGPA'], errors='coerce').dropna()
-            if len(cgpa_values) > 0:
-                stats["avg_cgpa"] = round(cgpa_values.mean(), 2)
-        
-        if 'Department' in df.columns:
-            stats["departments"] = df['Department'].nunique()
-        
-        return stats
     
     def validate_connection(self) -> bool:
         """
@@ -255,7 +219,8 @@ Answer (be specific and cite actual data):"""
 def query_academic_data(
     question: str,
     data: pd.DataFrame,
-    batch_name: Optional[str] = None
+    batch_name: Optional[str] = None,
+    cache_key: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Quick function to query academic data
@@ -264,9 +229,10 @@ def query_academic_data(
         question: Question about the data
         data: DataFrame with student records
         batch_name: Optional batch identifier
+        cache_key: Optional batch fingerprint for reusing the dataset profile
         
     Returns:
         Response dictionary
     """
     handler = CohereQueryHandler()
-    return handler.query(question, data, batch_name)
+    return handler.query(question, data, batch_name, cache_key)
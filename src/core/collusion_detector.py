@@ -0,0 +1,249 @@
+"""
+Collusion Detector for Answer Scripts
+Flags near-identical answers to the same question across a grading run
+without comparing every pair through the API.
+
+SIGNALS (per question):
+- Text overlap: MinHash signatures of word 3-grams, banded into LSH
+  buckets so only colliding answers become candidate pairs (near-linear
+  in the number of answers); candidates are verified with the exact
+  Jaccard overlap. 3-grams that also occur in the reference answer are
+  ignored, since every good answer shares those.
+- Semantic similarity (local embedding backend, if installed): all pairs
+  above the threshold via blocked matrix multiplication over the
+  normalized answer embeddings, which catches paraphrased copies.
+
+Pairs are ranked by how many questions the same two students were flagged
+on, then by overlap and similarity.
+"""
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from loguru import logger
+from config.settings import (
+    COLLUSION_JACCARD_THRESHOLD,
+    COLLUSION_MIN_WORDS,
+    COLLUSION_SIMILARITY_THRESHOLD,
+    LOCAL_SCORER_USE_EMBEDDINGS,
+)
+from src.core.lexical_index import tokenize
+
+SHINGLE_SIZE = 3
+# 32 bands x 4 rows: pairs with Jaccard >= ~0.42 usually share a bucket
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 32
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """Hashed word n-grams of a text."""
+    words = tokenize(text)
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    """Jaccard overlap of two shingle sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures with multiply-shift hashing on uint64 (vectorized)."""
+
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2 ** 63, permutations, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, permutations, dtype=np.uint64)
+
+    def signature(self, shingle_set: Set[int]) -> np.ndarray:
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        # Wrapping multiply-add, keep the high 32 bits
+        hashed = (values[:, None] * self.a + self.b) >> np.uint64(32)
+        return hashed.min(axis=0)
+
+
+def lsh_candidates(signatures: np.ndarray, bands: int = LSH_BANDS) -> Set[Tuple[int, int]]:
+    """
+    Candidate pairs whose signatures agree on at least one band.
+
+    Args:
+        signatures: (n, permutations) MinHash signatures
+        bands: Number of bands (permutations must divide evenly)
+
+    Returns:
+        Set of (i, j) index pairs with i < j
+    """
+    rows = signatures.shape[1] // bands
+    candidates = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        for i, key in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault(key.tobytes(), []).append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    candidates.add((members[x], members[y]))
+    return candidates
+
+
+def similar_pairs(embeddings: np.ndarray, threshold: float, block_size: int = 1024) -> List[Tuple[int, int, float]]:
+    """
+    All pairs with cosine similarity >= threshold (blocked matrix multiplication).
+
+    Args:
+        embeddings: (n, d) matrix (normalized here)
+        threshold: Minimum cosine similarity
+        block_size: Rows multiplied per block
+
+    Returns:
+        (i, j, similarity) with i < j
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix = matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+    pairs = []
+    for start in range(0, len(matrix), block_size):
+        block = matrix[start:start + block_size] @ matrix.T
+        rows, cols = np.nonzero(block >= threshold)
+        for row, col in zip(rows, cols):
+            if col > row + start:
+                pairs.append((int(row + start), int(col), float(block[row, col])))
+    return pairs
+
+
+class CollusionDetector:
+    """Finds near-identical answers to the same question across students."""
+
+    def __init__(
+        self,
+        jaccard_threshold: float = COLLUSION_JACCARD_THRESHOLD,
+        similarity_threshold: float = COLLUSION_SIMILARITY_THRESHOLD,
+        min_words: int = COLLUSION_MIN_WORDS,
+        use_embeddings: bool = LOCAL_SCORER_USE_EMBEDDINGS
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            jaccard_threshold: Minimum 3-gram overlap to flag a pair
+            similarity_threshold: Minimum embedding cosine similarity to flag a pair
+            min_words: Shorter answers are skipped
+            use_embeddings: Add the semantic signal when a local embedding
+                backend is installed
+        """
+        self.jaccard_threshold = jaccard_threshold
+        self.similarity_threshold = similarity_threshold
+        self.min_words = min_words
+        self.use_embeddings = use_embeddings
+        self.minhasher = MinHasher()
+
+    def detect(
+        self,
+        answers: Sequence[Dict[str, Any]],
+        references: Optional[Dict[Any, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find flagged answer pairs.
+
+        Args:
+            answers: Dicts with 'question', 'student' (roll number or other
+                ID), 'answer' and optional 'student_name'
+            references: {question: reference answer}, whose 3-grams are ignored
+
+        Returns:
+            Flagged pairs, ranked: question, student_a/b, student_name_a/b,
+            jaccard, similarity (None without embeddings), signals,
+            questions_flagged (for the same two students)
+        """
+        by_question: Dict[Any, List[Dict[str, Any]]] = {}
+        for item in answers:
+            if len(tokenize(item.get("answer") or "")) >= self.min_words:
+                by_question.setdefault(item["question"], []).append(item)
+
+        model = self._get_embedding_model()
+        pairs = []
+        for question, items in by_question.items():
+            if len(items) > 1:
+                pairs.extend(self._detect_question(question, items, (references or {}).get(question), model))
+
+        flagged_questions: Dict[Tuple[str, str], int] = {}
+        for pair in pairs:
+            students = (pair["student_a"], pair["student_b"])
+            flagged_questions[students] = flagged_questions.get(students, 0) + 1
+        for pair in pairs:
+            pair["questions_flagged"] = flagged_questions[(pair["student_a"], pair["student_b"])]
+        pairs.sort(key=lambda p: (-p["questions_flagged"], -p["jaccard"], -(p["similarity"] or 0.0)))
+
+        logger.info(f"Collusion check: {len(pairs)} flagged pairs over {len(by_question)} questions "
+                    f"({'lexical + semantic' if model is not None else 'lexical'})")
+        return pairs
+
+    def _detect_question(
+        self,
+        question: Any,
+        items: List[Dict[str, Any]],
+        reference: Optional[str],
+        model
+    ) -> List[Dict[str, Any]]:
+        """Flagged pairs among the answers to one question."""
+        common = shingles(reference) if reference else set()
+        shingle_sets = [shingles(item["answer"]) - common for item in items]
+
+        lexical = [i for i, s in enumerate(shingle_sets) if s]
+        candidates = set()
+        if len(lexical) > 1:
+            signatures = np.stack([self.minhasher.signature(shingle_sets[i]) for i in lexical])
+            candidates = {(lexical[x], lexical[y]) for x, y in lsh_candidates(signatures)}
+
+        vectors = self._embed([item["answer"] for item in items], model)
+        if vectors is not None:
+            candidates.update((i, j) for i, j, _ in similar_pairs(vectors, self.similarity_threshold))
+
+        flagged = []
+        for i, j in sorted(candidates):
+            overlap = jaccard(shingle_sets[i], shingle_sets[j])
+            similarity = float(vectors[i] @ vectors[j]) if vectors is not None else None
+            signals = []
+            if overlap >= self.jaccard_threshold:
+                signals.append("text overlap")
+            if similarity is not None and similarity >= self.similarity_threshold:
+                signals.append("semantic")
+            if not signals:
+                continue
+            a, b = sorted((items[i], items[j]), key=lambda item: str(item["student"]))
+            flagged.append({
+                "question": question,
+                "student_a": str(a["student"]),
+                "student_name_a": a.get("student_name", ""),
+                "student_b": str(b["student"]),
+                "student_name_b": b.get("student_name", ""),
+                "jaccard": round(overlap, 3),
+                "similarity": round(similarity, 3) if similarity is not None else None,
+                "signals": " + ".join(signals),
+            })
+        return flagged
+
+    def _embed(self, texts: List[str], model) -> Optional[np.ndarray]:
+        """Normalized answer embeddings, or None without a backend."""
+        if model is None:
+            return None
+        try:
+            from src.core.embedding_cache import get_embedding_cache
+            cache = get_embedding_cache()
+            vectors = cache.encode(model, texts) if cache is not None else model.encode(texts)
+        except Exception as e:
+            logger.warning(f"Embeddings unavailable for collusion check, using text overlap only: {e}")
+            return None
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    def _get_embedding_model(self):
+        if not self.use_embeddings:
+            return None
+        try:
+            from src.core.embedding_backends import embedding_backend_available, get_embedding_model
+            return get_embedding_model() if embedding_backend_available() else None
+        except Exception as e:
+            logger.warning(f"Embedding backend unavailable for collusion check: {e}")
+            return None
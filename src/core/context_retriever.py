@@ -0,0 +1,338 @@
+"""
+Question-Aware Context Retrieval for the AI Query Agents
+Selects the student rows relevant to a question under a hard token budget,
+so prompts no longer embed the complete combined DataFrame.
+
+FEATURES:
+- Filter parsing: departments (names, keywords, initials), CGPA ranges,
+  roll numbers and (fuzzy) student names
+- Lexical relevance ranking when the question has no explicit filters
+- Greedy row packing under a token budget (~4 characters per token)
+"""
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+from loguru import logger
+
+from src.core.fuzzy_search import FuzzyNameIndex, get_name_index, normalize_name_token
+from config.settings import AI_CONTEXT_TOKEN_BUDGET
+
+# Rough characters-per-token ratio for English/tabular text
+CHARS_PER_TOKEN = 4
+
+# Bookkeeping columns that never help answer a question
+_EXCLUDED_COLUMNS = {
+    'Timestamp', 'Document Filename', 'Model Used', 'Tokens Used', 'Analysis Status', 'CGPA_numeric'
+}
+
+# Words too generic to identify a department on their own
+_GENERIC_DEPARTMENT_WORDS = {
+    'department', 'engineering', 'science', 'sciences', 'studies', 'school', 'of', 'and', 'the', 'centre', 'center'
+}
+
+# Question words that must never be treated as student names
+_STOPWORDS = {
+    'the', 'a', 'an', 'of', 'in', 'on', 'for', 'to', 'and', 'or', 'is', 'are', 'was', 'were', 'what', 'which',
+    'who', 'whom', 'whose', 'how', 'many', 'much', 'show', 'list', 'give', 'tell', 'me', 'all', 'students',
+    'student', 'average', 'mean', 'cgpa', 'sgpa', 'gpa', 'top', 'best', 'highest', 'lowest', 'worst', 'bottom',
+    'above', 'below', 'over', 'under', 'than', 'more', 'less', 'greater', 'least', 'most', 'between', 'with',
+    'department', 'dept', 'batch', 'count', 'number', 'has', 'have', 'does', 'do', 'about', 'performance',
+    'performing', 'details', 'info', 'information', 'their', 'his', 'her', 'at', 'by', 'from', 'whats',
+    'compare', 'comparison', 'any', 'there', 'risk', 'scored', 'score', 'scores', 'marks', 'grade', 'grades'
+}
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_LOWER_BOUND_PATTERNS = [
+    (re.compile(r"(?:at least|minimum(?: of)?|no less than|>=)\s*" + _NUMBER), True),
+    (re.compile(r"(?:above|over|more than|greater than|higher than|>)\s*" + _NUMBER), False),
+]
+_UPPER_BOUND_PATTERNS = [
+    (re.compile(r"(?:at most|maximum(?: of)?|no more than|<=)\s*" + _NUMBER), True),
+    (re.compile(r"(?:below|under|less than|lower than|<)\s*" + _NUMBER), False),
+]
+_BETWEEN_PATTERN = re.compile(r"between\s*" + _NUMBER + r"\s*(?:and|-|to)\s*" + _NUMBER)
+_ROLL_NUMBER_PATTERN = re.compile(r"\b\d{2}[a-z]{2,4}\d{2,6}\b", re.IGNORECASE)
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _department_aliases(department: str) -> List[str]:
+    """Build the phrases that refer to a department in a question."""
+    name = department.lower().strip()
+    words = _WORD_PATTERN.findall(name)
+    aliases = [name]
+
+    significant = [w for w in words if w not in _GENERIC_DEPARTMENT_WORDS and len(w) >= 4]
+    aliases.extend(significant)
+
+    initials = "".join(w[0] for w in words if w not in {'of', 'and', 'the'})
+    if len(initials) >= 2:
+        aliases.append(initials)
+
+    return aliases
+
+
+def _cgpa_bound(value: str) -> Optional[float]:
+    """Accept only numbers on the CGPA scale."""
+    number = float(value)
+    return number if 0 <= number <= 10 else None
+
+
+def parse_question_filters(
+    question: str,
+    df: pd.DataFrame,
+    name_index: Optional[FuzzyNameIndex] = None
+) -> Dict[str, Any]:
+    """
+    Extract structured filters from a natural-language question.
+
+    Args:
+        question: User's question
+        df: Student data the question is about
+        name_index: Optional prebuilt fuzzy index over ``df`` names
+
+    Returns:
+        Dictionary with ``departments``, ``cgpa_lower``/``cgpa_upper``
+        (``(value, inclusive)`` tuples or None), ``roll_numbers`` and
+        ``name_positions`` (row positions of fuzzy name matches)
+    """
+    text = question.lower()
+    words = set(_WORD_PATTERN.findall(text))
+
+    filters: Dict[str, Any] = {
+        'departments': [],
+        'cgpa_lower': None,
+        'cgpa_upper': None,
+        'roll_numbers': [],
+        'name_positions': [],
+    }
+
+    # Departments (full names, keywords, initials, or abbreviations like "maths", "chem")
+    stems = {w.rstrip('s') for w in words if w not in _STOPWORDS and len(w.rstrip('s')) >= 4}
+    department_words = set()
+    if 'Department' in df.columns:
+        for department in df['Department'].dropna().astype(str).unique():
+            for alias in _department_aliases(department):
+                abbreviated = ' ' not in alias and len(alias) >= 4 and any(alias.startswith(stem) for stem in stems)
+                if (' ' in alias and alias in text) or alias in words or abbreviated:
+                    filters['departments'].append(department)
+                    department_words.update(_WORD_PATTERN.findall(alias))
+                    department_words.update(w for w in words if alias.startswith(w.rstrip('s')) and len(w) >= 4)
+                    break
+
+    # CGPA ranges
+    between = _BETWEEN_PATTERN.search(text)
+    if between:
+        low, high = _cgpa_bound(between.group(1)), _cgpa_bound(between.group(2))
+        if low is not None and high is not None:
+            filters['cgpa_lower'] = (min(low, high), True)
+            filters['cgpa_upper'] = (max(low, high), True)
+    if filters['cgpa_lower'] is None:
+        for pattern, inclusive in _LOWER_BOUND_PATTERNS:
+            match = pattern.search(text)
+            if match and _cgpa_bound(match.group(1)) is not None:
+                filters['cgpa_lower'] = (float(match.group(1)), inclusive)
+                break
+    if filters['cgpa_upper'] is None:
+        for pattern, inclusive in _UPPER_BOUND_PATTERNS:
+            match = pattern.search(text)
+            if match and _cgpa_bound(match.group(1)) is not None:
+                filters['cgpa_upper'] = (float(match.group(1)), inclusive)
+                break
+
+    # Roll numbers
+    filters['roll_numbers'] = [r.upper() for r in _ROLL_NUMBER_PATTERN.findall(question)]
+
+    # Student names: leftover, non-generic words matched against the name index
+    if 'Student Name' in df.columns:
+        candidates = [
+            w for w in _WORD_PATTERN.findall(text)
+            if len(w) >= 3 and not w.isdigit() and w not in _STOPWORDS and w not in department_words
+            and not _ROLL_NUMBER_PATTERN.fullmatch(w)
+        ]
+        if candidates:
+            if name_index is None:
+                name_index = FuzzyNameIndex(df['Student Name'].tolist())
+            positions = []
+            for word in candidates:
+                max_distance = 1 if len(normalize_name_token(word)) >= 5 else 0
+                for position, _ in name_index.search(word, max_distance=max_distance, prefix=False):
+                    if position not in positions:
+                        positions.append(position)
+            filters['name_positions'] = positions
+
+    return filters
+
+
+def apply_filters(df: pd.DataFrame, filters: Dict[str, Any], cgpa_values: Optional[pd.Series] = None) -> pd.Series:
+    """
+    Build a boolean row mask for department and CGPA filters.
+
+    Args:
+        df: Student data
+        filters: Output of ``parse_question_filters``
+        cgpa_values: Optional precomputed numeric CGPA series aligned with ``df``
+
+    Returns:
+        Boolean Series aligned with ``df``
+    """
+    mask = pd.Series(True, index=df.index)
+
+    if filters.get('departments') and 'Department' in df.columns:
+        mask &= df['Department'].isin(filters['departments'])
+
+    if filters.get('cgpa_lower') or filters.get('cgpa_upper'):
+        if cgpa_values is None:
+            cgpa_values = pd.to_numeric(df.get('CGPA'), errors='coerce')
+        if filters.get('cgpa_lower'):
+            value, inclusive = filters['cgpa_lower']
+            mask &= (cgpa_values >= value) if inclusive else (cgpa_values > value)
+        if filters.get('cgpa_upper'):
+            value, inclusive = filters['cgpa_upper']
+            mask &= (cgpa_values <= value) if inclusive else (cgpa_values < value)
+
+    return mask
+
+
+def has_filters(filters: Dict[str, Any]) -> bool:
+    """Check whether any filter was parsed from the question."""
+    return any(filters.get(key) for key in ('departments', 'cgpa_lower', 'cgpa_upper', 'roll_numbers', 'name_positions'))
+
+
+class ContextRetriever:
+    """
+    Picks the student rows relevant to a question and renders them
+    within a token budget.
+    """
+
+    def __init__(self, token_budget: int = AI_CONTEXT_TOKEN_BUDGET):
+        """
+        Initialize the retriever.
+
+        Args:
+            token_budget: Maximum estimated tokens for the rendered rows
+        """
+        self.token_budget = token_budget
+
+    def retrieve(
+        self,
+        question: str,
+        df: pd.DataFrame,
+        cache_key: Optional[str] = None,
+        cgpa_values: Optional[pd.Series] = None
+    ) -> Dict[str, Any]:
+        """
+        Select and render the rows relevant to a question.
+
+        Args:
+            question: User's question
+            df: Combined student data
+            cache_key: Optional batch fingerprint used to reuse the name index
+            cgpa_values: Optional precomputed numeric CGPA series aligned with ``df``
+
+        Returns:
+            Dictionary with ``text``, ``rows_included``, ``rows_matched``,
+            ``total_rows``, ``truncated`` and ``filters``
+        """
+        df = df.reset_index(drop=True)
+        if cgpa_values is not None:
+            cgpa_values = cgpa_values.reset_index(drop=True)
+        else:
+            cgpa_values = pd.to_numeric(df.get('CGPA', pd.Series(index=df.index, dtype=float)), errors='coerce')
+
+        name_index = None
+        if cache_key and 'Student Name' in df.columns:
+            name_index = get_name_index(f"context:{cache_key}", df['Student Name'].tolist())
+
+        filters = parse_question_filters(question, df, name_index)
+        ordered = self._rank_rows(question, df, filters, cgpa_values)
+
+        text, included = self._render_rows(df, ordered)
+        logger.info(
+            f"Context retrieval: {included}/{len(ordered)} matching rows "
+            f"({len(df)} total) within {self.token_budget} tokens"
+        )
+
+        return {
+            'text': text,
+            'rows_included': included,
+            'rows_matched': len(ordered),
+            'total_rows': len(df),
+            'truncated': included < len(ordered),
+            'filters': filters,
+        }
+
+    def _rank_rows(
+        self,
+        question: str,
+        df: pd.DataFrame,
+        filters: Dict[str, Any],
+        cgpa_values: pd.Series
+    ) -> List[int]:
+        """Order row positions by relevance to the question."""
+        # Direct hits (roll numbers and names) always come first
+        direct: List[int] = []
+        if filters['roll_numbers'] and 'Roll Number' in df.columns:
+            rolls = df['Roll Number'].astype(str).str.upper()
+            direct.extend(rolls.index[rolls.isin(filters['roll_numbers'])].tolist())
+        for position in filters['name_positions']:
+            if position not in direct:
+                direct.append(position)
+
+        mask = apply_filters(df, filters, cgpa_values)
+        if filters['departments'] or filters['cgpa_lower'] or filters['cgpa_upper']:
+            rest = cgpa_values[mask].sort_values(ascending=False, na_position='last').index.tolist()
+        elif direct:
+            rest = []
+        else:
+            rest = self._lexical_order(question, df, cgpa_values)
+
+        seen = set(direct)
+        return direct + [p for p in rest if p not in seen]
+
+    @staticmethod
+    def _lexical_order(question: str, df: pd.DataFrame, cgpa_values: pd.Series) -> List[int]:
+        """Rank all rows by word overlap with the question, then by CGPA."""
+        words = {w for w in _WORD_PATTERN.findall(question.lower()) if w not in _STOPWORDS and len(w) >= 3}
+        overlap = pd.Series(0, index=df.index)
+        if words:
+            text_columns = [c for c in df.columns if c not in _EXCLUDED_COLUMNS and df[c].dtype == object]
+            if text_columns:
+                row_text = df[text_columns].fillna('').astype(str).agg(' '.join, axis=1).str.lower()
+                for word in words:
+                    overlap += row_text.str.contains(word, regex=False).astype(int)
+
+        ranking = pd.DataFrame({'overlap': overlap, 'cgpa': cgpa_values.fillna(-1)})
+        return ranking.sort_values(['overlap', 'cgpa'], ascending=False).index.tolist()
+
+    def _render_rows(self, df: pd.DataFrame, ordered: List[int]) -> Tuple[str, int]:
+        """Render rows as pipe-separated lines until the budget is used up."""
+        if not ordered:
+            return "(no matching student records)", 0
+
+        columns = [c for c in df.columns if c not in _EXCLUDED_COLUMNS]
+        # Drop columns that are empty for every candidate row
+        candidate = df.loc[ordered, columns]
+        columns = [c for c in columns if candidate[c].notna().any() and (candidate[c].astype(str).str.strip() != '').any()]
+
+        header = " | ".join(columns)
+        lines = [header]
+        used = estimate_tokens(header)
+        included = 0
+
+        for position in ordered:
+            row = df.loc[position, columns]
+            line = " | ".join('' if pd.isna(v) else str(v) for v in row)
+            cost = estimate_tokens(line) + 1
+            if used + cost > self.token_budget:
+                break
+            lines.append(line)
+            used += cost
+            included += 1
+
+        return "\n".join(lines), included
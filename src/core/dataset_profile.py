@@ -0,0 +1,162 @@
+"""
+Dataset Profile Engine for the AI Query Agents
+Computes the statistics every agent puts into its prompt (CGPA stats and
+distribution, department counts and averages, top performers) in one pass,
+and caches them per batch-set fingerprint so repeated questions over the
+same batches skip the per-request pandas work.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+import pandas as pd
+from loguru import logger
+
+# Number of profiles kept in memory (one per batch selection)
+_PROFILE_CACHE_SIZE = 16
+
+# Number of top performers kept in a profile (agents slice what they need)
+TOP_PERFORMERS = 10
+
+CGPA_BUCKETS = [
+    ('9.0-10.0', 9.0, 10.0, True),
+    ('8.0-8.9', 8.0, 9.0, False),
+    ('7.0-7.9', 7.0, 8.0, False),
+    ('6.0-6.9', 6.0, 7.0, False),
+]
+
+
+def batch_fingerprint(batch_paths: Iterable[Path]) -> str:
+    """
+    Identify a set of batch files by filename and modification time.
+
+    Args:
+        batch_paths: Paths of the batch Excel files
+
+    Returns:
+        Hex digest that changes whenever any of the files changes
+    """
+    parts = []
+    for batch_path in sorted((Path(p) for p in batch_paths), key=lambda p: p.name):
+        try:
+            mtime = batch_path.stat().st_mtime_ns
+        except OSError:
+            mtime = 0
+        parts.append(f"{batch_path.name}:{mtime}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def compute_profile(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compute all prompt statistics for a student DataFrame.
+
+    Args:
+        df: Student data DataFrame
+
+    Returns:
+        Profile dictionary. ``cgpa_values`` is the numeric CGPA series aligned
+        with ``df`` (NaN where missing) for reuse by the planner and retriever.
+    """
+    if 'CGPA' in df.columns:
+        cgpa_values = pd.to_numeric(df['CGPA'], errors='coerce')
+    else:
+        cgpa_values = pd.Series(float('nan'), index=df.index, dtype=float)
+    valid = cgpa_values.dropna()
+
+    cgpa_stats = {}
+    if len(valid) > 0:
+        cgpa_stats = {
+            'average': round(float(valid.mean()), 2),
+            'highest': round(float(valid.max()), 2),
+            'lowest': round(float(valid.min()), 2),
+            'median': round(float(valid.median()), 2),
+            'count': int(len(valid)),
+        }
+
+    cgpa_distribution = {}
+    for label, low, high, inclusive in CGPA_BUCKETS:
+        upper = (valid <= high) if inclusive else (valid < high)
+        cgpa_distribution[label] = int(((valid >= low) & upper).sum())
+    cgpa_distribution['Below 6.0'] = int((valid < 6.0).sum())
+
+    department_counts = {}
+    department_averages = {}
+    if 'Department' in df.columns:
+        department_counts = {str(k): int(v) for k, v in df['Department'].value_counts().items()}
+        averages = cgpa_values.groupby(df['Department']).mean().dropna()
+        department_averages = {str(k): round(float(v), 2) for k, v in averages.items()}
+
+    top_performers = []
+    for position in valid.nlargest(TOP_PERFORMERS).index:
+        row = df.loc[position]
+        top_performers.append({
+            'name': str(row.get('Student Name', 'N/A')),
+            'roll_number': str(row.get('Roll Number', 'N/A')),
+            'cgpa': round(float(cgpa_values[position]), 2),
+            'department': str(row.get('Department', 'N/A')),
+        })
+
+    return {
+        'total_students': len(df),
+        'cgpa_values': cgpa_values,
+        'cgpa_stats': cgpa_stats,
+        'cgpa_distribution': cgpa_distribution,
+        'department_counts': department_counts,
+        'department_averages': department_averages,
+        'department_count': len(department_counts),
+        'top_performers': top_performers,
+        'columns': list(df.columns),
+    }
+
+
+_profile_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_profile_lock = threading.Lock()
+_profile_stats = {'hits': 0, 'misses': 0}
+
+
+def get_profile(df: pd.DataFrame, fingerprint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get the profile for a DataFrame, from cache when the fingerprint matches.
+
+    Args:
+        df: Student data DataFrame
+        fingerprint: Batch-set fingerprint; without it the profile is computed
+            but not cached
+
+    Returns:
+        Profile dictionary (see ``compute_profile``)
+    """
+    if not fingerprint:
+        return compute_profile(df)
+
+    key = f"{fingerprint}:{len(df)}"
+    with _profile_lock:
+        profile = _profile_cache.get(key)
+        if profile is not None:
+            _profile_cache.move_to_end(key)
+            _profile_stats['hits'] += 1
+            return profile
+
+    profile = compute_profile(df)
+
+    with _profile_lock:
+        _profile_stats['misses'] += 1
+        _profile_cache[key] = profile
+        while len(_profile_cache) > _PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+
+    logger.info(f"Computed dataset profile for {len(df)} students (fingerprint {fingerprint[:10]})")
+    return profile
+
+
+def get_profile_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss counts for the profile cache."""
+    with _profile_lock:
+        total = _profile_stats['hits'] + _profile_stats['misses']
+        return {
+            'entries': len(_profile_cache),
+            'hits': _profile_stats['hits'],
+            'misses': _profile_stats['misses'],
+            'hit_rate': round(_profile_stats['hits'] / total, 3) if total else 0.0,
+        }
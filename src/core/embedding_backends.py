@@ -0,0 +1,392 @@
+"""
+Embedding Backends for the Vector Database
+Pluggable text-embedding implementations behind one ``encode`` interface.
+
+BACKENDS:
+- sentence-transformers: torch inference of the model (reference)
+- onnx: int8-quantized ONNX Runtime export of the same model, CPU only,
+  with mean pooling and L2 normalization done in NumPy
+
+The backend is selected with EMBEDDING_BACKEND in config/settings.py and
+shared process-wide (see ``get_embedding_model``).
+
+Prepare the ONNX model once with:
+    python -m src.core.embedding_backends
+"""
+import gc
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+import numpy as np
+from loguru import logger
+from config.settings import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_ONNX_DIR,
+    EMBEDDING_ONNX_THREADS,
+)
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+ONNX_MODEL_FILENAME = "model.onnx"
+ONNX_QUANTIZED_FILENAME = "model_int8.onnx"
+TOKENIZER_FILENAME = "tokenizer.json"
+
+# all-MiniLM-L6-v2 was trained with sequences of up to 256 word pieces
+ONNX_MAX_SEQUENCE_LENGTH = 256
+
+
+class EmbeddingBackend:
+    """Base class: encodes texts into L2-normalized float32 vectors."""
+
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.dimension: Optional[int] = None
+        # Token window of the model, including special tokens
+        self.max_seq_length: int = ONNX_MAX_SEQUENCE_LENGTH
+
+    def encode(
+        self,
+        texts: Union[str, Sequence[str]],
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """
+        Encode one text or a list of texts.
+
+        Mirrors ``SentenceTransformer.encode``: a single string gives a 1-D
+        vector, a list gives a (n, dimension) matrix.
+
+        Args:
+            texts: Text or list of texts
+            batch_size: Texts per inference batch
+            show_progress_bar: Accepted for compatibility, ignored
+
+        Returns:
+            Embeddings as a float32 array
+        """
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+
+        embeddings = self._encode_batch(batch, batch_size)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> Optional[int]:
+        """Get the embedding dimension."""
+        return self.dimension
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the vectors this backend produces (for embedding caches)."""
+        return f"{self.name}:{self.model_name}"
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        """
+        Count tokens per text with the model's tokenizer (no special tokens, no truncation).
+
+        Args:
+            texts: Texts to count
+
+        Returns:
+            Token counts aligned with ``texts``
+        """
+        raise NotImplementedError
+
+    def _encode_batch(self, texts: List[str], batch_size: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Torch inference through sentence-transformers."""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            raise ImportError("sentence-transformers not installed. Run: pip install sentence-transformers")
+        super().__init__(model_name)
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.max_seq_length = self.model.max_seq_length
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = self.model.tokenizer(list(texts), add_special_tokens=False, truncation=False)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def _encode_batch(self, texts: List[str], batch_size: int) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        ).astype(np.float32, copy=False)
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    ONNX Runtime inference on CPU.
+
+    Uses the int8-quantized model when present (see ``prepare_onnx_model``)
+    and the float model otherwise. Texts are sorted by length before
+    batching so each batch pads to a similar length.
+    """
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        model_dir: Union[str, Path] = EMBEDDING_ONNX_DIR,
+        threads: int = EMBEDDING_ONNX_THREADS,
+        quantized: bool = True
+    ):
+        """
+        Load the ONNX model and tokenizer.
+
+        Args:
+            model_name: Name of the exported model (for statistics/cache keys)
+            model_dir: Directory with the .onnx file(s) and tokenizer.json
+            threads: Intra-op threads (0 lets ONNX Runtime decide)
+            quantized: Prefer the int8 model when it exists
+        """
+        if not ONNX_AVAILABLE:
+            raise ImportError("onnxruntime/tokenizers not installed. Run: pip install onnxruntime tokenizers")
+        super().__init__(model_name)
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / ONNX_QUANTIZED_FILENAME
+        if not quantized or not model_path.exists():
+            model_path = model_dir / ONNX_MODEL_FILENAME
+        if not model_path.exists() or not (model_dir / TOKENIZER_FILENAME).exists():
+            raise FileNotFoundError(
+                f"ONNX embedding model not found in {model_dir}. "
+                f"Run: python -m src.core.embedding_backends"
+            )
+        self.model_path = model_path
+        self.quantized = model_path.name == ONNX_QUANTIZED_FILENAME
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILENAME))
+        # Separate copy without truncation/padding for counting tokens
+        self.counting_tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILENAME))
+        self.counting_tokenizer.no_truncation()
+        self.counting_tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=ONNX_MAX_SEQUENCE_LENGTH)
+        pad_id = self.tokenizer.token_to_id("[PAD]")
+        self.tokenizer.enable_padding(pad_id=pad_id if pad_id is not None else 0)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.dimension = int(self._encode_batch(["dimension probe"], 1).shape[1])
+        logger.info(f"✓ ONNX embedding backend loaded: {model_path.name} ({self.dimension} dims)")
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        if not texts:
+            return []
+        encodings = self.counting_tokenizer.encode_batch(list(texts), add_special_tokens=False)
+        return [len(encoding.ids) for encoding in encodings]
+
+    def _encode_batch(self, texts: List[str], batch_size: int) -> np.ndarray:
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+
+        embeddings = None
+        for start in range(0, len(order), batch_size):
+            positions = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in positions])
+
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            # Mean pooling over real tokens, then L2 normalization
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            if embeddings is None:
+                embeddings = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            embeddings[positions] = pooled
+
+        return embeddings
+
+    @property
+    def cache_key(self) -> str:
+        return f"{super().cache_key}:{'int8' if self.quantized else 'fp32'}"
+
+
+BACKENDS = {
+    SentenceTransformerBackend.name: SentenceTransformerBackend,
+    OnnxEmbeddingBackend.name: OnnxEmbeddingBackend,
+}
+
+
+def create_embedding_backend(name: Optional[str] = None, model_name: str = EMBEDDING_MODEL_NAME) -> EmbeddingBackend:
+    """
+    Create an embedding backend by name.
+
+    Args:
+        name: Backend name (default EMBEDDING_BACKEND)
+        model_name: Model to load
+
+    Returns:
+        EmbeddingBackend instance
+    """
+    name = name or EMBEDDING_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_name)
+
+
+def embedding_backend_available(name: Optional[str] = None) -> bool:
+    """Check whether the dependencies of a backend are installed."""
+    name = name or EMBEDDING_BACKEND
+    if name == OnnxEmbeddingBackend.name:
+        return ONNX_AVAILABLE
+    return SENTENCE_TRANSFORMERS_AVAILABLE
+
+
+def prepare_onnx_model(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    output_dir: Union[str, Path] = EMBEDDING_ONNX_DIR,
+    quantize: bool = True
+) -> Path:
+    """
+    Download the ONNX export of a sentence-transformers model and quantize it.
+
+    The float model and tokenizer come from the ``onnx/`` folder of the
+    model's Hugging Face repository; the weights are then quantized to int8
+    with ONNX Runtime dynamic quantization.
+
+    Args:
+        model_name: Model name (``sentence-transformers/`` is prefixed if needed)
+        output_dir: Destination directory
+        quantize: Also write the int8 model
+
+    Returns:
+        Path of the model the ONNX backend will load
+    """
+    from huggingface_hub import hf_hub_download
+    import shutil
+
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    for remote, local in [(f"onnx/{ONNX_MODEL_FILENAME}", ONNX_MODEL_FILENAME), (TOKENIZER_FILENAME, TOKENIZER_FILENAME)]:
+        if not (output_dir / local).exists():
+            logger.info(f"Downloading {repo_id}/{remote}...")
+            shutil.copyfile(hf_hub_download(repo_id, remote), output_dir / local)
+
+    if not quantize:
+        return output_dir / ONNX_MODEL_FILENAME
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = output_dir / ONNX_QUANTIZED_FILENAME
+    quantize_dynamic(
+        str(output_dir / ONNX_MODEL_FILENAME),
+        str(quantized_path),
+        weight_type=QuantType.QInt8
+    )
+    logger.info(f"✓ Quantized ONNX model written to {quantized_path}")
+    return quantized_path
+
+
+# Process-wide embedding backend, shared by every VectorDBHandler
+_embedding_model: Optional[EmbeddingBackend] = None
+_embedding_model_lock = threading.Lock()
+
+
+def get_embedding_model() -> EmbeddingBackend:
+    """
+    Get the shared embedding backend, loading it on first use.
+
+    Returns:
+        EmbeddingBackend for EMBEDDING_BACKEND / EMBEDDING_MODEL_NAME
+    """
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                logger.info(f"Loading embedding model {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND}, this may take a moment)...")
+                _embedding_model = create_embedding_backend()
+                logger.info(f"✓ Embedding model loaded: {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND})")
+    return _embedding_model
+
+
+def is_embedding_model_loaded() -> bool:
+    """Check whether the shared embedding backend has been loaded."""
+    return _embedding_model is not None
+
+
+def warm_up_embedding_model() -> threading.Thread:
+    """
+    Load the shared embedding backend in a background thread.
+
+    Returns:
+        The started (daemon) thread
+    """
+    def _load():
+        try:
+            get_embedding_model().encode(["warm up"])
+        except Exception as e:
+            logger.warning(f"Embedding model warm-up failed: {e}")
+
+    thread = threading.Thread(target=_load, name="embedding-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def preload_embedding_model() -> bool:
+    """
+    Load the shared embedding backend in the current (parent) process.
+
+    Call this before worker processes are forked, e.g. at import time of the
+    app module under ``gunicorn --preload``. The weights are then shared
+    copy-on-write by every worker instead of being loaded once per worker.
+
+    Returns:
+        True if the model is loaded
+    """
+    try:
+        get_embedding_model().encode(["warm up"])
+        # Move loaded objects out of the collector's generations so GC passes
+        # in the workers do not touch (and thereby copy) the shared pages
+        gc.freeze()
+        logger.info("✓ Embedding model preloaded for forked workers")
+        return True
+    except Exception as e:
+        logger.warning(f"Embedding model preload failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    path = prepare_onnx_model()
+    backend = OnnxEmbeddingBackend()
+    print(f"ONNX model ready: {path} ({backend.dimension} dims)")
@@ -0,0 +1,223 @@
+"""
+Embedding Cache for the Vector Database
+Stores computed embeddings keyed by a hash of the backend/model and the
+text, so re-indexing unchanged records and repeated search queries skip
+the model entirely.
+
+LAYERS:
+- In-memory LRU (per process) for hot query strings
+- SQLite file on disk, shared by workers and kept across restarts
+"""
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+from loguru import logger
+from src.utils.metrics import record_cache_lookups
+from config.settings import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_MEMORY_SIZE,
+    EMBEDDING_CACHE_PATH,
+)
+
+
+def embedding_key(model_key: str, text: str) -> str:
+    """Hash a (model, text) pair into a cache key."""
+    return hashlib.sha256(f"{model_key}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-level (memory LRU + SQLite) cache of float32 embeddings."""
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = EMBEDDING_CACHE_PATH,
+        memory_size: int = EMBEDDING_CACHE_MEMORY_SIZE
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file (None keeps the cache in memory only)
+            memory_size: Maximum embeddings held in the in-memory LRU
+        """
+        self.path = Path(path) if path else None
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_key: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up embeddings for a list of texts.
+
+        Args:
+            model_key: Backend/model identifier (EmbeddingBackend.cache_key)
+            texts: Texts to look up
+
+        Returns:
+            List aligned with ``texts``; None where the embedding is not cached
+        """
+        keys = [embedding_key(model_key, text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+
+        with self._lock:
+            missing: Dict[str, List[int]] = {}
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing and self._conn is not None:
+                found = {}
+                missing_keys = list(missing)
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(missing_keys), 500):
+                    chunk = missing_keys[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    found.update(rows)
+                for key, blob in found.items():
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    for i in missing.pop(key):
+                        results[i] = vector
+                        self.disk_hits += 1
+
+            misses = sum(len(positions) for positions in missing.values())
+            self.misses += misses
+
+        record_cache_lookups("embedding", hits=len(keys) - misses, misses=misses)
+        return results
+
+    def put_many(self, model_key: str, texts: Sequence[str], vectors: np.ndarray):
+        """
+        Store embeddings for a list of texts.
+
+        Args:
+            model_key: Backend/model identifier (EmbeddingBackend.cache_key)
+            texts: Texts that were encoded
+            vectors: Embeddings aligned with ``texts``
+        """
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = embedding_key(model_key, text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+
+            if self._conn is not None and rows:
+                try:
+                    self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding cache write failed: {e}")
+
+    def encode(self, backend, texts: Sequence[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+        """
+        Encode texts through the cache, running the backend only on misses.
+
+        Args:
+            backend: EmbeddingBackend used for cache misses
+            texts: Texts to encode
+            batch_size: Backend batch size
+
+        Returns:
+            (len(texts), dimension) float32 array
+        """
+        texts = list(texts)
+        if not texts:
+            return backend.encode(texts, batch_size=batch_size)
+
+        model_key = backend.cache_key
+        vectors = self.get_many(model_key, texts)
+
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            encoded = backend.encode(missing, batch_size=batch_size)
+            self.put_many(model_key, missing, encoded)
+            by_text = dict(zip(missing, encoded))
+            vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+
+        return np.vstack(vectors).astype(np.float32, copy=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts and size of the cache."""
+        with self._lock:
+            entries = None
+            if self._conn is not None:
+                entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": entries,
+                "path": str(self.path) if self.path else None,
+            }
+
+    def clear(self):
+        """Delete all cached embeddings."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Get the process-wide embedding cache.
+
+    Returns:
+        Shared EmbeddingCache, or None when EMBEDDING_CACHE_ENABLED is off
+    """
+    global _embedding_cache
+    if not EMBEDDING_CACHE_ENABLED:
+        return None
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                try:
+                    _embedding_cache = EmbeddingCache()
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding cache file unavailable ({e}), using memory only")
+                    _embedding_cache = EmbeddingCache(path=None)
+    return _embedding_cache
@@ -0,0 +1,204 @@
+"""
+Result Cache for FutureHouse Evaluations
+Stores API evaluation results keyed by a hash of the model and every input
+that affects the score, so re-running a batch (or re-grading after a rubric
+tweak) only calls the API for answers whose inputs changed.
+
+Entries expire after a TTL and can be invalidated explicitly by model,
+kind or age. Fallback/error results are never cached.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+from loguru import logger
+from src.utils.metrics import record_cache_lookups
+from config.settings import (
+    FUTUREHOUSE_CACHE_ENABLED,
+    FUTUREHOUSE_CACHE_PATH,
+    FUTUREHOUSE_CACHE_TTL_SECONDS,
+)
+
+
+def evaluation_key(kind: str, model: str, **fields: Any) -> str:
+    """
+    Hash an evaluation request into a cache key.
+
+    Args:
+        kind: Request type ("evaluate", "analyze-research")
+        model: FutureHouse model name
+        **fields: Request inputs (strings are compared after stripping
+            surrounding whitespace)
+
+    Returns:
+        Hex SHA-256 key
+    """
+    normalized = {k: v.strip() if isinstance(v, str) else v for k, v in fields.items()}
+    payload = json.dumps({"kind": kind, "model": model, **normalized}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """SQLite-backed cache of evaluation results with TTL."""
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = FUTUREHOUSE_CACHE_PATH,
+        ttl_seconds: float = FUTUREHOUSE_CACHE_TTL_SECONDS
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file (None keeps the cache in memory only)
+            ttl_seconds: Age after which an entry is treated as missing
+                (0 or less: never expire)
+        """
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path) if self.path else ":memory:", check_same_thread=False)
+        if self.path:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS evaluations ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, model TEXT NOT NULL, "
+            "result TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Key from evaluation_key()
+
+        Returns:
+            Cached result dict, or None if missing or expired
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM evaluations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                record_cache_lookups("futurehouse_evaluation", misses=1)
+                return None
+            if self.ttl_seconds > 0 and time.time() - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM evaluations WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                self.misses += 1
+                record_cache_lookups("futurehouse_evaluation", misses=1)
+                return None
+            self.hits += 1
+            record_cache_lookups("futurehouse_evaluation", hits=1)
+        return json.loads(row[0])
+
+    def put(self, key: str, kind: str, model: str, result: Dict[str, Any]):
+        """
+        Store a result (skipped for error/fallback results).
+
+        Args:
+            key: Key from evaluation_key()
+            kind: Request type
+            model: FutureHouse model name
+            result: Result dict returned by the client
+        """
+        if result.get("error"):
+            return
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO evaluations (key, kind, model, result, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, model, json.dumps(result, default=str), time.time())
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Evaluation cache write failed: {e}")
+
+    def invalidate(
+        self,
+        model: Optional[str] = None,
+        kind: Optional[str] = None,
+        older_than_seconds: Optional[float] = None
+    ) -> int:
+        """
+        Delete cached results (all of them when no filter is given).
+
+        Args:
+            model: Only results from this model
+            kind: Only this request type
+            older_than_seconds: Only results older than this
+
+        Returns:
+            Number of entries deleted
+        """
+        clauses, params = [], []
+        if model is not None:
+            clauses.append("model = ?")
+            params.append(model)
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if older_than_seconds is not None:
+            clauses.append("created_at < ?")
+            params.append(time.time() - older_than_seconds)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            deleted = self._conn.execute(f"DELETE FROM evaluations{where}", params).rowcount
+            self._conn.commit()
+        logger.info(f"Evaluation cache: invalidated {deleted} entries")
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counts and size of the cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "ttl_seconds": self.ttl_seconds,
+                "path": str(self.path) if self.path else None,
+            }
+
+
+_evaluation_cache: Optional[EvaluationCache] = None
+_evaluation_cache_lock = threading.Lock()
+
+
+def get_evaluation_cache() -> Optional[EvaluationCache]:
+    """
+    Get the process-wide evaluation cache.
+
+    Returns:
+        Shared EvaluationCache, or None when FUTUREHOUSE_CACHE_ENABLED is off
+    """
+    global _evaluation_cache
+    if not FUTUREHOUSE_CACHE_ENABLED:
+        return None
+    if _evaluation_cache is None:
+        with _evaluation_cache_lock:
+            if _evaluation_cache is None:
+                try:
+                    _evaluation_cache = EvaluationCache()
+                except sqlite3.Error as e:
+                    logger.warning(f"Evaluation cache file unavailable ({e}), using memory only")
+                    _evaluation_cache = EvaluationCache(path=None)
+    return _evaluation_cache
@@ -415,6 +415,63 @@ class ExcelHandler:
             logger.error(f"Failed to append courses data: {e}")
             return False
     
+    def write_grading_workbook(
+        self,
+        workbook_filename: str,
+        student_rows: List[Dict[str, Any]],
+        answer_rows: List[Dict[str, Any]],
+        question_numbers: List[int],
+        collusion_rows: Optional[List[Dict[str, Any]]] = None
+    ) -> bool:
+        """Write (or rewrite) an answer-script grading workbook.
+
+        Grading workbooks are not academic-record batches, so they are not
+        added to the batch metadata.
+
+        Args:
+            workbook_filename: File name in the Excel directory
+            student_rows: One row per student (totals and per-question scores)
+            answer_rows: One row per graded answer
+            question_numbers: Question numbers (the per-question score columns)
+            collusion_rows: Ranked near-identical answer pairs (adds a
+                'Collusion Report' sheet)
+
+        Returns:
+            True if the workbook was written, False otherwise
+        """
+        try:
+            student_headers = (
+                ['Roll Number', 'Student Name', 'Script Filename']
+                + [f"Q{n}" for n in question_numbers]
+                + ['Total', 'Max Total', 'Percentage', 'Provisional Answers', 'Graded At']
+            )
+            answer_headers = [
+                'Roll Number', 'Student Name', 'Question', 'Score', 'Max Marks',
+                'Model Used', 'Provisional', 'Feedback'
+            ]
+            sheets = [
+                ('Student Totals', student_headers, student_rows),
+                ('Answer Scores', answer_headers, answer_rows),
+            ]
+            if collusion_rows is not None:
+                sheets.append(('Collusion Report', [
+                    'Rank', 'Question', 'Roll Number A', 'Student Name A', 'Roll Number B', 'Student Name B',
+                    'Text Overlap', 'Semantic Similarity', 'Signals', 'Questions Flagged For Pair'
+                ], collusion_rows))
+            
+            workbook_path = self.excel_dir / workbook_filename
+            with pd.ExcelWriter(workbook_path, engine='openpyxl') as writer:
+                for sheet_name, headers, rows in sheets:
+                    pd.DataFrame(rows, columns=headers).to_excel(writer, sheet_name=sheet_name, index=False)
+                    self._format_excel_sheet(writer.sheets[sheet_name], headers)
+
+            logger.info(f"Wrote grading workbook {workbook_path} ({len(student_rows)} students)")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to write grading workbook: {e}")
+            return False
+
     def _update_batch_record_count(self, batch_filename: str, record_count: int):
         """Update record count for a batch in metadata."""
         for batch in self.batch_metadata["batches"]:
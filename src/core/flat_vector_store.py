@@ -0,0 +1,412 @@
+"""
+Flat Vector Store (memory-mapped NumPy)
+Lightweight alternative to ChromaDB for VectorDBHandler at our corpus size
+(tens of thousands of records): exact top-k search by one matrix-vector
+product, no SQLite/HNSW stack, near-instant startup.
+
+LAYOUT (one directory per collection):
+- embeddings.npy: L2-normalized float32 rows, memory-mapped; preallocated
+  with spare capacity so appends are written in place
+- records.json: IDs, documents and metadata stored column by column
+
+Implements the subset of the Chroma collection API that VectorDBHandler
+uses (get/query/upsert/add/delete/count with ``where`` filters), returning
+results in Chroma's shapes. Distances are squared L2 between normalized
+vectors (2 - 2 * cosine), matching Chroma's default space.
+"""
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+from loguru import logger
+
+# Subdirectory of the vector DB directory holding the flat collections
+FLAT_STORE_DIRNAME = "flat"
+
+_EMBEDDINGS_FILE = "embeddings.npy"
+_RECORDS_FILE = "records.json"
+_INITIAL_CAPACITY = 1024
+
+_ALL_FIELDS = ("documents", "metadatas", "embeddings")
+_COMPARISONS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+class FlatCollection:
+    """One collection: memory-mapped embedding matrix plus columnar metadata."""
+
+    def __init__(self, path: Path, name: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Open (or create) a collection directory.
+
+        Args:
+            path: Collection directory
+            name: Collection name
+            metadata: Collection description (kept for API parity)
+        """
+        self.path = Path(path)
+        self.name = name
+        self.metadata = metadata or {}
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+
+        self._ids: List[str] = []
+        self._documents: List[Optional[str]] = []
+        self._columns: Dict[str, List[Any]] = {}
+        self._position: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._filter_cache: Dict[str, np.ndarray] = {}
+        self._load()
+
+    # ------------------------------------------------------------------
+    # CHROMA-COMPATIBLE API
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        """Insert new records (existing IDs are rejected, like Chroma)."""
+        with self._lock:
+            duplicates = [record_id for record_id in ids if record_id in self._position]
+            if duplicates:
+                raise ValueError(f"IDs already exist in '{self.name}': {duplicates[:5]}")
+            self.upsert(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        """Insert or replace records by ID."""
+        ids = list(ids)
+        if not ids:
+            return
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate IDs in upsert")
+        vectors = self._normalize(embeddings)
+        if len(vectors) != len(ids):
+            raise ValueError("ids and embeddings must have the same length")
+        documents = list(documents) if documents is not None else [None] * len(ids)
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(ids)
+
+        with self._lock:
+            self._ensure_capacity(len(self._ids) + len(ids), vectors.shape[1])
+            for record_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                row = self._position.get(record_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._position[record_id] = row
+                    self._ids.append(record_id)
+                    self._documents.append(None)
+                    for column in self._columns.values():
+                        column.append(None)
+                self._vectors[row] = vector
+                self._documents[row] = document
+                self._set_metadata(row, metadata or {})
+            self._save()
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None):
+        """Delete records by ID and/or metadata filter."""
+        with self._lock:
+            rows = self._select(ids, where)
+            if len(rows) == 0:
+                return
+            keep = np.ones(len(self._ids), dtype=bool)
+            keep[rows] = False
+            kept = np.flatnonzero(keep)
+
+            # Compact the matrix in place; capacity is unchanged
+            self._vectors[:len(kept)] = self._vectors[kept]
+            self._ids = [self._ids[i] for i in kept]
+            self._documents = [self._documents[i] for i in kept]
+            self._columns = {field: [values[i] for i in kept] for field, values in self._columns.items()}
+            self._columns = {field: values for field, values in self._columns.items()
+                             if any(value is not None for value in values)}
+            self._position = {record_id: i for i, record_id in enumerate(self._ids)}
+            self._save()
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> Dict[str, Any]:
+        """Fetch records by ID and/or metadata filter (insertion order)."""
+        with self._lock:
+            rows = self._select(ids, where)
+            start = offset or 0
+            rows = rows[start:start + limit] if limit is not None else rows[start:]
+            return self._result(rows, include)
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = ("documents", "metadatas", "distances")
+    ) -> Dict[str, Any]:
+        """Exact nearest neighbours of each query embedding."""
+        queries = self._normalize(query_embeddings)
+        fields = [field for field in include if field != "distances"]
+        batched = {"ids": [], "distances": [] if "distances" in include else None,
+                   **{field: ([] if field in include else None) for field in _ALL_FIELDS}}
+
+        with self._lock:
+            rows = self._select(None, where)
+            if len(rows) and queries.shape[1] != self._vectors.shape[1]:
+                raise ValueError(f"Query dimension {queries.shape[1]} != collection dimension {self._vectors.shape[1]}")
+            if len(rows) == 0:
+                # Empty collection (no matrix yet) or nothing matches the filter
+                for _ in queries:
+                    batched["ids"].append([])
+                    for field in fields:
+                        batched[field].append([])
+                    if batched["distances"] is not None:
+                        batched["distances"].append([])
+                return batched
+            candidates = self._vectors[rows] if len(rows) < len(self._ids) else self._vectors[:len(self._ids)]
+            k = min(n_results, len(rows))
+
+            for query in queries:
+                if k == 0:
+                    top = np.empty(0, dtype=np.int64)
+                    similarities = np.empty(0, dtype=np.float32)
+                else:
+                    similarities = candidates @ query
+                    top = np.argpartition(-similarities, k - 1)[:k]
+                    top = top[np.argsort(-similarities[top], kind="stable")]
+                result = self._result(rows[top], fields)
+                batched["ids"].append(result["ids"])
+                for field in fields:
+                    batched[field].append(result[field])
+                if batched["distances"] is not None:
+                    batched["distances"].append((2.0 - 2.0 * similarities[top]).tolist())
+        return batched
+
+    # ------------------------------------------------------------------
+    # FILTERING
+    # ------------------------------------------------------------------
+
+    def _select(self, ids: Optional[Sequence[str]], where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Row numbers matching the IDs (in request order) and the filter."""
+        if ids is not None:
+            rows = np.array([self._position[i] for i in ids if i in self._position], dtype=np.int64)
+        else:
+            rows = np.arange(len(self._ids), dtype=np.int64)
+        if where:
+            rows = rows[self._match(where)[rows]]
+        return rows
+
+    def _match(self, where: Dict[str, Any]) -> np.ndarray:
+        """Boolean mask over all rows for a Chroma ``where`` clause."""
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._match(clause)
+            elif key == "$or":
+                any_mask = np.zeros(len(self._ids), dtype=bool)
+                for clause in condition:
+                    any_mask |= self._match(clause)
+                mask &= any_mask
+            elif isinstance(condition, dict):
+                for operator, value in condition.items():
+                    mask &= self._compare(key, operator, value)
+            else:
+                mask &= self._compare(key, "$eq", condition)
+        return mask
+
+    def _compare(self, field: str, operator: str, value: Any) -> np.ndarray:
+        values = self._column_array(field)
+        present = np.array([v is not None for v in values], dtype=bool)
+        if operator in _COMPARISONS:
+            numbers = self._numeric_column(field)
+            with np.errstate(invalid="ignore"):
+                return _COMPARISONS[operator](numbers, float(value)) & ~np.isnan(numbers)
+        if operator == "$eq":
+            return present & (values == value)
+        if operator == "$ne":
+            return present & (values != value)
+        if operator == "$in":
+            return present & np.isin(values, list(value))
+        if operator == "$nin":
+            return present & ~np.isin(values, list(value))
+        raise ValueError(f"Unsupported where operator: {operator}")
+
+    def _column_array(self, field: str) -> np.ndarray:
+        values = np.empty(len(self._ids), dtype=object)
+        values[:] = self._columns.get(field, [None] * len(self._ids))
+        return values
+
+    def _numeric_column(self, field: str) -> np.ndarray:
+        """Float view of a column (NaN where missing or non-numeric), cached until the next write."""
+        numbers = self._filter_cache.get(field)
+        if numbers is None:
+            numbers = np.array([
+                v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                for v in self._columns.get(field, [None] * len(self._ids))
+            ], dtype=np.float64)
+            self._filter_cache[field] = numbers
+        return numbers
+
+    # ------------------------------------------------------------------
+    # STORAGE
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize(embeddings) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def _set_metadata(self, row: int, metadata: Dict[str, Any]):
+        for field in metadata:
+            if field not in self._columns:
+                self._columns[field] = [None] * len(self._ids)
+        for field, column in self._columns.items():
+            column[row] = metadata.get(field)
+
+    def _metadata(self, row: int) -> Dict[str, Any]:
+        return {field: values[row] for field, values in self._columns.items() if values[row] is not None}
+
+    def _result(self, rows: np.ndarray, include: Sequence[str]) -> Dict[str, Any]:
+        rows = [int(i) for i in rows]
+        return {
+            "ids": [self._ids[i] for i in rows],
+            "documents": [self._documents[i] for i in rows] if "documents" in include else None,
+            "metadatas": [self._metadata(i) for i in rows] if "metadatas" in include else None,
+            "embeddings": (np.array(self._vectors[rows]) if rows else np.empty((0, 0), dtype=np.float32))
+            if "embeddings" in include else None,
+        }
+
+    def _ensure_capacity(self, size: int, dimension: int):
+        """Grow (or create) the memory-mapped matrix so it holds ``size`` rows."""
+        if self._vectors is not None:
+            if dimension != self._vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {dimension} != collection dimension {self._vectors.shape[1]}")
+            if size <= len(self._vectors):
+                return
+
+        capacity = max(_INITIAL_CAPACITY, len(self._vectors) if self._vectors is not None else 0)
+        while capacity < size:
+            capacity *= 2
+
+        tmp_path = self.path / (_EMBEDDINGS_FILE + ".tmp")
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, dimension))
+        if self._vectors is not None and self._ids:
+            grown[:len(self._ids)] = self._vectors[:len(self._ids)]
+        grown.flush()
+        del grown
+        self._vectors = None
+        os.replace(tmp_path, self.path / _EMBEDDINGS_FILE)
+        self._vectors = np.load(self.path / _EMBEDDINGS_FILE, mmap_mode="r+")
+
+    def _load(self):
+        records_path = self.path / _RECORDS_FILE
+        if records_path.exists():
+            with open(records_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            self._ids = records["ids"]
+            self._documents = records["documents"]
+            self._columns = records["columns"]
+            self._position = {record_id: i for i, record_id in enumerate(self._ids)}
+        if (self.path / _EMBEDDINGS_FILE).exists():
+            self._vectors = np.load(self.path / _EMBEDDINGS_FILE, mmap_mode="r+")
+
+    def _save(self):
+        """Flush vectors, then atomically replace the records file (the source of truth for row count)."""
+        self._filter_cache.clear()
+        if self._vectors is not None:
+            self._vectors.flush()
+        tmp_path = self.path / (_RECORDS_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"ids": self._ids, "documents": self._documents, "columns": self._columns}, f)
+        os.replace(tmp_path, self.path / _RECORDS_FILE)
+
+
+class FlatVectorClient:
+    """Chroma-client-shaped container of FlatCollections under one directory."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._collections: Dict[str, FlatCollection] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> FlatCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = FlatCollection(self.path / name, name, metadata)
+            return self._collections[name]
+
+    def reset(self):
+        """Delete every collection's data (open collections become empty)."""
+        with self._lock:
+            for collection in self._collections.values():
+                collection.delete(ids=list(collection._ids))
+            for child in self.path.iterdir():
+                if child.is_dir() and child.name not in self._collections:
+                    shutil.rmtree(child)
+
+
+def migrate_from_chroma(
+    chroma_directory: Union[str, Path],
+    flat_directory: Union[str, Path],
+    collections: Sequence[str] = ("students", "documents"),
+    page_size: int = 1000
+) -> Dict[str, int]:
+    """
+    Copy collections (with their stored embeddings) from a Chroma store.
+
+    Student metadata is normalized on the way (legacy string cgpa/semester
+    become numbers) so range filters match migrated records.
+
+    Args:
+        chroma_directory: Existing Chroma persist directory
+        flat_directory: Target flat store directory
+        collections: Collection names to copy
+        page_size: Records read and written per page
+
+    Returns:
+        Records copied per collection
+    """
+    import chromadb
+    from chromadb.config import Settings
+    from src.core.vector_db_handler import VectorDBHandler
+
+    source = chromadb.PersistentClient(
+        path=str(chroma_directory),
+        settings=Settings(anonymized_telemetry=False, allow_reset=True)
+    )
+    target = FlatVectorClient(flat_directory)
+    existing = {getattr(c, "name", c) for c in source.list_collections()}
+
+    copied = {}
+    for name in collections:
+        if name not in existing:
+            logger.warning(f"Collection '{name}' not found in {chroma_directory}, skipping")
+            continue
+        chroma_collection = source.get_collection(name)
+        flat_collection = target.get_or_create_collection(name, chroma_collection.metadata)
+        copied[name] = 0
+        offset = 0
+        while True:
+            page = chroma_collection.get(
+                include=["documents", "metadatas", "embeddings"], limit=page_size, offset=offset
+            )
+            if not page["ids"]:
+                break
+            metadatas = page["metadatas"]
+            if name == "students":
+                metadatas = [VectorDBHandler._normalize_student_metadata(m or {}) for m in metadatas]
+            flat_collection.upsert(page["ids"], page["embeddings"], page["documents"], metadatas)
+            copied[name] += len(page["ids"])
+            offset += len(page["ids"])
+        logger.info(f"✓ Migrated {copied[name]} records from Chroma collection '{name}'")
+    return copied
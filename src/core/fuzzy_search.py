@@ -0,0 +1,321 @@
+"""
+Fuzzy Name Search for Academic Records
+Typo-tolerant student lookup backed by a BK-tree over name tokens.
+
+FEATURES:
+- Transliteration-aware token normalization ("Iyer" ~ "Ayyar", "Sreenivas" ~ "Srinivas")
+- Bounded Levenshtein distance with early termination
+- BK-tree index: lookups visit only the branches within the distance bound
+- Prefix matching, so partial queries ("Sne", "22MCMB") still find records
+- Ranked results (total edit distance, exact token hits first)
+"""
+import bisect
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from loguru import logger
+
+# Spelling variants common in romanized Indian names, applied before comparison
+_TRANSLITERATION_RULES = [
+    ("ee", "i"),
+    ("oo", "u"),
+    ("ou", "u"),
+    ("th", "t"),
+    ("dh", "d"),
+    ("bh", "b"),
+    ("kh", "k"),
+    ("gh", "g"),
+    ("ph", "f"),
+    ("w", "v"),
+]
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_REPEATED_LETTER = re.compile(r"([a-z])\1+")
+
+# Number of built indexes kept in memory (one per batch selection)
+_INDEX_CACHE_SIZE = 8
+
+
+def normalize_name_token(token: str) -> str:
+    """
+    Normalize a single name token for fuzzy comparison.
+
+    Roll-number-like tokens (containing digits) are only lowercased so that
+    repeated digits stay significant.
+
+    Args:
+        token: Raw token
+
+    Returns:
+        Normalized token ("" if nothing is left)
+    """
+    token = _NON_ALNUM.sub("", str(token).lower())
+    if not token or any(ch.isdigit() for ch in token):
+        return token
+
+    for variant, canonical in _TRANSLITERATION_RULES:
+        token = token.replace(variant, canonical)
+
+    return _REPEATED_LETTER.sub(r"\1", token)
+
+
+def tokenize_name(text: str) -> List[str]:
+    """Split a name (or query) into normalized, non-empty tokens."""
+    if text is None:
+        return []
+    tokens = (normalize_name_token(part) for part in str(text).split())
+    return [t for t in tokens if t]
+
+
+def levenshtein_distance(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Compute the Levenshtein edit distance between two strings.
+
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Optional bound; once every cell of a row exceeds it the
+            computation stops and ``max_distance + 1`` is returned
+
+    Returns:
+        Edit distance (or ``max_distance + 1`` when the bound is exceeded)
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    if not b:
+        return len(a)
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+
+    return previous[-1]
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over strings under the Levenshtein metric.
+
+    Each child edge is labelled with its distance to the parent, so a query
+    with radius ``r`` only descends into edges within ``[d - r, d + r]``.
+    """
+
+    def __init__(self):
+        """Initialize an empty tree."""
+        # Node layout: [term, {distance: child_node}]
+        self._root = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, term: str):
+        """
+        Insert a term into the tree (duplicates are ignored).
+
+        Args:
+            term: Normalized term
+        """
+        if self._root is None:
+            self._root = [term, {}]
+            self._size = 1
+            return
+
+        node = self._root
+        while True:
+            distance = levenshtein_distance(term, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [term, {}]
+                self._size += 1
+                return
+            node = child
+
+    def search(self, term: str, max_distance: int) -> List[Tuple[str, int]]:
+        """
+        Find all terms within ``max_distance`` of ``term``.
+
+        Args:
+            term: Normalized query term
+            max_distance: Maximum edit distance
+
+        Returns:
+            List of (term, distance) tuples sorted by distance
+        """
+        if self._root is None:
+            return []
+
+        matches = []
+        stack = [self._root]
+        while stack:
+            node_term, children = stack.pop()
+            distance = levenshtein_distance(term, node_term)
+            if distance <= max_distance:
+                matches.append((node_term, distance))
+
+            low, high = distance - max_distance, distance + max_distance
+            for edge, child in children.items():
+                if low <= edge <= high:
+                    stack.append(child)
+
+        matches.sort(key=lambda m: (m[1], m[0]))
+        return matches
+
+
+class FuzzyNameIndex:
+    """
+    Precomputed fuzzy index over student names and roll numbers.
+
+    Every distinct normalized token goes into a single BK-tree, with a
+    posting list mapping tokens back to record positions.
+    """
+
+    def __init__(self, names: Sequence[str], roll_numbers: Optional[Sequence[str]] = None):
+        """
+        Build the index.
+
+        Args:
+            names: Student names, one per record
+            roll_numbers: Optional roll numbers aligned with ``names``
+        """
+        self.size = len(names)
+        self.tree = BKTree()
+        self.postings: Dict[str, set] = {}
+
+        roll_numbers = roll_numbers if roll_numbers is not None else [None] * len(names)
+        for position, (name, roll) in enumerate(zip(names, roll_numbers)):
+            tokens = tokenize_name(name)
+            roll_token = normalize_name_token(roll) if roll is not None else ""
+            if roll_token:
+                tokens.append(roll_token)
+            for token in tokens:
+                self.postings.setdefault(token, set()).add(position)
+
+        for token in self.postings:
+            self.tree.add(token)
+        # Sorted tokens for prefix lookups
+        self.tokens = sorted(self.postings)
+
+        logger.info(f"Built fuzzy name index: {self.size} records, {len(self.tree)} distinct tokens")
+
+    @staticmethod
+    def _token_bound(token: str, max_distance: int) -> int:
+        """Scale the distance bound down for short and roll-number tokens."""
+        if len(token) <= 2:
+            return 0
+        if any(ch.isdigit() for ch in token):
+            return min(max_distance, 1)
+        if len(token) == 3:
+            return min(max_distance, 1)
+        return max_distance
+
+    def _prefix_matches(self, prefix: str) -> List[str]:
+        """Indexed tokens that start with ``prefix`` (excluding ``prefix`` itself)."""
+        start = bisect.bisect_right(self.tokens, prefix)
+        matches = []
+        for token in self.tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.append(token)
+        return matches
+
+    def search(
+        self,
+        query: str,
+        max_distance: int = 2,
+        limit: Optional[int] = None,
+        prefix: bool = True
+    ) -> List[Tuple[int, int]]:
+        """
+        Rank records matching every token of the query.
+
+        A query token matches a record token within its edit-distance bound,
+        or (with ``prefix``) as a prefix of it (distance 0, ranked after
+        exact hits).
+
+        Args:
+            query: Free-text name or roll number (possibly misspelled)
+            max_distance: Maximum edit distance per query token
+            limit: Optional cap on the number of results
+            prefix: Also match query tokens as prefixes of record tokens
+
+        Returns:
+            List of (record_position, total_distance) sorted best-first
+        """
+        query_tokens = tokenize_name(query)
+        if not query_tokens:
+            return []
+
+        # position -> [total distance, exact token hits] accumulated across tokens
+        scores: Optional[Dict[int, List[int]]] = None
+        for token in query_tokens:
+            best: Dict[int, int] = {}
+            bound = self._token_bound(token, max_distance)
+            exact = set(self.postings.get(token, ()))
+            for match, distance in self.tree.search(token, bound):
+                for position in self.postings[match]:
+                    if distance < best.get(position, bound + 1):
+                        best[position] = distance
+            for match in (self._prefix_matches(token) if prefix else ()):
+                for position in self.postings[match]:
+                    best[position] = 0
+
+            if scores is None:
+                scores = {p: [d, int(p in exact)] for p, d in best.items()}
+            else:
+                scores = {
+                    p: [scores[p][0] + d, scores[p][1] + int(p in exact)]
+                    for p, d in best.items() if p in scores
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (item[1][0], -item[1][1], item[0]))
+        results = [(position, total) for position, (total, _) in ranked]
+        return results[:limit] if limit else results
+
+
+_index_cache: "OrderedDict[str, FuzzyNameIndex]" = OrderedDict()
+
+
+def get_name_index(
+    cache_key: str,
+    names: Sequence[str],
+    roll_numbers: Optional[Sequence[str]] = None
+) -> FuzzyNameIndex:
+    """
+    Get a cached index for a record set, building it on first use.
+
+    Args:
+        cache_key: Identifies the record set (e.g. batch fingerprint)
+        names: Student names, used only when the index must be built
+        roll_numbers: Roll numbers aligned with ``names``
+
+    Returns:
+        FuzzyNameIndex for the record set
+    """
+    index = _index_cache.get(cache_key)
+    if index is not None and index.size == len(names):
+        _index_cache.move_to_end(cache_key)
+        return index
+
+    index = FuzzyNameIndex(names, roll_numbers)
+    _index_cache[cache_key] = index
+    while len(_index_cache) > _INDEX_CACHE_SIZE:
+        _index_cache.popitem(last=False)
+    return index
@@ -8,7 +8,15 @@ import json
 from typing import Dict, Any, Optional
 from datetime import datetime
 from loguru import logger
-from config.settings import GEMINI_API_KEY, GEMINI_MODEL
+from src.core.context_retriever import ContextRetriever
+from src.core.query_planner import QueryPlanner
+from src.core.dataset_profile import get_profile
+from config.settings import (
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    AI_QUERY_PLANNER_ENABLED,
+    AI_QUERY_PLANNER_LLM_PHRASING,
+)
 
 
 class GeminiAIAgent:
@@ -21,102 +29,84 @@ class GeminiAIAgent:
         
         genai.configure(api_key=GEMINI_API_KEY)
         self.model = genai.GenerativeModel(GEMINI_MODEL)
+        self.retriever = ContextRetriever()
+        self.planner = QueryPlanner()
         logger.info(f"✓ Gemini AI Agent initialized with model: {GEMINI_MODEL}")
     
-    def _prepare_context(self, df: pd.DataFrame, batch_name: str = None) -> str:
+    def _prepare_context(
+        self,
+        df: pd.DataFrame,
+        batch_name: str = None,
+        question: str = "",
+        cache_key: Optional[str] = None,
+        profile: Optional[Dict[str, Any]] = None
+    ) -> tuple[str, Dict[str, Any]]:
         """
-        Prepare comprehensive context from DataFrame
+        Prepare context from DataFrame: aggregates over all students plus
+        the rows relevant to the question, bounded by the token budget
         
         Args:
             df: Student data DataFrame
             batch_name: Name of the batch
+            question: User's question (drives row retrieval)
+            cache_key: Optional batch fingerprint for reusing indexes
+            profile: Optional precomputed dataset profile
             
         Returns:
-            Formatted context string for Gemini
+            Tuple of (formatted context string for Gemini, retrieval info)
         """
-        # Basic stats
-        total_students = len(df)
+        # Precomputed aggregates (cached per batch fingerprint)
+        profile = profile or get_profile(df, cache_key)
+        cgpa_stats = profile['cgpa_stats']
         
-        # CGPA statistics
-        cgpa_col = df.get('CGPA')
-        if cgpa_col is not None:
-            cgpa_values = pd.to_numeric(cgpa_col, errors='coerce').dropna()
-            avg_cgpa = round(cgpa_values.mean(), 2) if len(cgpa_values) > 0 else 0
-            max_cgpa = round(cgpa_values.max(), 2) if len(cgpa_values) > 0 else 0
-            min_cgpa = round(cgpa_values.min(), 2) if len(cgpa_values) > 0 else 0
-        else:
-            avg_cgpa = max_cgpa = min_cgpa = 0
-            cgpa_values = pd.Series([])
-        
-        # Department distribution
-        dept_counts = {}
-        if 'Department' in df.columns:
-            dept_counts = df['Department'].value_counts().to_dict()
-        
-        # Department-wise averages
-        dept_avg = {}
-        if 'Department' in df.columns and 'CGPA' in df.columns:
-            dept_groups = df.groupby('Department')['CGPA']
-            for dept, values in dept_groups:
-                numeric_values = pd.to_numeric(values, errors='coerce').dropna()
-                if len(numeric_values) > 0:
-                    dept_avg[dept] = round(numeric_values.mean(), 2)
-        
-        # Top performers
-        top_students_list = []
-        if 'CGPA' in df.columns and 'Student Name' in df.columns:
-            top_df = df.nlargest(10, 'CGPA')
-            for idx, row in top_df.iterrows():
-                student_info = {
-                    'name': str(row.get('Student Name', 'N/A')),
-                    'roll_number': str(row.get('Roll Number', 'N/A')),
-                    'cgpa': round(float(row.get('CGPA', 0)), 2) if pd.notna(row.get('CGPA')) else 0,
-                    'department': str(row.get('Department', 'N/A'))
-                }
-                top_students_list.append(student_info)
+        # Relevant rows under the token budget
+        retrieval = self.retriever.retrieve(
+            question, df, cache_key=cache_key, cgpa_values=profile['cgpa_values']
+        )
         
         # Build comprehensive context
         context = f"""You are an intelligent academic data analyst for the University of Hyderabad.
 
 DATASET INFORMATION:
 - Batch: {batch_name or 'Current Academic Data'}
-- Total Students: {total_students}
+- Total Students: {profile['total_students']}
 
 CGPA STATISTICS:
-- Average CGPA: {avg_cgpa}
-- Highest CGPA: {max_cgpa}
-- Lowest CGPA: {min_cgpa}
+- Average CGPA: {cgpa_stats.get('average', 0)}
+- Highest CGPA: {cgpa_stats.get('highest', 0)}
+- Lowest CGPA: {cgpa_stats.get('lowest', 0)}
 
 DEPARTMENT BREAKDOWN:
 Student Count by Department:
-{json.dumps(dept_counts, indent=2)}
+{json.dumps(profile['department_counts'], indent=2)}
 
 Average CGPA by Department:
-{json.dumps(dept_avg, indent=2)}
+{json.dumps(profile['department_averages'], indent=2)}
 
 TOP PERFORMERS:
-{json.dumps(top_students_list, indent=2)}
+{json.dumps(profile['top_performers'], indent=2)}
 
-COMPLETE STUDENT DATA:
-{df.to_string()}
+RELEVANT STUDENT RECORDS ({retrieval['rows_included']} shown of {retrieval['rows_matched']} matching, {retrieval['total_rows']} total):
+{retrieval['text']}
 
 INSTRUCTIONS:
-1. Answer ONLY based on the COMPLETE STUDENT DATA table above
+1. Answer ONLY based on the statistics and student records above
 2. Be specific with numbers, names, and percentages
-3. Calculate averages from the actual CGPA values in the table
+3. The statistics cover ALL students; the records section may be a subset, so use the statistics for dataset-wide figures
 4. Include roll numbers when mentioning students
 5. If CGPA column shows 0 or NaN, mention that data quality issue
 6. Format numbers properly (CGPA to 2 decimal places)
 7. Be conversational but professional
 8. Keep answers concise (2-4 sentences for simple queries)
 """
-        return context
+        return context, retrieval
     
     def query(
         self, 
         question: str, 
         df: pd.DataFrame, 
-        batch_name: Optional[str] = None
+        batch_name: Optional[str] = None,
+        cache_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Query the academic data using Gemini AI
@@ -125,13 +115,25 @@ INSTRUCTIONS:
             question: User's question
             df: Student data DataFrame
             batch_name: Name of the batch
+            cache_key: Optional batch fingerprint for reusing indexes
             
         Returns:
             Response dictionary with answer and metadata
         """
         try:
+            # Aggregates shared by the planner and the prompt (cached per batch fingerprint)
+            profile = get_profile(df, cache_key)
+            
+            # Answer aggregate/lookup questions locally when possible
+            if AI_QUERY_PLANNER_ENABLED:
+                planned = self.planner.plan(
+                    question, df, cgpa_values=profile['cgpa_values'], cache_key=cache_key
+                )
+                if planned is not None:
+                    return self._planned_result(question, batch_name, planned, profile)
+            
             # Prepare context from data
-            context = self._prepare_context(df, batch_name)
+            context, retrieval = self._prepare_context(df, batch_name, question, cache_key, profile)
             
             # Build the full prompt
             prompt = f"""{context}
@@ -150,23 +152,21 @@ Provide a clear, data-driven answer based on the information above:"""
                 logger.error(f"Gemini API call failed: {type(gemini_error).__name__}: {str(gemini_error)}")
                 raise Exception(f"Gemini API error: {str(gemini_error)}")
             
-            # Calculate context stats
-            cgpa_values = pd.to_numeric(df['CGPA'], errors='coerce').dropna()
-            avg_cgpa = round(cgpa_values.mean(), 2) if len(cgpa_values) > 0 else 0
-            dept_count = len(df['Department'].unique()) if 'Department' in df.columns else 0
-            
             result = {
                 "response": answer,
                 "timestamp": datetime.now().isoformat(),
                 "query": question,
                 "batch_used": batch_name or "all_data",
                 "context_stats": {
-                    "total_students": len(df),
-                    "avg_cgpa": avg_cgpa,
-                    "departments": dept_count
+                    "total_students": profile['total_students'],
+                    "avg_cgpa": profile['cgpa_stats'].get('average', 0),
+                    "departments": profile['department_count'],
+                    "rows_in_context": retrieval['rows_included'],
+                    "rows_matched": retrieval['rows_matched']
                 },
                 "model": GEMINI_MODEL,
-                "provider": "gemini"
+                "provider": "gemini",
+                "answer_path": "llm"
             }
             
             logger.info(f"✓ Generated response: {len(answer)} chars")
@@ -181,6 +181,62 @@ Provide a clear, data-driven answer based on the information above:"""
                 "query": question
             }
     
+    def _planned_result(
+        self,
+        question: str,
+        batch_name: Optional[str],
+        planned: Dict[str, Any],
+        profile: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Build the response for a question answered by the local planner
+        
+        Args:
+            question: User's question
+            batch_name: Name of the batch
+            planned: Planner output (intent, answer, data)
+            profile: Dataset profile of the queried data
+            
+        Returns:
+            Response dictionary in the same shape as an LLM answer
+        """
+        answer = planned['answer']
+        answer_path = "planner"
+        
+        if AI_QUERY_PLANNER_LLM_PHRASING:
+            # Tiny prompt: only the question and the computed answer
+            prompt = f"""Rephrase this answer to the question in 1-3 friendly, professional sentences.
+Keep every name, roll number and number exactly as given. Do not add information.
+
+QUESTION: {question}
+ANSWER: {answer}"""
+            try:
+                response = self.model.generate_content(prompt)
+                answer = response.text.strip() or answer
+                answer_path = "planner+llm"
+            except Exception as e:
+                logger.warning(f"Gemini phrasing failed, returning planner answer: {e}")
+        
+        logger.info(f"✓ Answered locally ({planned['intent']}): {question[:100]}")
+        return {
+            "response": answer,
+            "timestamp": datetime.now().isoformat(),
+            "query": question,
+            "batch_used": batch_name or "all_data",
+            "context_stats": {
+                "total_students": profile['total_students'],
+                "avg_cgpa": profile['cgpa_stats'].get('average', 0),
+                "departments": profile['department_count']
+            },
+            "model": GEMINI_MODEL if answer_path == "planner+llm" else "local-planner",
+            "provider": "gemini" if answer_path == "planner+llm" else "local",
+            "answer_path": answer_path,
+            "planner": {
+                "intent": planned['intent'],
+                "data": planned['data']
+            }
+        }
+    
     def health_check(self) -> bool:
         """Check if Gemini is accessible"""
         try:
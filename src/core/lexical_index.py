@@ -0,0 +1,131 @@
+"""
+Lexical (BM25) Index for Student Records
+Keyword scoring over the searchable student text, used next to vector
+similarity so exact roll numbers, course codes and names rank first.
+
+FEATURES:
+- Okapi BM25 scoring with NumPy over per-token posting arrays
+- Identifier-aware tokenization ("21CS1001", "CS301" stay single tokens)
+- Optional allow-list of record IDs (metadata prefilter)
+- Reciprocal rank fusion of several ranked ID lists
+"""
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Rank offset used by reciprocal rank fusion
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens."""
+    return _TOKEN.findall(str(text).lower()) if text else []
+
+
+def is_identifier_query(query: str) -> bool:
+    """True if every token looks like a roll number or course code (has a digit)."""
+    tokens = tokenize(query)
+    return bool(tokens) and all(any(ch.isdigit() for ch in token) for token in tokens)
+
+
+class BM25Index:
+    """In-memory BM25 index over a fixed list of documents."""
+
+    def __init__(self, ids: Sequence[str], texts: Sequence[str]):
+        """
+        Build the index.
+
+        Args:
+            ids: Record IDs
+            texts: Record texts aligned with ``ids``
+        """
+        self.ids = list(ids)
+        self._position = {record_id: i for i, record_id in enumerate(self.ids)}
+
+        lengths = np.zeros(len(self.ids), dtype=np.float32)
+        postings: Dict[str, Dict[int, int]] = {}
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[i] = len(tokens)
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[i] = counts.get(i, 0) + 1
+
+        average_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+        # Per-document length normalization term of the BM25 denominator
+        self._norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+
+        count = len(self.ids)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for token, counts in postings.items():
+            positions = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            frequencies = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            idf = math.log(1 + (count - len(counts) + 0.5) / (len(counts) + 0.5))
+            self._postings[token] = (positions, frequencies, idf)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        allowed_ids: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank records by BM25 score.
+
+        Args:
+            query: Free-text query
+            top_k: Maximum number of results
+            allowed_ids: Optional IDs to restrict the results to
+
+        Returns:
+            List of (record_id, score) sorted best-first (only positive scores)
+        """
+        if not self.ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            positions, frequencies, idf = posting
+            scores[positions] += idf * frequencies * (BM25_K1 + 1) / (frequencies + self._norm[positions])
+
+        if allowed_ids is not None:
+            mask = np.zeros(len(self.ids), dtype=bool)
+            mask[[self._position[i] for i in allowed_ids if i in self._position]] = True
+            scores[~mask] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in ranked]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked ID lists: score(id) = sum over lists of 1 / (k + rank).
+
+    Args:
+        rankings: Ranked lists of IDs (best first)
+        k: Rank offset (larger values flatten the contribution of top ranks)
+
+    Returns:
+        List of (id, fused_score) sorted best-first
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, record_id in enumerate(ranking, 1):
+            fused[record_id] = fused.get(record_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
@@ -9,6 +9,10 @@ import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
 from loguru import logger
+from src.utils.metrics import track_stage
+
+# Per-page messages are sampled (see src/utils/logger.py)
+_page_logger = logger.bind(sample="ocr.page")
 
 
 class OCRProcessor:
@@ -41,7 +45,7 @@ class OCRProcessor:
             Extracted text content or None if extraction fails
         """
         try:
-            logger.info(f"Starting OCR extraction from: {pdf_path}")
+            logger.debug(f"Starting OCR extraction from: {pdf_path}")
             
             # Open PDF with PyMuPDF
             pdf_document = fitz.open(pdf_path)
@@ -57,10 +61,10 @@ class OCRProcessor:
                     if page_text.strip():
                         # If direct text extraction works, use it
                         text_content += page_text + "\n"
-                        logger.info(f"Page {page_num + 1}: Direct text extraction successful")
+                        _page_logger.info(f"Page {page_num + 1}: Direct text extraction successful")
                     else:
                         # If no text, convert page to image and use OCR
-                        logger.info(f"Page {page_num + 1}: No direct text, using OCR")
+                        _page_logger.info(f"Page {page_num + 1}: No direct text, using OCR")
                         
                         # Convert page to image
                         mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better OCR
@@ -71,16 +75,17 @@ class OCRProcessor:
                         image = Image.open(io.BytesIO(img_data))
                         
                         # Perform OCR
-                        ocr_text = pytesseract.image_to_string(image, lang='eng')
+                        with track_stage("ocr_page"):
+                            ocr_text = pytesseract.image_to_string(image, lang='eng')
                         
                         if ocr_text.strip():
                             text_content += ocr_text + "\n"
-                            logger.info(f"Page {page_num + 1}: OCR extraction successful")
+                            _page_logger.info(f"Page {page_num + 1}: OCR extraction successful")
                         else:
-                            logger.warning(f"Page {page_num + 1}: OCR extraction failed")
+                            _page_logger.warning(f"Page {page_num + 1}: OCR extraction failed")
                             
                 except Exception as e:
-                    logger.error(f"Error processing page {page_num + 1}: {e}")
+                    _page_logger.error(f"Error processing page {page_num + 1} of {pdf_path}: {e}")
                     continue
             
             pdf_document.close()
@@ -0,0 +1,322 @@
+"""
+Local Query Planner for Aggregate and Lookup Questions
+Answers common questions ("average CGPA in Physics", "how many students
+below 6", "top 5 in CS", "CGPA of 21CS1001") exactly with pandas, so they
+skip the LLM round trip over the student table.
+
+Questions the planner does not recognize return None and go to the LLM.
+"""
+import re
+from typing import Any, Dict, List, Optional, Sequence
+import pandas as pd
+from loguru import logger
+
+from src.core.context_retriever import (
+    _STOPWORDS,
+    _WORD_PATTERN,
+    _department_aliases,
+    apply_filters,
+    parse_question_filters,
+)
+from src.core.fuzzy_search import get_name_index
+
+# Questions asking for judgement or explanation always go to the LLM
+_REASONING_PATTERN = re.compile(
+    r"\b(why|explain|suggest|recommend|improve|should|advice|advise|trend|insight|analy[sz]e|analysis|"
+    r"predict|reason|summar(?:y|ize|ise)|compare|versus|vs)\b"
+)
+_PER_DEPARTMENT_PATTERN = re.compile(
+    r"\b(per|by|each|every|across)\s+(department|dept)s?\b|\bdepartment[- ]?wise\b"
+)
+_TOP_N_PATTERN = re.compile(r"\b(?:top|best|highest)\s+(\d{1,3})\b|\b(\d{1,3})\s+(?:top|best|highest)\b")
+_BOTTOM_N_PATTERN = re.compile(
+    r"\b(?:bottom|worst|lowest|weakest)\s+(\d{1,3})\b|\b(\d{1,3})\s+(?:bottom|worst|lowest|weakest)\b"
+)
+_TOP_PATTERN = re.compile(r"\b(top|best|topper|toppers|highest)\b")
+_BOTTOM_PATTERN = re.compile(r"\b(bottom|worst|lowest|weakest)\b")
+_AVERAGE_PATTERN = re.compile(r"\b(average|avg|mean)\b")
+_COUNT_PATTERN = re.compile(r"\b(how many|count|number of|total)\b")
+_LIST_PATTERN = re.compile(r"\b(list|show|which|who are|names of|display)\b")
+
+# Words naming something other than CGPA, department or name; a question
+# using them always has a condition the planner cannot compute
+_METRIC_WORDS = {
+    'sgpa', 'sgpas', 'semester', 'semesters', 'sem', 'attendance', 'backlog', 'backlogs', 'arrear', 'arrears',
+    'fail', 'fails', 'failed', 'failing', 'failure', 'failures', 'pass', 'passed', 'passing', 'risk',
+    'gender', 'male', 'males', 'female', 'females', 'boys', 'girls', 'men', 'women',
+}
+
+# Filler words that may appear in a question the planner answers exactly
+# ("how many students have been processed in total?", "top 5 performers")
+_GENERIC_WORDS = (_STOPWORDS - _METRIC_WORDS) | {
+    'total', 'overall', 'there', 'been', 'be', 'processed', 'uploaded', 'enrolled', 'records', 'record',
+    'data', 'dataset', 'currently', 'now', 'we', 'our', 'i', 'you', 'can', 'please', 'got', 'get', 'this',
+    'these', 'that', 'those', 'it', 'its', 'whole', 'entire', 'class', 'cgpas', 'registered', 'exactly',
+    'topper', 'toppers', 'performer', 'performers', 'weakest', 'rank', 'ranked', 'ranking', 'name', 'names',
+    'display', 'per', 'each', 'every', 'across', 'wise', 'departments', 'depts',
+}
+
+# Default and maximum number of rows named in a ranked or listed answer
+_DEFAULT_TOP_N = 5
+_MAX_LISTED = 20
+
+
+class QueryPlanner:
+    """Recognizes aggregate/lookup intents and computes them locally."""
+
+    def plan(
+        self,
+        question: str,
+        df: pd.DataFrame,
+        cgpa_values: Optional[pd.Series] = None,
+        cache_key: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Try to answer a question directly from the DataFrame.
+
+        Args:
+            question: User's question
+            df: Student data
+            cgpa_values: Optional precomputed numeric CGPA series aligned with ``df``
+            cache_key: Optional batch fingerprint for reusing the name index
+
+        Returns:
+            Dictionary with ``intent``, ``answer`` (plain-text answer) and
+            ``data`` (structured result), or None if the question needs the LLM
+        """
+        text = question.lower()
+        if _REASONING_PATTERN.search(text):
+            return None
+
+        try:
+            df = df.reset_index(drop=True)
+            if cgpa_values is None:
+                cgpa_values = pd.to_numeric(df.get('CGPA', pd.Series(index=df.index, dtype=float)), errors='coerce')
+            else:
+                cgpa_values = cgpa_values.reset_index(drop=True)
+
+            name_index = None
+            if cache_key and 'Student Name' in df.columns:
+                name_index = get_name_index(f"context:{cache_key}", df['Student Name'].tolist())
+            filters = parse_question_filters(question, df, name_index)
+
+            mask = apply_filters(df, filters, cgpa_values)
+            scope = self._describe_scope(filters)
+
+            if _PER_DEPARTMENT_PATTERN.search(text) and 'Department' in df.columns:
+                if self._unparsed_terms(text, filters):
+                    return None
+                if _AVERAGE_PATTERN.search(text):
+                    return self._department_averages(df, mask, cgpa_values)
+                if _COUNT_PATTERN.search(text):
+                    return self._department_counts(df, mask)
+                return None
+
+            top_n = self._ranked_count(_TOP_N_PATTERN, text)
+            bottom_n = self._ranked_count(_BOTTOM_N_PATTERN, text)
+            if top_n or bottom_n or _TOP_PATTERN.search(text) or _BOTTOM_PATTERN.search(text):
+                if _AVERAGE_PATTERN.search(text) or _COUNT_PATTERN.search(text):
+                    return None
+                ascending = bool(bottom_n) or (not top_n and not _TOP_PATTERN.search(text))
+                if self._unparsed_terms(text, filters, counts=(top_n, bottom_n)):
+                    return None
+                n = bottom_n or top_n or (_DEFAULT_TOP_N if re.search(r"\b(students|toppers|performers)\b", text) else 1)
+                return self._ranked(df, mask, cgpa_values, n, ascending, scope)
+
+            # Aggregates, rankings and lists are only exact when every condition
+            # in the question was understood ("how many students failed" has none)
+            if _AVERAGE_PATTERN.search(text) or _COUNT_PATTERN.search(text):
+                if self._unparsed_terms(text, filters):
+                    return None
+                if _AVERAGE_PATTERN.search(text):
+                    return self._average(mask, cgpa_values, scope)
+                return self._count(mask, scope, len(df))
+
+            if filters['roll_numbers'] or filters['name_positions']:
+                return self._lookup(df, filters, cgpa_values)
+
+            if _LIST_PATTERN.search(text) and (filters['departments'] or filters['cgpa_lower'] or filters['cgpa_upper']):
+                if self._unparsed_terms(text, filters):
+                    return None
+                return self._list(df, mask, cgpa_values, scope)
+
+        except Exception as e:
+            logger.warning(f"Query planner failed, deferring to LLM: {e}")
+
+        return None
+
+    # ------------------------------------------------------------------
+    # INTENT HANDLERS
+    # ------------------------------------------------------------------
+
+    def _average(self, mask: pd.Series, cgpa_values: pd.Series, scope: str) -> Dict[str, Any]:
+        values = cgpa_values[mask].dropna()
+        if values.empty:
+            answer = f"No students{scope} have a recorded CGPA."
+            data = {'count': 0, 'average': None}
+        else:
+            average = round(float(values.mean()), 2)
+            answer = (
+                f"The average CGPA of the {self._students(len(values))}{scope} is {average:.2f} "
+                f"(range {values.min():.2f}-{values.max():.2f})."
+            )
+            data = {
+                'count': int(len(values)),
+                'average': average,
+                'min': round(float(values.min()), 2),
+                'max': round(float(values.max()), 2),
+            }
+        return {'intent': 'average_cgpa', 'answer': answer, 'data': data}
+
+    def _count(self, mask: pd.Series, scope: str, total: int) -> Dict[str, Any]:
+        count = int(mask.sum())
+        noun = "student" if count == 1 else "students"
+        verb = "is" if count == 1 else "are"
+        answer = f"There {verb} {count} {noun}{scope} (out of {self._students(total)})."
+        return {'intent': 'count', 'answer': answer, 'data': {'count': count, 'total': total}}
+
+    def _ranked(
+        self,
+        df: pd.DataFrame,
+        mask: pd.Series,
+        cgpa_values: pd.Series,
+        n: int,
+        ascending: bool,
+        scope: str
+    ) -> Dict[str, Any]:
+        values = cgpa_values[mask].dropna()
+        selected = values.nsmallest(n) if ascending else values.nlargest(n)
+        students = [self._student_summary(df, position, cgpa_values) for position in selected.index]
+        intent = 'bottom_n' if ascending else 'top_n'
+
+        if not students:
+            answer = f"No students{scope} have a recorded CGPA."
+        elif n == 1:
+            s = students[0]
+            which = "lowest" if ascending else "highest"
+            answer = f"{s['name']} ({s['roll_number']}, {s['department']}) has the {which} CGPA{scope}: {s['cgpa']:.2f}."
+        else:
+            label = "Bottom" if ascending else "Top"
+            lines = [f"{label} {self._students(len(students))}{scope} by CGPA:"]
+            lines += [
+                f"{i}. {s['name']} ({s['roll_number']}, {s['department']}) - {s['cgpa']:.2f}"
+                for i, s in enumerate(students, 1)
+            ]
+            answer = "\n".join(lines)
+
+        return {'intent': intent, 'answer': answer, 'data': {'students': students}}
+
+    def _lookup(self, df: pd.DataFrame, filters: Dict[str, Any], cgpa_values: pd.Series) -> Optional[Dict[str, Any]]:
+        positions: List[int] = []
+        if filters['roll_numbers'] and 'Roll Number' in df.columns:
+            rolls = df['Roll Number'].astype(str).str.upper()
+            positions.extend(rolls.index[rolls.isin(filters['roll_numbers'])].tolist())
+        positions.extend(p for p in filters['name_positions'] if p not in positions)
+        if not positions:
+            return None
+
+        students = [self._student_summary(df, position, cgpa_values) for position in positions[:_MAX_LISTED]]
+        lines = []
+        for s in students:
+            cgpa = f"CGPA {s['cgpa']:.2f}" if s['cgpa'] is not None else "no CGPA recorded"
+            semester = f", semester {s['semester']}" if s.get('semester') else ""
+            lines.append(f"{s['name']} ({s['roll_number']}), {s['department']}{semester}: {cgpa}.")
+
+        return {'intent': 'student_lookup', 'answer': "\n".join(lines), 'data': {'students': students}}
+
+    def _list(self, df: pd.DataFrame, mask: pd.Series, cgpa_values: pd.Series, scope: str) -> Dict[str, Any]:
+        matched = cgpa_values[mask].sort_values(ascending=False, na_position='last')
+        students = [self._student_summary(df, position, cgpa_values) for position in matched.index[:_MAX_LISTED]]
+        lines = [f"{self._students(len(matched))}{scope}" + (f" (showing {len(students)}):" if len(matched) > len(students) else ":")]
+        lines += [
+            f"- {s['name']} ({s['roll_number']}, {s['department']})"
+            + (f" - {s['cgpa']:.2f}" if s['cgpa'] is not None else "")
+            for s in students
+        ]
+        return {'intent': 'list', 'answer': "\n".join(lines), 'data': {'count': int(len(matched)), 'students': students}}
+
+    def _department_averages(self, df: pd.DataFrame, mask: pd.Series, cgpa_values: pd.Series) -> Dict[str, Any]:
+        grouped = cgpa_values[mask].groupby(df.loc[mask, 'Department']).mean().dropna().sort_values(ascending=False)
+        averages = {str(dept): round(float(avg), 2) for dept, avg in grouped.items()}
+        lines = ["Average CGPA by department:"] + [f"- {dept}: {avg:.2f}" for dept, avg in averages.items()]
+        return {'intent': 'department_averages', 'answer': "\n".join(lines), 'data': {'averages': averages}}
+
+    def _department_counts(self, df: pd.DataFrame, mask: pd.Series) -> Dict[str, Any]:
+        counts = {str(dept): int(c) for dept, c in df.loc[mask, 'Department'].value_counts().items()}
+        lines = ["Students by department:"] + [f"- {dept}: {c}" for dept, c in counts.items()]
+        return {'intent': 'department_counts', 'answer': "\n".join(lines), 'data': {'counts': counts}}
+
+    # ------------------------------------------------------------------
+    # HELPERS
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _students(count: int) -> str:
+        return f"{count} student" if count == 1 else f"{count} students"
+
+    @staticmethod
+    def _unparsed_terms(text: str, filters: Dict[str, Any], counts: Sequence[Optional[int]] = ()) -> List[str]:
+        """
+        Content words of the question not accounted for by the parsed filters.
+
+        Args:
+            text: Lower-cased question
+            filters: Result of parse_question_filters
+            counts: Parsed "top N"/"bottom N" counts (their digits are accounted for)
+
+        Returns:
+            Unexplained words; empty if the question can be answered exactly
+        """
+        aliases = [alias for department in filters['departments'] for alias in _department_aliases(department)]
+        has_bound = bool(filters['cgpa_lower'] or filters['cgpa_upper'])
+        known_numbers = {str(n) for n in counts if n}
+        terms = []
+        for word in _WORD_PATTERN.findall(text):
+            if word in _GENERIC_WORDS:
+                continue
+            if word.isdigit() and (has_bound or word in known_numbers):
+                continue
+            stem = word.rstrip('s')
+            if any(word in alias.split() or (len(stem) >= 4 and alias.startswith(stem)) for alias in aliases):
+                continue
+            terms.append(word)
+        return terms
+
+    @staticmethod
+    def _ranked_count(pattern: re.Pattern, text: str) -> Optional[int]:
+        match = pattern.search(text)
+        if not match:
+            return None
+        n = int(match.group(1) or match.group(2))
+        return n if 0 < n <= 100 else None
+
+    @staticmethod
+    def _describe_scope(filters: Dict[str, Any]) -> str:
+        parts = []
+        if filters['departments']:
+            parts.append(f" in {' / '.join(filters['departments'])}")
+        lower, upper = filters['cgpa_lower'], filters['cgpa_upper']
+        if lower and upper:
+            parts.append(f" with CGPA between {lower[0]:g} and {upper[0]:g}")
+        elif lower:
+            parts.append(f" with CGPA {'at least' if lower[1] else 'above'} {lower[0]:g}")
+        elif upper:
+            parts.append(f" with CGPA {'at most' if upper[1] else 'below'} {upper[0]:g}")
+        return "".join(parts)
+
+    @staticmethod
+    def _student_summary(df: pd.DataFrame, position: int, cgpa_values: pd.Series) -> Dict[str, Any]:
+        row = df.loc[position]
+
+        def text(column):
+            value = row.get(column)
+            return None if value is None or pd.isna(value) or str(value).strip() == '' else str(value)
+
+        cgpa = cgpa_values.get(position)
+        return {
+            'name': text('Student Name') or 'N/A',
+            'roll_number': text('Roll Number') or 'N/A',
+            'department': text('Department') or 'N/A',
+            'semester': text('Semester'),
+            'cgpa': None if cgpa is None or pd.isna(cgpa) else round(float(cgpa), 2),
+        }
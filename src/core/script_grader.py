@@ -0,0 +1,487 @@
+"""
+Answer-Script Grading Pipeline
+Takes a directory of answer-script PDFs to marks: each script is extracted
+with OCRProcessor, split into per-question answers, and every answer is
+evaluated with FutureHouseClient.evaluate_answer. Per-student totals and
+per-answer scores are written to a grading workbook through ExcelHandler.
+
+FEATURES:
+- Scripts are extracted in parallel; answers from all in-flight scripts
+  share one bounded pool of evaluation requests
+- Resumable per script: each graded script is appended to the run's
+  progress file and skipped when the run is started again (unless the
+  script or the answer key changed); answers that only got a provisional
+  offline mark are re-sent on resume
+- Throughput reported as scripts/minute
+- Near-identical answers across students listed in a ranked collusion
+  report sheet (see collusion_detector)
+
+ANSWER KEY (JSON):
+    {"questions": [{"number": 1, "question": "...", "max_marks": 10,
+                    "reference_answer": "...", "key_points": ["..."]}]}
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from loguru import logger
+from config.settings import (
+    COLLUSION_DETECTION_ENABLED,
+    FUTUREHOUSE_MAX_WORKERS,
+    GRADING_DIR,
+    SCRIPT_GRADING_WORKERS,
+)
+from src.core.collusion_detector import CollusionDetector
+from src.core.excel_handler import ExcelHandler
+from src.core.futurehouse_client import FutureHouseClient
+from src.core.ocr_processor import OCRProcessor
+
+# "Q1", "Q.2", "Question 3", "Ans 4", "Answer No. 5" at the start of a line
+_EXPLICIT_MARKER = re.compile(
+    r"^[ \t]*(?:Q(?:uestion)?|Ans(?:wer)?)[ \t]*\.?[ \t]*(?:No\.?[ \t]*)?(\d{1,3})[ \t]*[.):\-]?",
+    re.IGNORECASE | re.MULTILINE
+)
+# "1.", "2)" at the start of a line (used only when no explicit markers exist)
+_NUMBERED_MARKER = re.compile(r"^[ \t]*(\d{1,3})[ \t]*[.)]", re.MULTILINE)
+_ROLL_NUMBER = re.compile(r"Roll[ \t]*(?:No\.?|Number)?[ \t]*[:\-]?[ \t]*([A-Za-z0-9/\-]{4,})", re.IGNORECASE)
+_STUDENT_NAME = re.compile(r"^[ \t]*(?:Student[ \t]+)?Name[ \t]*[:\-][ \t]*(.+)$", re.IGNORECASE | re.MULTILINE)
+
+
+def load_answer_key(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Load and validate an answer key.
+
+    Args:
+        path: JSON file with a "questions" list (or the list itself)
+
+    Returns:
+        Questions sorted by number
+
+    Raises:
+        ValueError if the key is malformed
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    questions = data.get("questions") if isinstance(data, dict) else data
+    if not questions:
+        raise ValueError(f"Answer key {path} has no questions")
+
+    key = []
+    for position, entry in enumerate(questions, 1):
+        if not entry.get("question"):
+            raise ValueError(f"Answer key entry {position} has no question text")
+        key.append({
+            "number": int(entry.get("number", position)),
+            "question": entry["question"],
+            "max_marks": float(entry.get("max_marks", 10.0)),
+            "reference_answer": entry.get("reference_answer"),
+            "key_points": entry.get("key_points") or [],
+        })
+    numbers = [q["number"] for q in key]
+    if len(set(numbers)) != len(numbers):
+        raise ValueError(f"Answer key {path} has duplicate question numbers")
+    return sorted(key, key=lambda q: q["number"])
+
+
+def segment_answers(text: str, question_numbers: List[int]) -> Tuple[str, Dict[int, str]]:
+    """
+    Split an extracted script into per-question answers.
+
+    Explicit markers ("Q3", "Ans 3") are preferred; bare "3." / "3)" line
+    starts are used only when a script has none. A marker counts only if
+    its number is in the answer key and higher than the previous one, so
+    numbered lists inside an answer do not start a new question.
+
+    Args:
+        text: Extracted script text
+        question_numbers: Question numbers of the answer key
+
+    Returns:
+        (header text before the first answer, {question number: answer})
+    """
+    wanted = set(question_numbers)
+    markers = list(_EXPLICIT_MARKER.finditer(text)) or list(_NUMBERED_MARKER.finditer(text))
+
+    accepted = []
+    previous = 0
+    for match in markers:
+        number = int(match.group(1))
+        if number in wanted and number > previous:
+            accepted.append((number, match.start(), match.end()))
+            previous = number
+
+    if not accepted:
+        return text, {}
+    answers = {}
+    for i, (number, _, end) in enumerate(accepted):
+        stop = accepted[i + 1][1] if i + 1 < len(accepted) else len(text)
+        answers[number] = text[end:stop].strip()
+    return text[:accepted[0][1]], answers
+
+
+def parse_identity(header: str, filename: str) -> Tuple[str, str]:
+    """Student name and roll number from the script header (roll falls back to the file name)."""
+    roll = _ROLL_NUMBER.search(header)
+    name = _STUDENT_NAME.search(header)
+    return (
+        name.group(1).strip() if name else "",
+        roll.group(1).strip().upper() if roll else Path(filename).stem,
+    )
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ScriptGrader:
+    """Grades a batch of answer scripts against an answer key."""
+
+    def __init__(
+        self,
+        answer_key: List[Dict[str, Any]],
+        run_name: str,
+        client: Optional[FutureHouseClient] = None,
+        excel_handler: Optional[ExcelHandler] = None,
+        script_workers: int = SCRIPT_GRADING_WORKERS,
+        eval_workers: int = FUTUREHOUSE_MAX_WORKERS,
+        model: str = "crow",
+        grading_dir: Path = GRADING_DIR,
+        detect_collusion: bool = COLLUSION_DETECTION_ENABLED
+    ):
+        """
+        Initialize the grader.
+
+        Args:
+            answer_key: Questions from load_answer_key()
+            run_name: Name of the grading run (same name = resume)
+            client: FutureHouse client (default: a new one)
+            excel_handler: Workbook writer (default: a new ExcelHandler)
+            script_workers: Scripts extracted in parallel
+            eval_workers: Concurrent answer evaluations across all scripts
+            model: FutureHouse model used for evaluation
+            grading_dir: Directory holding the per-run progress files
+            detect_collusion: Add the collusion report to the workbook
+        """
+        self.answer_key = answer_key
+        self.run_name = run_name
+        self.client = client or FutureHouseClient()
+        self.excel_handler = excel_handler or ExcelHandler()
+        self.script_workers = max(1, script_workers)
+        self.eval_workers = max(1, eval_workers)
+        self.model = model
+        self.detector = CollusionDetector() if detect_collusion else None
+
+        self.run_dir = Path(grading_dir) / run_name
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.progress_file = self.run_dir / "progress.jsonl"
+        self.key_digest = hashlib.sha256(
+            json.dumps(answer_key, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        self._progress_lock = threading.Lock()
+        self._ocr_processor = None
+
+    def grade_directory(
+        self,
+        scripts_dir: Path,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> Dict[str, Any]:
+        """Grade every PDF in a directory (see grade_scripts)."""
+        return self.grade_scripts(sorted(Path(scripts_dir).glob("*.pdf")), progress_callback)
+
+    def grade_scripts(
+        self,
+        script_paths: List[Path],
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Grade scripts, skipping those already graded in this run, and
+        write the grading workbook.
+
+        Args:
+            script_paths: Answer-script PDFs
+            progress_callback: Called as (done, total, filename) after each script
+
+        Returns:
+            Run statistics (scripts graded/resumed/failed, answers,
+            reevaluated, fallbacks, seconds, scripts_per_minute,
+            collusion_pairs, workbook)
+        """
+        script_paths = [Path(p) for p in script_paths]
+        completed = self.load_progress()
+        pending = []
+        provisional = []
+        for path in script_paths:
+            digest = _file_digest(path)
+            record = completed.get(path.name)
+            if not record or record.get("script_digest") != digest:
+                pending.append((path, digest))
+            elif any(a.get("provisional") for a in record["answers"]):
+                provisional.append(record)
+        resumed = len(script_paths) - len(pending) - len(provisional)
+        if resumed or provisional:
+            logger.info(f"Grading run '{self.run_name}': resuming, {resumed} scripts already graded, "
+                        f"{len(provisional)} with provisional answers to re-evaluate")
+
+        start = time.perf_counter()
+        failed = 0
+        done = 0
+        if pending or provisional:
+            if pending:
+                self._ocr_processor = OCRProcessor(pending[0][0].parent)
+            with ThreadPoolExecutor(max_workers=self.eval_workers, thread_name_prefix="grade-eval") as evaluator, \
+                    ThreadPoolExecutor(max_workers=self.script_workers, thread_name_prefix="grade-script") as scripts:
+                futures = [scripts.submit(self._grade_script, path, digest, evaluator) for path, digest in pending]
+                futures += [scripts.submit(self._reevaluate_provisional, record, evaluator) for record in provisional]
+                for future in futures:
+                    record = future.result()
+                    done += 1
+                    if record["status"] == "graded":
+                        completed[record["filename"]] = record
+                    else:
+                        failed += 1
+                    if progress_callback:
+                        progress_callback(resumed + done, len(script_paths), record["filename"])
+                    elapsed = time.perf_counter() - start
+                    logger.bind(sample="grading.script").info(
+                        f"[{resumed + done}/{len(script_paths)}] {record['filename']}: {record['status']} "
+                        f"({done / elapsed * 60:.1f} scripts/min)"
+                    )
+        elapsed = time.perf_counter() - start
+
+        records = [completed[path.name] for path in script_paths if path.name in completed]
+        collusion = self.detect_collusion(records) if self.detector is not None else []
+        workbook = self.write_workbook(records, collusion)
+        graded = len(pending) + len(provisional) - failed
+        stats = {
+            "run": self.run_name,
+            "scripts": len(script_paths),
+            "graded": graded,
+            "resumed": resumed,
+            "reevaluated": len(provisional),
+            "failed": failed,
+            "answers": sum(len(r["answers"]) for r in records),
+            "fallbacks": sum(1 for r in records for a in r["answers"] if a.get("provisional")),
+            "seconds": round(elapsed, 2),
+            "scripts_per_minute": round(graded / elapsed * 60, 1) if elapsed > 0 and graded else 0.0,
+            "collusion_pairs": len(collusion),
+            "workbook": workbook,
+        }
+        logger.info(f"Grading run '{self.run_name}': {stats}")
+        return stats
+
+    # ------------------------------------------------------------------
+    # PER SCRIPT
+    # ------------------------------------------------------------------
+
+    def _grade_script(self, path: Path, digest: str, evaluator: ThreadPoolExecutor) -> Dict[str, Any]:
+        """Extract, segment and evaluate one script; graded scripts are checkpointed."""
+        record = {
+            "filename": path.name,
+            "script_digest": digest,
+            "key_digest": self.key_digest,
+            "student_name": "",
+            "roll_number": path.stem,
+            "answers": [],
+        }
+        try:
+            text = self._ocr_processor.extract_text_with_ocr(path)
+            if not text:
+                raise ValueError("Text extraction failed")
+            header, answers = segment_answers(text, [q["number"] for q in self.answer_key])
+            record["student_name"], record["roll_number"] = parse_identity(header, path.name)
+
+            futures = [
+                (question, answers.get(question["number"], ""),
+                 evaluator.submit(self._evaluate, question, answers.get(question["number"], "")))
+                for question in self.answer_key
+            ]
+            for question, answer, future in futures:
+                record["answers"].append(self._answer_entry(question, answer, future.result()))
+        except Exception as e:
+            logger.error(f"Grading failed for {path.name}: {e}")
+            record.update({"status": "failed", "error": str(e)})
+            return record
+
+        return self._checkpoint(record)
+
+    def _reevaluate_provisional(self, record: Dict[str, Any], evaluator: ThreadPoolExecutor) -> Dict[str, Any]:
+        """
+        Re-send the provisionally marked answers of a checkpointed script.
+
+        Answers the API did grade are kept. If re-evaluation fails, the
+        checkpointed record (still provisional) is returned unchanged.
+        """
+        questions = {q["number"]: q for q in self.answer_key}
+        answers = [dict(a) for a in record["answers"]]
+        try:
+            futures = [
+                (i, evaluator.submit(self._evaluate, questions[a["number"]], a.get("answer", "")))
+                for i, a in enumerate(answers)
+                if a.get("provisional") and a["number"] in questions
+            ]
+            for i, future in futures:
+                answers[i] = self._answer_entry(questions[answers[i]["number"]], answers[i].get("answer", ""),
+                                                future.result())
+        except Exception as e:
+            logger.error(f"Re-evaluation failed for {record['filename']}: {e}")
+            return record
+
+        return self._checkpoint(dict(record, answers=answers))
+
+    @staticmethod
+    def _answer_entry(question: Dict[str, Any], answer: str, evaluation: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "number": question["number"],
+            "answer": answer,
+            "score": evaluation.get("score", 0),
+            "max_marks": question["max_marks"],
+            "model_used": evaluation.get("model_used", ""),
+            "provisional": bool(evaluation.get("error") or evaluation.get("provisional")),
+            "feedback": evaluation.get("feedback", ""),
+        }
+
+    def _checkpoint(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Total a graded script and append it to the progress file (the newest line wins on resume)."""
+        record.update({
+            "status": "graded",
+            "total": sum(a["score"] for a in record["answers"]),
+            "max_total": sum(q["max_marks"] for q in self.answer_key),
+            "graded_at": datetime.now().isoformat(),
+        })
+        self._append_progress(record)
+        return record
+
+    def _evaluate(self, question: Dict[str, Any], answer: str) -> Dict[str, Any]:
+        """Evaluate one answer (unanswered questions score zero without a request)."""
+        if not answer.strip():
+            return {"score": 0, "model_used": "none", "feedback": "Not attempted"}
+        return self.client.evaluate_answer(
+            question["question"],
+            answer,
+            reference_answer=question.get("reference_answer"),
+            max_marks=question["max_marks"],
+            model=self.model,
+            key_points=question.get("key_points")
+        )
+
+    # ------------------------------------------------------------------
+    # PROGRESS & OUTPUT
+    # ------------------------------------------------------------------
+
+    def load_progress(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Graded scripts recorded for this run.
+
+        Returns:
+            {filename: record} for records made with the current answer key,
+            the newest per script (a partially written last line is ignored)
+        """
+        completed = {}
+        if not self.progress_file.exists():
+            return completed
+        with open(self.progress_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("key_digest") == self.key_digest:
+                    completed[record["filename"]] = record
+        return completed
+
+    def _append_progress(self, record: Dict[str, Any]):
+        with self._progress_lock:
+            with open(self.progress_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def detect_collusion(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Flagged near-identical answer pairs across the graded scripts (ranked)."""
+        answers = [
+            {
+                "question": answer["number"],
+                "student": record["roll_number"],
+                "student_name": record["student_name"],
+                "answer": answer.get("answer", ""),
+            }
+            for record in records
+            for answer in record["answers"]
+        ]
+        references = {q["number"]: q["reference_answer"] for q in self.answer_key if q.get("reference_answer")}
+        return self.detector.detect(answers, references)
+
+    def write_workbook(
+        self,
+        records: List[Dict[str, Any]],
+        collusion: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """
+        Write per-student totals, per-answer scores and (if given) the
+        collusion report to the run's workbook.
+
+        Returns:
+            Workbook filename (in the Excel directory), or "" on failure
+        """
+        numbers = [q["number"] for q in self.answer_key]
+        student_rows = []
+        answer_rows = []
+        for record in records:
+            scores = {a["number"]: a for a in record["answers"]}
+            max_total = record["max_total"]
+            row = {
+                "Roll Number": record["roll_number"],
+                "Student Name": record["student_name"],
+                "Script Filename": record["filename"],
+            }
+            row.update({f"Q{n}": scores[n]["score"] if n in scores else "" for n in numbers})
+            row.update({
+                "Total": record["total"],
+                "Max Total": max_total,
+                "Percentage": round(record["total"] / max_total * 100, 2) if max_total else 0,
+                "Provisional Answers": sum(1 for a in record["answers"] if a["provisional"]),
+                "Graded At": record["graded_at"],
+            })
+            student_rows.append(row)
+            for answer in record["answers"]:
+                answer_rows.append({
+                    "Roll Number": record["roll_number"],
+                    "Student Name": record["student_name"],
+                    "Question": answer["number"],
+                    "Score": answer["score"],
+                    "Max Marks": answer["max_marks"],
+                    "Model Used": answer["model_used"],
+                    "Provisional": "Yes" if answer["provisional"] else "No",
+                    "Feedback": answer["feedback"],
+                })
+
+        collusion_rows = None
+        if collusion is not None:
+            collusion_rows = [
+                {
+                    "Rank": rank,
+                    "Question": pair["question"],
+                    "Roll Number A": pair["student_a"],
+                    "Student Name A": pair["student_name_a"],
+                    "Roll Number B": pair["student_b"],
+                    "Student Name B": pair["student_name_b"],
+                    "Text Overlap": pair["jaccard"],
+                    "Semantic Similarity": pair["similarity"] if pair["similarity"] is not None else "",
+                    "Signals": pair["signals"],
+                    "Questions Flagged For Pair": pair["questions_flagged"],
+                }
+                for rank, pair in enumerate(collusion, 1)
+            ]
+
+        filename = f"grading_{self.run_name}.xlsx"
+        if not self.excel_handler.write_grading_workbook(filename, student_rows, answer_rows, numbers,
+                                                         collusion_rows):
+            return ""
+        return filename
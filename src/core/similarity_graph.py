@@ -0,0 +1,187 @@
+"""
+Precomputed Similar-Students Graph
+All-pairs top-k cosine neighbours over the student embeddings, computed
+once in a batch job and persisted, so "similar students" lookups are a
+dictionary hit instead of a vector query.
+
+The graph is built with blocked matrix multiplication over the
+L2-normalized embedding matrix: each block of rows is multiplied against
+the whole matrix and only its top-k columns are kept, so memory stays at
+block_size x n floats regardless of corpus size.
+"""
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from loguru import logger
+from config.settings import SIMILARITY_GRAPH_PATH
+
+# Student metadata copied into the graph file for display without the vector DB
+GRAPH_METADATA_FIELDS = ("roll_number", "student_name", "department", "cgpa")
+
+
+def top_k_neighbors(
+    embeddings: np.ndarray,
+    k: int,
+    block_size: int = 1024
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the k nearest neighbours (cosine) of every row, excluding itself.
+
+    Args:
+        embeddings: (n, d) matrix (normalized here)
+        k: Neighbours per row
+        block_size: Rows multiplied per block
+
+    Returns:
+        (neighbors, scores): (n, k') int32 indices and float32 similarities,
+        best first, with k' = min(k, n - 1)
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if len(matrix) == 0:
+        # Empty collection: no rows, nothing to normalize
+        return np.empty((0, 0), dtype=np.int32), np.empty((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.clip(norms, 1e-12, None)
+
+    n = len(matrix)
+    k = max(0, min(k, n - 1))
+    neighbors = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        similarities = matrix[start:end] @ matrix.T
+        rows = np.arange(end - start)
+        similarities[rows, rows + start] = -np.inf  # exclude self
+
+        candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(similarities, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        neighbors[start:end] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:end] = np.take_along_axis(candidate_scores, order, axis=1)
+
+    return neighbors, scores
+
+
+class SimilarityGraph:
+    """Persisted top-k neighbour lists keyed by roll number."""
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        neighbors: np.ndarray,
+        scores: np.ndarray,
+        built_at: Optional[str] = None
+    ):
+        self.ids = list(ids)
+        self.metadata = {
+            field: [str(m.get(field, "")) if m else "" for m in metadatas]
+            for field in GRAPH_METADATA_FIELDS
+        }
+        self.neighbors = neighbors
+        self.scores = scores
+        self.built_at = built_at or datetime.now().isoformat()
+        self._row_by_roll = {roll.upper(): i for i, roll in enumerate(self.metadata["roll_number"]) if roll}
+        self._row_by_id = {record_id: i for i, record_id in enumerate(self.ids)}
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        metadatas: Sequence[Dict[str, Any]],
+        k: int,
+        block_size: int = 1024
+    ) -> "SimilarityGraph":
+        """Compute the graph for a set of student embeddings."""
+        neighbors, scores = top_k_neighbors(embeddings, k, block_size)
+        return cls(ids, metadatas, neighbors, scores)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, roll_number: str) -> bool:
+        return str(roll_number).upper() in self._row_by_roll
+
+    def similar(self, roll_number: str, n_results: int = 5) -> List[Dict[str, Any]]:
+        """
+        Look up the precomputed neighbours of a student.
+
+        Args:
+            roll_number: Reference student's roll number (or record ID)
+            n_results: Number of neighbours (at most the graph's k)
+
+        Returns:
+            List of neighbours (id, metadata, similarity_score), best first;
+            empty if the student is not in the graph
+        """
+        row = self._row_by_roll.get(str(roll_number).upper(), self._row_by_id.get(roll_number))
+        if row is None:
+            return []
+        return [
+            {
+                "id": self.ids[j],
+                "metadata": {field: self.metadata[field][j] for field in GRAPH_METADATA_FIELDS},
+                "similarity_score": float(score),
+            }
+            for j, score in zip(self.neighbors[row][:n_results], self.scores[row][:n_results])
+        ]
+
+    def save(self, path: Path = SIMILARITY_GRAPH_PATH):
+        """Write the graph to an .npz file (atomically)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.stem + ".tmp.npz")
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            neighbors=self.neighbors,
+            scores=self.scores,
+            built_at=np.array(self.built_at),
+            **{f"meta_{field}": np.array(values, dtype=str) for field, values in self.metadata.items()}
+        )
+        tmp_path.replace(path)
+        logger.info(f"✓ Similarity graph saved: {len(self)} students, k={self.neighbors.shape[1]} -> {path}")
+
+    @classmethod
+    def load(cls, path: Path = SIMILARITY_GRAPH_PATH) -> Optional["SimilarityGraph"]:
+        """Load a saved graph, or None if there is none."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            ids = data["ids"].tolist()
+            metadatas = [
+                {field: str(data[f"meta_{field}"][i]) for field in GRAPH_METADATA_FIELDS}
+                for i in range(len(ids))
+            ]
+            return cls(ids, metadatas, data["neighbors"], data["scores"], str(data["built_at"]))
+
+
+_graph: Optional[SimilarityGraph] = None
+_graph_mtime: Optional[int] = None
+_graph_lock = threading.Lock()
+
+
+def get_similarity_graph(path: Path = SIMILARITY_GRAPH_PATH) -> Optional[SimilarityGraph]:
+    """
+    Get the persisted graph, reloading it when the file has been rebuilt.
+
+    Returns:
+        SimilarityGraph, or None if the batch job has not been run
+    """
+    global _graph, _graph_mtime
+    try:
+        mtime = Path(path).stat().st_mtime_ns
+    except OSError:
+        return None
+    with _graph_lock:
+        if _graph is None or mtime != _graph_mtime:
+            _graph = SimilarityGraph.load(path)
+            _graph_mtime = mtime
+        return _graph
@@ -0,0 +1,128 @@
+"""
+Token-Aware Text Chunker for Document Embeddings
+Packs whole sentences (or lines) into chunks that fit the embedding
+model's token window, with a configurable token overlap between chunks.
+
+Token counts come from the embedding model's own tokenizer, so no chunk is
+silently truncated by the model. Sentences longer than the window are split
+on word boundaries.
+"""
+import math
+import re
+from typing import Callable, List, Optional, Sequence
+from loguru import logger
+
+# Sentence ends (. ! ? followed by whitespace) and line breaks are both
+# boundaries; grade sheets are mostly line-structured
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+TokenCounter = Callable[[Sequence[str]], List[int]]
+
+
+def approximate_token_counts(texts: Sequence[str]) -> List[int]:
+    """Rough token counts (~4 characters per token) when no tokenizer is available."""
+    return [max(1, math.ceil(len(text) / 4)) for text in texts]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences/lines, dropping empty pieces."""
+    return [piece.strip() for piece in _SENTENCE_BOUNDARY.split(text) if piece and piece.strip()]
+
+
+class TextChunker:
+    """Greedy sentence packer with token overlap."""
+
+    def __init__(
+        self,
+        count_tokens: Optional[TokenCounter] = None,
+        max_tokens: int = 254,
+        overlap_tokens: int = 32
+    ):
+        """
+        Initialize the chunker.
+
+        Args:
+            count_tokens: Returns token counts for a list of texts (without
+                special tokens); defaults to a character-based estimate
+            max_tokens: Token budget per chunk
+            overlap_tokens: Tokens of trailing sentences repeated at the start
+                of the next chunk
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.count_tokens = count_tokens or approximate_token_counts
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def chunk(self, text: str) -> List[str]:
+        """
+        Split text into chunks of at most ``max_tokens`` tokens.
+
+        Args:
+            text: Document text
+
+        Returns:
+            List of chunk texts (``[text]`` for empty input, like the legacy chunker)
+        """
+        sentences = split_sentences(text)
+        if not sentences:
+            return [text]
+
+        units, sizes = self._split_oversized(sentences, self.count_tokens(sentences))
+
+        chunks: List[str] = []
+        current: List[int] = []  # indices into units
+        current_size = 0
+        for i, size in enumerate(sizes):
+            if current and current_size + size > self.max_tokens:
+                chunks.append(" ".join(units[j] for j in current))
+                current, current_size = self._overlap_tail(current, sizes, size)
+            current.append(i)
+            current_size += size
+
+        if current:
+            chunks.append(" ".join(units[j] for j in current))
+        return chunks
+
+    def _overlap_tail(self, current: List[int], sizes: List[int], next_size: int):
+        """Trailing units of a closed chunk to carry into the next one."""
+        tail: List[int] = []
+        tail_size = 0
+        for j in reversed(current):
+            if tail_size + sizes[j] > self.overlap_tokens or tail_size + sizes[j] + next_size > self.max_tokens:
+                break
+            tail.insert(0, j)
+            tail_size += sizes[j]
+        return tail, tail_size
+
+    def _split_oversized(self, sentences: List[str], sizes: List[int]):
+        """Break sentences longer than the budget into word windows."""
+        if all(size <= self.max_tokens for size in sizes):
+            return sentences, list(sizes)
+
+        units: List[str] = []
+        unit_sizes: List[int] = []
+        for sentence, size in zip(sentences, sizes):
+            if size <= self.max_tokens:
+                units.append(sentence)
+                unit_sizes.append(size)
+                continue
+
+            words = sentence.split()
+            word_sizes = self.count_tokens(words)
+            piece: List[str] = []
+            piece_size = 0
+            for word, word_size in zip(words, word_sizes):
+                word_size = min(word_size, self.max_tokens)
+                if piece and piece_size + word_size > self.max_tokens:
+                    units.append(" ".join(piece))
+                    unit_sizes.append(piece_size)
+                    piece, piece_size = [], 0
+                piece.append(word)
+                piece_size += word_size
+            if piece:
+                units.append(" ".join(piece))
+                unit_sizes.append(piece_size)
+
+        logger.debug(f"Split {sum(s > self.max_tokens for s in sizes)} oversized sentences into word windows")
+        return units, unit_sizes
@@ -8,14 +8,31 @@ FEATURES:
 - Student record similarity matching
 - Course recommendation based on academic history
 
-IMPLEMENTATION: ChromaDB (local, no API key needed)
+IMPLEMENTATION: ChromaDB (local, no API key needed), or the memory-mapped
+flat store (VECTOR_DB_BACKEND=flat)
 """
 
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+import hashlib
 import json
+import time
 from datetime import datetime
+import numpy as np
 from loguru import logger
+from config.settings import (
+    CHUNK_OVERLAP_TOKENS,
+    DOCUMENT_CHUNKING,
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_WARMUP,
+    SIMILARITY_GRAPH_BLOCK_SIZE,
+    SIMILARITY_GRAPH_K,
+    SIMILARITY_GRAPH_PATH,
+    VECTOR_DB_BACKEND,
+    VECTOR_DB_WRITE_BATCH_SIZE,
+)
 
 try:
     import chromadb
@@ -25,51 +42,95 @@ except ImportError:
     CHROMA_AVAILABLE = False
     logger.warning("ChromaDB not installed. Install with: pip install chromadb")
 
-try:
-    from sentence_transformers import SentenceTransformer
-    EMBEDDINGS_AVAILABLE = True
-except ImportError:
-    EMBEDDINGS_AVAILABLE = False
-    logger.warning("sentence-transformers not installed. Install with: pip install sentence-transformers")
+from src.core.embedding_backends import (
+    embedding_backend_available,
+    get_embedding_model,
+    is_embedding_model_loaded,
+    warm_up_embedding_model,
+)
+
+from src.core.embedding_cache import EmbeddingCache, get_embedding_cache
+from src.core.flat_vector_store import FLAT_STORE_DIRNAME, FlatVectorClient
+from src.core.lexical_index import BM25Index, is_identifier_query, reciprocal_rank_fusion
+from src.core.similarity_graph import SimilarityGraph, get_similarity_graph
+from src.core.text_chunker import TextChunker
+
+# Candidates taken from each ranking per requested result in hybrid search
+_HYBRID_CANDIDATES_PER_RESULT = 4
+
+EMBEDDINGS_AVAILABLE = embedding_backend_available()
+if not EMBEDDINGS_AVAILABLE:
+    logger.warning(f"Embedding backend '{EMBEDDING_BACKEND}' not installed. "
+                   "Install with: pip install sentence-transformers (or onnxruntime tokenizers)")
 
 
 class VectorDBHandler:
     """
     Vector Database handler for semantic search on academic documents.
     
-    Uses ChromaDB for local vector storage and sentence-transformers for embeddings.
+    Uses ChromaDB for local vector storage and a local embedding backend
+    (sentence-transformers or quantized ONNX, see embedding_backends).
     No API keys required!
     """
     
-    def __init__(self, persist_directory: str = "./data/vector_db"):
+    def __init__(
+        self,
+        persist_directory: str = "./data/vector_db",
+        warm_up: bool = EMBEDDING_WARMUP,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        backend: str = VECTOR_DB_BACKEND
+    ):
         """
         Initialize Vector DB handler.
         
+        The embedding model is shared process-wide and loaded on first use.
+        
         Args:
             persist_directory: Where to store the vector database
+            warm_up: Start loading the embedding model in the background now
+            embedding_cache: Cache for computed embeddings (default: the shared
+                cache, or none when EMBEDDING_CACHE_ENABLED is off)
+            backend: Vector store, "chroma" or "flat"
         """
-        if not CHROMA_AVAILABLE:
-            raise ImportError("ChromaDB not installed. Run: pip install chromadb")
+        if backend not in ("chroma", "flat"):
+            raise ValueError(f"Unknown vector DB backend '{backend}' (expected 'chroma' or 'flat')")
+        
+        if backend == "chroma" and not CHROMA_AVAILABLE:
+            raise ImportError("ChromaDB not installed. Run: pip install chromadb (or set VECTOR_DB_BACKEND=flat)")
         
         if not EMBEDDINGS_AVAILABLE:
-            raise ImportError("sentence-transformers not installed. Run: pip install sentence-transformers")
+            raise ImportError(f"Embedding backend '{EMBEDDING_BACKEND}' not installed. "
+                              "Run: pip install sentence-transformers (or onnxruntime tokenizers)")
         
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         
-        # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(
-            path=str(self.persist_directory),
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
+        self.backend = backend
+        if backend == "flat":
+            # Same collection API, stored under <persist_directory>/flat
+            self.client = FlatVectorClient(self.persist_directory / FLAT_STORE_DIRNAME)
+        else:
+            # Initialize ChromaDB
+            self.client = chromadb.PersistentClient(
+                path=str(self.persist_directory),
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                )
             )
-        )
         
-        # Initialize embedding model (local, fast)
-        logger.info("Loading embedding model (this may take a moment)...")
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        logger.info("✓ Embedding model loaded: all-MiniLM-L6-v2")
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        
+        # BM25 index over student texts, built on the first lexical search
+        self._lexical_index: Optional[BM25Index] = None
+        self._lexical_stale = False
+        self._chunker: Optional[TextChunker] = None
+        
+        # Precomputed similar-students graph (see build_similarity_graph)
+        self.similarity_graph_path = self.persist_directory / SIMILARITY_GRAPH_PATH.name
+        
+        if warm_up and not is_embedding_model_loaded():
+            warm_up_embedding_model()
         
         # Create/get collections
         self.students_collection = self.client.get_or_create_collection(
@@ -82,17 +143,25 @@ class VectorDBHandler:
             metadata={"description": "Raw document texts"}
         )
         
-        logger.info(f"✓ Vector DB initialized at {self.persist_directory}")
+        logger.info(f"✓ Vector DB initialized at {self.persist_directory} ({backend})")
         logger.info(f"  Students collection: {self.students_collection.count()} records")
         logger.info(f"  Documents collection: {self.documents_collection.count()} documents")
     
+    @property
+    def embedding_model(self):
+        """Shared embedding model (loaded on first access)."""
+        return get_embedding_model()
+    
     def add_student_record(
         self,
         student_data: Dict[str, Any],
         document_filename: str
     ) -> bool:
         """
-        Add a student record to vector database.
+        Add or update a student record in vector database.
+        
+        The record ID is derived from the roll number, so reprocessing a
+        student replaces the previous entry instead of adding a duplicate.
         
         Args:
             student_data: Parsed student academic data
@@ -101,41 +170,62 @@ class VectorDBHandler:
         Returns:
             True if successful
         """
-        try:
-            # Create unique ID
-            roll_number = student_data.get('Roll Number') or student_data.get('roll_number', 'unknown')
-            student_id = f"{roll_number}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            # Create searchable text representation
-            text_content = self._create_student_text(student_data)
+        return self.add_students_bulk([student_data], document_filename) == 1
+    
+    def add_students_bulk(
+        self,
+        students: List[Dict[str, Any]],
+        document_filename: Union[str, Sequence[str]] = "bulk_import",
+        batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Add or update many student records with a single batched encode.
+        
+        Records whose content hash matches the stored one are left as they
+        are (no encode, no write). If a roll number appears more than once,
+        the last record wins.
+        
+        Args:
+            students: Parsed student academic data, one dict per student
+            document_filename: Source filename for all records, or one per record
+            batch_size: Records per Chroma write (default VECTOR_DB_WRITE_BATCH_SIZE)
             
-            # Generate embedding
-            embedding = self.embedding_model.encode(text_content).tolist()
+        Returns:
+            Number of records stored or already up to date
+        """
+        if not students:
+            return 0
+        
+        if isinstance(document_filename, str):
+            filenames = [document_filename] * len(students)
+        else:
+            filenames = list(document_filename)
+        
+        try:
+            timestamp = datetime.now()
+            records: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+            for student_data, filename in zip(students, filenames):
+                student_id, text_content, metadata = self._prepare_student(student_data, filename, timestamp)
+                records.pop(student_id, None)
+                records[student_id] = (text_content, metadata)
             
-            # Prepare metadata (must be JSON-serializable)
-            metadata = {
-                "roll_number": str(roll_number),
-                "student_name": str(student_data.get('Student Name') or student_data.get('student_name', 'Unknown')),
-                "department": str(student_data.get('Department') or student_data.get('department', 'Unknown')),
-                "cgpa": str(student_data.get('CGPA') or student_data.get('cgpa', 'N/A')),
-                "document_filename": document_filename,
-                "timestamp": datetime.now().isoformat()
-            }
+            unchanged = self._unchanged_ids(self.students_collection, records)
+            ids = [record_id for record_id in records if record_id not in unchanged]
+            texts = [records[record_id][0] for record_id in ids]
+            metadatas = [records[record_id][1] for record_id in ids]
             
-            # Add to collection
-            self.students_collection.add(
-                ids=[student_id],
-                embeddings=[embedding],
-                documents=[text_content],
-                metadatas=[metadata]
-            )
+            written = 0
+            if ids:
+                embeddings = self._encode_texts(texts)
+                written = self._write_batches(self.students_collection, ids, embeddings, texts, metadatas, batch_size)
+                self._lexical_stale = True
             
-            logger.info(f"✓ Added student to vector DB: {roll_number}")
-            return True
+            logger.info(f"✓ Upserted {written}/{len(ids)} students to vector DB ({len(unchanged)} unchanged)")
+            return written + len(unchanged)
             
         except Exception as e:
-            logger.error(f"Failed to add student to vector DB: {e}")
-            return False
+            logger.error(f"Failed to add students to vector DB: {e}")
+            return 0
     
     def add_document(
         self,
@@ -144,7 +234,10 @@ class VectorDBHandler:
         metadata: Optional[Dict[str, Any]] = None
     ) -> bool:
         """
-        Add a raw document to vector database.
+        Add or replace a raw document in vector database.
+        
+        Chunk IDs are derived from the filename, so re-adding a document
+        overwrites its chunks and removes any left over from a longer version.
         
         Args:
             document_text: Full text of document
@@ -154,92 +247,163 @@ class VectorDBHandler:
         Returns:
             True if successful
         """
+        document = {'text': document_text, 'filename': filename, 'metadata': metadata}
+        return self.add_documents_bulk([document]) == 1
+    
+    def add_documents_bulk(
+        self,
+        documents: List[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> int:
+        """
+        Add or replace many raw documents, encoding all changed chunks in one batch.
+        
+        Args:
+            documents: Dicts with 'text', 'filename' and optional 'metadata'
+            batch_size: Chunks per Chroma write (default VECTOR_DB_WRITE_BATCH_SIZE)
+            
+        Returns:
+            Number of documents stored or already up to date
+        """
+        if not documents:
+            return 0
+        
         try:
-            # Create unique ID
-            doc_id = f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            timestamp = datetime.now()
+            # filename -> {chunk_id: (text, metadata)}; the last copy of a filename wins
+            by_filename: Dict[str, Dict[str, Tuple[str, Dict[str, Any]]]] = {}
+            for document in documents:
+                ids, texts, metadatas = self._prepare_document_chunks(
+                    document['text'],
+                    document['filename'],
+                    document.get('metadata'),
+                    timestamp
+                )
+                by_filename[document['filename']] = dict(zip(ids, zip(texts, metadatas)))
             
-            # Generate embedding (split into chunks if too long)
-            text_chunks = self._chunk_text(document_text, max_length=500)
+            chunks = {chunk_id: chunk for doc_chunks in by_filename.values() for chunk_id, chunk in doc_chunks.items()}
+            unchanged = self._unchanged_ids(self.documents_collection, chunks)
+            ids = [chunk_id for chunk_id in chunks if chunk_id not in unchanged]
+            texts = [chunks[chunk_id][0] for chunk_id in ids]
+            metadatas = [chunks[chunk_id][1] for chunk_id in ids]
             
-            ids = []
-            embeddings = []
-            documents = []
-            metadatas = []
+            written = 0
+            if ids:
+                embeddings = self._encode_texts(texts)
+                written = self._write_batches(self.documents_collection, ids, embeddings, texts, metadatas, batch_size)
+            if written < len(ids):
+                raise RuntimeError(f"only {written}/{len(ids)} chunks written")
             
-            for i, chunk in enumerate(text_chunks):
-                chunk_id = f"{doc_id}_chunk_{i}"
-                embedding = self.embedding_model.encode(chunk).tolist()
-                
-                chunk_metadata = {
-                    "filename": filename,
-                    "chunk_index": i,
-                    "total_chunks": len(text_chunks),
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                if metadata:
-                    chunk_metadata.update({k: str(v) for k, v in metadata.items()})
-                
-                ids.append(chunk_id)
-                embeddings.append(embedding)
-                documents.append(chunk)
-                metadatas.append(chunk_metadata)
+            for filename, doc_chunks in by_filename.items():
+                self._delete_stale_chunks(filename, len(doc_chunks))
             
-            # Add all chunks to collection
-            self.documents_collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=documents,
-                metadatas=metadatas
+            logger.info(
+                f"✓ Upserted {len(by_filename)} documents to vector DB "
+                f"({written} chunks written, {len(unchanged)} unchanged)"
             )
-            
-            logger.info(f"✓ Added document to vector DB: {filename} ({len(text_chunks)} chunks)")
-            return True
+            return len(by_filename)
             
         except Exception as e:
-            logger.error(f"Failed to add document to vector DB: {e}")
-            return False
+            logger.error(f"Failed to add documents to vector DB: {e}")
+            return 0
+    
+    def compact(self) -> Dict[str, int]:
+        """
+        Deduplicate collections written with the old timestamped IDs.
+        
+        Keeps the newest record per roll number and the newest version of
+        each document, moves them to the deterministic IDs (reusing their
+        stored embeddings) and deletes everything else.
+        
+        Returns:
+            Counts of records before/after per collection
+        """
+        stats = {}
+        
+        # Students: newest record per roll number
+        students = self._get_all(self.students_collection)
+        newest: Dict[str, int] = {}
+        for i, metadata in enumerate(students['metadatas']):
+            record_id = self._student_id(metadata.get('roll_number'), students['documents'][i])
+            if record_id not in newest or metadata.get('timestamp', '') >= students['metadatas'][newest[record_id]].get('timestamp', ''):
+                newest[record_id] = i
+        students['metadatas'] = [self._normalize_student_metadata(m) for m in students['metadatas']]
+        self._rewrite(self.students_collection, students, newest)
+        self._lexical_stale = True
+        stats['students_before'] = len(students['ids'])
+        stats['students_after'] = len(newest)
+        
+        # Documents: every chunk of the newest version of each filename
+        chunks = self._get_all(self.documents_collection)
+        latest_version: Dict[str, str] = {}
+        for metadata in chunks['metadatas']:
+            filename, version = metadata.get('filename', ''), metadata.get('timestamp', '')
+            if version > latest_version.get(filename, ''):
+                latest_version[filename] = version
+        keep: Dict[str, int] = {}
+        for i, metadata in enumerate(chunks['metadatas']):
+            filename = metadata.get('filename', '')
+            if metadata.get('timestamp', '') == latest_version.get(filename, ''):
+                keep[self._chunk_id(filename, int(metadata.get('chunk_index', 0)))] = i
+        self._rewrite(self.documents_collection, chunks, keep)
+        stats['document_chunks_before'] = len(chunks['ids'])
+        stats['document_chunks_after'] = len(keep)
+        
+        logger.info(f"✓ Vector DB compacted: {stats}")
+        return stats
     
     def search_students(
         self,
         query: str,
         n_results: int = 5,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        min_cgpa: Optional[float] = None,
+        max_cgpa: Optional[float] = None,
+        mode: str = "hybrid"
     ) -> List[Dict[str, Any]]:
         """
-        Semantic search for students.
+        Search for students by vector similarity, BM25 keywords, or both.
+        
+        Hybrid mode fuses the two rankings with reciprocal rank fusion.
+        Queries made only of identifiers (roll numbers, course codes) are
+        answered from the lexical index without embedding the query.
         
         Args:
             query: Natural language search query
             n_results: Number of results to return
-            filter_dict: Metadata filters (e.g., {"department": "Computer Science"})
+            filter_dict: Chroma metadata filter; numeric fields (cgpa, semester)
+                support ranges, e.g. {"cgpa": {"$gte": 8.5}}
+            min_cgpa: Shorthand for a lower CGPA bound (inclusive)
+            max_cgpa: Shorthand for an upper CGPA bound (inclusive)
+            mode: "hybrid", "vector" or "lexical"
             
         Returns:
             List of matching student records
         """
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode(query).tolist()
+            where = self._build_where(filter_dict, min_cgpa, max_cgpa)
+            candidates = n_results if mode != "hybrid" else max(n_results * _HYBRID_CANDIDATES_PER_RESULT, 20)
             
-            # Search
-            results = self.students_collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                where=filter_dict if filter_dict else None
-            )
+            lexical: List[Tuple[str, float]] = []
+            if mode in ("hybrid", "lexical"):
+                lexical = self._lexical_search(query, candidates, where)
             
-            # Format results
-            formatted_results = []
-            for i in range(len(results['ids'][0])):
-                formatted_results.append({
-                    "id": results['ids'][0][i],
-                    "text": results['documents'][0][i],
-                    "metadata": results['metadatas'][0][i],
-                    "similarity_score": 1 - results['distances'][0][i]  # Convert distance to similarity
-                })
+            if mode == "lexical" or (lexical and is_identifier_query(query)):
+                results = self._format_hits([record_id for record_id, _ in lexical[:n_results]], {}, dict(lexical))
+            else:
+                vector = self._vector_search(query, candidates, where)
+                if mode == "vector":
+                    ranked = list(vector)[:n_results]
+                    results = self._format_hits(ranked, vector, {})
+                else:
+                    fused = reciprocal_rank_fusion([list(vector), [record_id for record_id, _ in lexical]])
+                    fused = fused[:n_results]
+                    results = self._format_hits([record_id for record_id, _ in fused], vector, dict(lexical))
+                    for result, (_, score) in zip(results, fused):
+                        result["fused_score"] = round(score, 6)
             
-            logger.info(f"Found {len(formatted_results)} students matching: {query}")
-            return formatted_results
+            logger.info(f"Found {len(results)} students matching: {query} ({mode})")
+            return results
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
@@ -261,7 +425,7 @@ class VectorDBHandler:
             List of matching document chunks
         """
         try:
-            query_embedding = self.embedding_model.encode(query).tolist()
+            query_embedding = self._encode_texts([query])[0]
             
             results = self.documents_collection.query(
                 query_embeddings=[query_embedding],
@@ -287,44 +451,126 @@ class VectorDBHandler:
     def get_similar_students(
         self,
         roll_number: str,
-        n_results: int = 5
+        n_results: int = 5,
+        use_graph: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Find students with similar academic profiles.
         
+        Served from the precomputed similarity graph when the student is in
+        it; otherwise the student's stored embedding is used as the query
+        (no re-encoding).
+        
         Args:
             roll_number: Reference student's roll number
             n_results: Number of similar students to find
+            use_graph: Look the student up in the precomputed graph first
             
         Returns:
-            List of similar student records
+            List of similar student records (excluding the student)
         """
         try:
-            # Get the reference student's embedding
-            results = self.students_collection.get(
-                where={"roll_number": str(roll_number)}
-            )
+            if use_graph:
+                graph = get_similarity_graph(self.similarity_graph_path)
+                if graph is not None and roll_number in graph and graph.neighbors.shape[1] >= n_results:
+                    hits = graph.similar(roll_number, n_results)
+                    scores = {hit['id']: hit['similarity_score'] for hit in hits}
+                    records = self.students_collection.get(ids=list(scores), include=["documents", "metadatas"])
+                    found = {
+                        record_id: (text, metadata)
+                        for record_id, text, metadata in zip(records['ids'], records['documents'], records['metadatas'])
+                    }
+                    return [
+                        {
+                            "id": record_id,
+                            "text": found[record_id][0],
+                            "metadata": found[record_id][1],
+                            "similarity_score": score
+                        }
+                        for record_id, score in scores.items() if record_id in found
+                    ]
+            
+            # Get the reference student's stored embedding
+            student_id = self._student_id(roll_number, "")
+            results = self.students_collection.get(ids=[student_id], include=["embeddings"])
+            if not results['ids']:
+                # Records written before deterministic IDs
+                results = self.students_collection.get(
+                    where={"roll_number": str(roll_number)},
+                    include=["embeddings"],
+                    limit=1
+                )
             
             if not results['ids']:
                 logger.warning(f"Student not found: {roll_number}")
                 return []
             
-            # Use the student's text to find similar ones
-            reference_text = results['documents'][0]
-            return self.search_students(reference_text, n_results + 1)  # +1 to exclude self
+            student_id = results['ids'][0]
+            hits = self.students_collection.query(
+                query_embeddings=[list(map(float, results['embeddings'][0]))],
+                n_results=n_results + 1  # +1 to exclude self
+            )
+            return [
+                {
+                    "id": record_id,
+                    "text": hits['documents'][0][i],
+                    "metadata": hits['metadatas'][0][i],
+                    "similarity_score": 1 - hits['distances'][0][i]
+                }
+                for i, record_id in enumerate(hits['ids'][0]) if record_id != student_id
+            ][:n_results]
             
         except Exception as e:
             logger.error(f"Failed to find similar students: {e}")
             return []
     
+    def build_similarity_graph(
+        self,
+        k: int = SIMILARITY_GRAPH_K,
+        block_size: int = SIMILARITY_GRAPH_BLOCK_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Compute and persist the all-pairs top-k similar-students graph.
+        
+        Uses the stored embeddings (no encoding); run after indexing batches.
+        
+        Args:
+            k: Neighbours kept per student
+            block_size: Rows per block of the matrix multiplication
+            
+        Returns:
+            Graph size, build time and path
+        """
+        start = time.time()
+        records = self._get_all(self.students_collection, include=["metadatas", "embeddings"])
+        embeddings = np.asarray(records['embeddings'], dtype=np.float32)
+        graph = SimilarityGraph.build(records['ids'], embeddings, records['metadatas'], k, block_size)
+        graph.save(self.similarity_graph_path)
+        
+        stats = {
+            "students": len(graph),
+            "k": int(graph.neighbors.shape[1]),
+            "seconds": round(time.time() - start, 2),
+            "path": str(self.similarity_graph_path)
+        }
+        logger.info(f"✓ Similarity graph built: {stats}")
+        return stats
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get vector database statistics."""
         return {
             "students_count": self.students_collection.count(),
             "documents_count": self.documents_collection.count(),
             "persist_directory": str(self.persist_directory),
-            "embedding_model": "all-MiniLM-L6-v2",
-            "embedding_dimension": 384
+            "vector_db_backend": self.backend,
+            "embedding_model": EMBEDDING_MODEL_NAME,
+            "embedding_backend": EMBEDDING_BACKEND,
+            "embedding_model_loaded": is_embedding_model_loaded(),
+            "embedding_dimension": (
+                self.embedding_model.get_sentence_embedding_dimension()
+                if is_embedding_model_loaded() else None
+            ),
+            "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache is not None else None
         }
     
     def reset(self, confirm: bool = False):
@@ -339,11 +585,298 @@ class VectorDBHandler:
             return
         
         self.client.reset()
+        self._lexical_index = None
+        self.similarity_graph_path.unlink(missing_ok=True)
         logger.info("✓ Vector database reset complete")
     
     # Helper methods
     
-    def _create_student_text(self, student_data: Dict[str, Any]) -> str:
+    def _encode_texts(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts in batches of EMBEDDING_BATCH_SIZE, through the embedding cache."""
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(self.embedding_model, texts, EMBEDDING_BATCH_SIZE).tolist()
+        return self.embedding_model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE).tolist()
+    
+    def _write_batches(
+        self,
+        collection,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> int:
+        """Write records to a collection in chunks; returns the number written."""
+        batch_size = batch_size or VECTOR_DB_WRITE_BATCH_SIZE
+        written = 0
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            try:
+                collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=embeddings[start:end],
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end]
+                )
+                written += len(ids[start:end])
+            except Exception as e:
+                logger.error(f"Vector DB write failed for records {start}-{end}: {e}")
+                break
+        return written
+    
+    @staticmethod
+    def _build_where(
+        filter_dict: Optional[Dict[str, Any]],
+        min_cgpa: Optional[float],
+        max_cgpa: Optional[float]
+    ) -> Optional[Dict[str, Any]]:
+        """Combine a metadata filter with CGPA bounds into one Chroma where clause."""
+        clauses = []
+        if filter_dict:
+            if len(filter_dict) > 1 and not any(key.startswith("$") for key in filter_dict):
+                clauses.extend({key: value} for key, value in filter_dict.items())
+            else:
+                clauses.append(filter_dict)
+        if min_cgpa is not None:
+            clauses.append({"cgpa": {"$gte": float(min_cgpa)}})
+        if max_cgpa is not None:
+            clauses.append({"cgpa": {"$lte": float(max_cgpa)}})
+        
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+    
+    def _vector_search(
+        self,
+        query: str,
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Nearest students by embedding; returns id -> hit, best first."""
+        query_embedding = self._encode_texts([query])[0]
+        results = self.students_collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            where=where
+        )
+        return {
+            record_id: {
+                "text": results['documents'][0][i],
+                "metadata": results['metadatas'][0][i],
+                "similarity_score": 1 - results['distances'][0][i]  # Convert distance to similarity
+            }
+            for i, record_id in enumerate(results['ids'][0])
+        }
+    
+    def _lexical_search(
+        self,
+        query: str,
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> List[Tuple[str, float]]:
+        """BM25 ranking of students, restricted to records matching ``where``."""
+        index = self._get_lexical_index()
+        allowed = None
+        if where:
+            allowed = self.students_collection.get(where=where, include=[])['ids']
+        return index.search(query, top_k=n_results, allowed_ids=allowed)
+    
+    def _get_lexical_index(self) -> BM25Index:
+        """BM25 index over the students collection, rebuilt after writes."""
+        count = self.students_collection.count()
+        if self._lexical_index is None or self._lexical_stale or len(self._lexical_index) != count:
+            records = self._get_all(self.students_collection, include=["documents"])
+            self._lexical_index = BM25Index(records['ids'], records['documents'])
+            self._lexical_stale = False
+            logger.info(f"Built lexical index over {len(records['ids'])} students")
+        return self._lexical_index
+    
+    def _format_hits(
+        self,
+        ids: List[str],
+        vector_hits: Dict[str, Dict[str, Any]],
+        lexical_scores: Dict[str, float]
+    ) -> List[Dict[str, Any]]:
+        """Build result dicts, fetching text/metadata for lexical-only hits."""
+        missing = [record_id for record_id in ids if record_id not in vector_hits]
+        fetched = {}
+        if missing:
+            records = self.students_collection.get(ids=missing, include=["documents", "metadatas"])
+            fetched = {
+                record_id: {"text": text, "metadata": metadata, "similarity_score": None}
+                for record_id, text, metadata in zip(records['ids'], records['documents'], records['metadatas'])
+            }
+        
+        results = []
+        for record_id in ids:
+            hit = vector_hits.get(record_id) or fetched.get(record_id)
+            if hit is None:
+                continue
+            lexical_score = lexical_scores.get(record_id)
+            results.append({
+                "id": record_id,
+                "text": hit["text"],
+                "metadata": hit["metadata"],
+                "similarity_score": hit["similarity_score"],
+                "lexical_score": round(lexical_score, 4) if lexical_score is not None else None
+            })
+        return results
+    
+    def _unchanged_ids(self, collection, records: Dict[str, Tuple[str, Dict[str, Any]]]) -> set:
+        """IDs whose stored content hash equals the new record's hash."""
+        existing = collection.get(ids=list(records), include=["metadatas"])
+        return {
+            record_id for record_id, metadata in zip(existing['ids'], existing['metadatas'])
+            if metadata and metadata.get('content_hash') == records[record_id][1]['content_hash']
+        }
+    
+    def _delete_stale_chunks(self, filename: str, chunk_count: int):
+        """Delete chunks left over from a longer earlier version of a document."""
+        self.documents_collection.delete(
+            where={"$and": [{"filename": filename}, {"chunk_index": {"$gte": chunk_count}}]}
+        )
+    
+    @staticmethod
+    def _get_all(
+        collection,
+        include: Sequence[str] = ("documents", "metadatas", "embeddings"),
+        page_size: int = 1000
+    ) -> Dict[str, list]:
+        """Read a whole collection page by page."""
+        result = {'ids': [], **{field: [] for field in include}}
+        offset = 0
+        while True:
+            page = collection.get(include=list(include), limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+            result['ids'].extend(page['ids'])
+            for field in include:
+                result[field].extend(list(page[field]))
+            offset += len(page['ids'])
+        return result
+    
+    def _rewrite(self, collection, records: Dict[str, list], keep: Dict[str, int]):
+        """Upsert kept records under their new IDs and delete everything else."""
+        ids = list(keep)
+        positions = list(keep.values())
+        self._write_batches(
+            collection,
+            ids,
+            [list(map(float, records['embeddings'][i])) for i in positions],
+            [records['documents'][i] for i in positions],
+            [records['metadatas'][i] for i in positions]
+        )
+        stale = [record_id for record_id in records['ids'] if record_id not in keep]
+        for start in range(0, len(stale), VECTOR_DB_WRITE_BATCH_SIZE):
+            collection.delete(ids=stale[start:start + VECTOR_DB_WRITE_BATCH_SIZE])
+    
+    @staticmethod
+    def _content_hash(text: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Hash of a record's text and metadata (ignoring the write timestamp)."""
+        payload = text
+        if metadata:
+            fields = {k: v for k, v in metadata.items() if k not in ('timestamp', 'content_hash')}
+            payload += json.dumps(fields, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _to_number(value: Any, cast=float) -> Optional[float]:
+        """Parse a numeric metadata value ("8.5", 8.5); None if not numeric."""
+        try:
+            number = cast(float(str(value).strip()))
+        except (TypeError, ValueError):
+            return None
+        return None if number != number else number  # NaN
+    
+    @classmethod
+    def _normalize_student_metadata(cls, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Store cgpa/semester as numbers (dropping unparseable values) for range filters."""
+        metadata = dict(metadata)
+        for field, cast in (("cgpa", float), ("semester", int)):
+            if field in metadata:
+                number = cls._to_number(metadata[field], cast)
+                if number is None:
+                    del metadata[field]
+                else:
+                    metadata[field] = number
+        return metadata
+    
+    @classmethod
+    def _student_id(cls, roll_number: Optional[str], text_content: str) -> str:
+        """Stable student ID: the roll number, or the content hash when there is none."""
+        roll = str(roll_number).strip() if roll_number is not None else ''
+        if roll and roll.lower() not in ('unknown', 'n/a', 'none'):
+            return f"student_{roll.upper()}"
+        return f"student_{cls._content_hash(text_content)[:16]}"
+    
+    @staticmethod
+    def _chunk_id(filename: str, chunk_index: int) -> str:
+        return f"{filename}_chunk_{chunk_index}"
+    
+    def _prepare_student(
+        self,
+        student_data: Dict[str, Any],
+        document_filename: str,
+        timestamp: Optional[datetime] = None
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the ID, searchable text and metadata for a student record."""
+        timestamp = timestamp or datetime.now()
+        
+        roll_number = student_data.get('Roll Number') or student_data.get('roll_number', 'unknown')
+        
+        # Create searchable text representation
+        text_content = self._create_student_text(student_data)
+        student_id = self._student_id(roll_number, text_content)
+        
+        # Prepare metadata (must be JSON-serializable); cgpa/semester are
+        # numeric so they can be range-filtered, and omitted when missing
+        metadata = self._normalize_student_metadata({
+            "roll_number": str(roll_number),
+            "student_name": str(student_data.get('Student Name') or student_data.get('student_name', 'Unknown')),
+            "department": str(student_data.get('Department') or student_data.get('department', 'Unknown')),
+            "cgpa": student_data.get('CGPA') or student_data.get('cgpa'),
+            "semester": student_data.get('Semester') or student_data.get('semester'),
+            "document_filename": document_filename,
+            "timestamp": timestamp.isoformat()
+        })
+        metadata["content_hash"] = self._content_hash(text_content, metadata)
+        
+        return student_id, text_content, metadata
+    
+    def _prepare_document_chunks(
+        self,
+        document_text: str,
+        filename: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[datetime] = None
+    ) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        """Split a document into chunks and build their IDs and metadata."""
+        timestamp = timestamp or datetime.now()
+        
+        text_chunks = self._get_chunker().chunk(document_text) if DOCUMENT_CHUNKING == "tokens" \
+            else self._chunk_text(document_text, max_length=500)
+        
+        ids = []
+        metadatas = []
+        for i, chunk in enumerate(text_chunks):
+            chunk_metadata = {
+                "filename": filename,
+                "chunk_index": i,
+                "total_chunks": len(text_chunks),
+                "timestamp": timestamp.isoformat()
+            }
+            
+            if metadata:
+                chunk_metadata.update({k: str(v) for k, v in metadata.items()})
+            chunk_metadata["content_hash"] = self._content_hash(chunk, chunk_metadata)
+            
+            ids.append(self._chunk_id(filename, i))
+            metadatas.append(chunk_metadata)
+        
+        return ids, text_chunks, metadatas
+    
+    @staticmethod
+    def _create_student_text(student_data: Dict[str, Any]) -> str:
         """Create searchable text representation of student data."""
         text_parts = []
         
@@ -379,7 +912,16 @@ class VectorDBHandler:
         
         return " | ".join(text_parts)
     
-    def _chunk_text(self, text: str, max_length: int = 500) -> List[str]:
+    def _get_chunker(self) -> TextChunker:
+        """Token-aware chunker sized to the embedding model's window."""
+        if self._chunker is None:
+            model = self.embedding_model
+            # Leave room for the [CLS]/[SEP] tokens the model adds
+            self._chunker = TextChunker(model.count_tokens, model.max_seq_length - 2, CHUNK_OVERLAP_TOKENS)
+        return self._chunker
+    
+    @staticmethod
+    def _chunk_text(text: str, max_length: int = 500) -> List[str]:
         """Split text into chunks for embedding."""
         words = text.split()
         chunks = []
@@ -0,0 +1,213 @@
+"""
+Background Vector Indexer
+Post-write stage of the ingestion pipeline: processed student records and
+their extracted text are queued here and indexed into the vector database
+by a worker thread, off the per-document critical path.
+
+FEATURES:
+- Non-blocking submit (the pipeline never waits for embeddings)
+- Micro-batches: waits briefly to fill a batch, then one bulk upsert each
+  for the students and documents collections
+- Lag and throughput statistics for the status endpoints
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from loguru import logger
+from src.utils.metrics import track_stage
+from config.settings import VECTOR_DB_DIR, VECTOR_INDEX_BATCH_SIZE, VECTOR_INDEX_FLUSH_SECONDS
+
+# (enqueued_at, student record, extracted text, filename)
+_QueueItem = Tuple[float, Dict[str, Any], Optional[str], str]
+
+
+class VectorIndexer:
+    """Queues records and indexes them into VectorDBHandler in micro-batches."""
+
+    def __init__(
+        self,
+        persist_directory: str = str(VECTOR_DB_DIR),
+        batch_size: int = VECTOR_INDEX_BATCH_SIZE,
+        flush_seconds: float = VECTOR_INDEX_FLUSH_SECONDS
+    ):
+        """
+        Initialize the indexer (the worker thread starts on first submit).
+
+        Args:
+            persist_directory: Vector database directory
+            batch_size: Maximum records per micro-batch
+            flush_seconds: Longest time to wait for a batch to fill
+        """
+        self.persist_directory = persist_directory
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+
+        self._items: Deque[_QueueItem] = deque()
+        self._in_flight: List[_QueueItem] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._flush_requested = False
+        self._vector_db = None
+        self._error: Optional[str] = None
+
+        self.submitted = 0
+        self.indexed_students = 0
+        self.indexed_documents = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_seconds: Optional[float] = None
+        self.last_lag_seconds: Optional[float] = None
+        self.last_indexed_at: Optional[str] = None
+
+    def submit(self, record: Dict[str, Any], text: Optional[str], filename: str):
+        """
+        Queue a processed record (and its extracted text) for indexing.
+
+        Args:
+            record: Normalized student record
+            text: Extracted document text (None to skip the documents collection)
+            filename: Source document filename
+        """
+        # Keep only data fields; bookkeeping keys start with "_"
+        record = {k: v for k, v in record.items() if not k.startswith("_")}
+        with self._cond:
+            if self._error:
+                return
+            self._items.append((time.time(), record, text, filename))
+            self.submitted += 1
+            self._ensure_worker()
+            self._cond.notify()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until everything queued so far is indexed.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the queue drained within the timeout
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._items and not self._in_flight, timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, lag and throughput counters."""
+        with self._cond:
+            pending = list(self._in_flight) + list(self._items)
+            oldest = min((item[0] for item in pending), default=None)
+            return {
+                "enabled": self._error is None,
+                "error": self._error,
+                "pending": len(pending),
+                "lag_seconds": round(time.time() - oldest, 2) if oldest else 0.0,
+                "submitted": self.submitted,
+                "indexed_students": self.indexed_students,
+                "indexed_documents": self.indexed_documents,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_batch_seconds": self.last_batch_seconds,
+                "last_lag_seconds": self.last_lag_seconds,
+                "last_indexed_at": self.last_indexed_at,
+            }
+
+    # ------------------------------------------------------------------
+    # WORKER
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="vector-indexer", daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> List[_QueueItem]:
+        """Block until items arrive, then give the batch up to flush_seconds to fill."""
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            deadline = self._items[0][0] + self.flush_seconds
+            while len(self._items) < self.batch_size and not self._flush_requested:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    break
+            if len(self._items) <= self.batch_size:
+                self._flush_requested = False
+            batch = [self._items.popleft() for _ in range(min(self.batch_size, len(self._items)))]
+            self._in_flight = batch
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            start = time.time()
+            students = documents = failed = 0
+            try:
+                with track_stage("vector_index"):
+                    students, documents = self._index(batch)
+            except Exception as e:
+                failed = len(batch)
+                logger.error(f"Vector indexing failed for {len(batch)} records: {e}")
+
+            with self._cond:
+                self._in_flight = []
+                self.indexed_students += students
+                self.indexed_documents += documents
+                self.failed += failed
+                self.batches += 1
+                self.last_batch_seconds = round(time.time() - start, 3)
+                self.last_lag_seconds = round(time.time() - batch[0][0], 3)
+                self.last_indexed_at = datetime.now().isoformat()
+                if self._error:
+                    self.failed += len(self._items)
+                    self._items.clear()
+                self._cond.notify_all()
+
+    def _index(self, batch: List[_QueueItem]) -> Tuple[int, int]:
+        """Upsert one micro-batch; returns (students, documents) indexed."""
+        vector_db = self._get_vector_db()
+        if vector_db is None:
+            raise RuntimeError(self._error)
+
+        students = [(record, filename) for _, record, _, filename in batch
+                    if record.get("Roll Number") or record.get("Student Name")]
+        documents = [{"text": text, "filename": filename} for _, _, text, filename in batch if text]
+
+        indexed_students = 0
+        if students:
+            indexed_students = vector_db.add_students_bulk(
+                [record for record, _ in students],
+                [filename for _, filename in students]
+            )
+        indexed_documents = vector_db.add_documents_bulk(documents) if documents else 0
+
+        logger.info(f"Vector indexer: {indexed_students} students, {indexed_documents} documents indexed")
+        return indexed_students, indexed_documents
+
+    def _get_vector_db(self):
+        if self._vector_db is None and self._error is None:
+            try:
+                from src.core.vector_db_handler import VectorDBHandler
+                self._vector_db = VectorDBHandler(persist_directory=self.persist_directory)
+            except Exception as e:
+                # Missing optional dependencies: disable the stage instead of retrying forever
+                self._error = f"Vector DB unavailable: {e}"
+                logger.warning(f"Vector indexing disabled. {self._error}")
+        return self._vector_db
+
+
+_vector_indexer: Optional[VectorIndexer] = None
+_vector_indexer_lock = threading.Lock()
+
+
+def get_vector_indexer() -> VectorIndexer:
+    """Get the process-wide vector indexer."""
+    global _vector_indexer
+    if _vector_indexer is None:
+        with _vector_indexer_lock:
+            if _vector_indexer is None:
+                _vector_indexer = VectorIndexer()
+    return _vector_indexer
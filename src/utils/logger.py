@@ -1,25 +1,218 @@
 """
 Logging configuration and utilities for the Academic Evaluation application.
+
+Sinks are written from a background thread (LOG_ENQUEUE) so logging never
+blocks the calling thread on file or console I/O. The caller still formats
+the record; the formatted line goes through an in-process queue to a writer
+thread that owns the real sinks (loguru's own enqueue=True pickles every
+record through a multiprocessing pipe, which costs the caller more than the
+write it saves). Log files can be written as JSON
+lines (LOG_JSON), levels can be overridden per module (LOG_MODULE_LEVELS),
+and high-volume messages can opt into sampling by binding a key:
+
+    logger.bind(sample="ocr.page").info(f"Page {n}: OCR extraction successful")
+
+Sampled messages are written at most once per key and level every
+LOG_SAMPLE_INTERVAL_SECONDS; the next one written carries the number of
+messages suppressed in between.
 """
+import atexit
+import copy
+import json
+import queue
 import sys
+import threading
+import time
+import traceback
 from pathlib import Path
 from loguru import logger
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import (
+    LOG_DIR,
+    LOG_ENQUEUE,
+    LOG_FORMAT,
+    LOG_JSON,
+    LOG_LEVEL,
+    LOG_MODULE_LEVELS,
+    LOG_SAMPLE_INTERVAL_SECONDS,
+)
+from src.utils.metrics import OPERATION_SECONDS
+
+CONSOLE_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>"
+
+
+def parse_module_levels(spec: str) -> Dict[str, str]:
+    """
+    Parse per-module level overrides.
+
+    Args:
+        spec: Comma-separated "module=LEVEL" pairs
+
+    Returns:
+        {module prefix: level name}
+    """
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            module, level = item.split("=", 1)
+            if module.strip() and level.strip():
+                levels[module.strip()] = level.strip().upper()
+    return levels
+
+
+class LogSampler:
+    """Record patcher that rate-limits messages bound with a "sample" key."""
+
+    def __init__(self, interval_seconds: float = LOG_SAMPLE_INTERVAL_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._last: Dict[Tuple[str, str], float] = {}
+        self._suppressed: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # Shared by logger copies (see BackgroundLogWriter)
+        return self
+
+    def __call__(self, record):
+        key = record["extra"].get("sample")
+        if key is None:
+            return
+        key = (key, record["level"].name)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval_seconds:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                record["extra"]["_sampled_out"] = True
+                return
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record["message"] += f" (+{suppressed} similar suppressed)"
+
+
+class LogFilter:
+    """Per-sink filter: sampled-out records and per-module level overrides."""
+
+    def __init__(self, level: str, module_levels: Optional[Dict[str, str]] = None):
+        self.level_no = logger.level(level.upper()).no
+        overrides = []
+        for module, name in (module_levels or {}).items():
+            try:
+                overrides.append((module, logger.level(name).no))
+            except ValueError:
+                print(f"Ignoring unknown log level {name!r} for {module}", file=sys.stderr)
+        # Longest prefix first so the most specific override wins
+        self.module_levels: List[Tuple[str, int]] = sorted(overrides, key=lambda item: -len(item[0]))
 
-from config.settings import LOG_DIR, LOG_LEVEL, LOG_FORMAT
+    @property
+    def min_level_no(self) -> int:
+        """Lowest level any module may log at (the sink's level)."""
+        return min([self.level_no] + [no for _, no in self.module_levels])
+
+    def __call__(self, record) -> bool:
+        if record["extra"].get("_sampled_out"):
+            return False
+        name = record["name"] or ""
+        for module, level_no in self.module_levels:
+            if name == module or name.startswith(module + "."):
+                return record["level"].no >= level_no
+        return record["level"].no >= self.level_no
+
+
+def json_format(record) -> str:
+    """Loguru format function writing one JSON object per record."""
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "module": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "thread": record["thread"].name,
+        "message": record["message"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if not key.startswith("_")}
+    if extra:
+        payload["extra"] = extra
+    if record["exception"] is not None:
+        payload["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["_json"] = json.dumps(payload, default=str, ensure_ascii=False)
+    return "{extra[_json]}\n"
+
+
+class BackgroundLogWriter:
+    """Writes formatted log lines to the real sinks from a daemon thread."""
+
+    def __init__(self):
+        # Independent logger (own handlers) used only by the writer thread;
+        # copied while the global logger has no handlers
+        self._writer = copy.deepcopy(logger)
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._sinks = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, sink, **options) -> Callable:
+        """
+        Register a real sink on the writer.
+
+        Args:
+            sink: Anything loguru accepts as a sink (path, stream, ...)
+            **options: Sink options applied by the writer (rotation,
+                retention, compression, encoding)
+
+        Returns:
+            Callable sink for the global logger that queues formatted lines
+        """
+        target = self._sinks
+        self._sinks += 1
+        self._writer.add(sink, level=0, format="{message}",
+                         filter=lambda record: record["extra"].get("_target") == target, **options)
+        return lambda message: self._queue.put((target, message))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            target, message = item
+            try:
+                self._writer.bind(_target=target).opt(raw=True, depth=0).log(message.record["level"].name, message)
+            except Exception as e:
+                print(f"Log writer failed: {e}", file=sys.stderr)
+
+    def close(self, timeout: float = 5.0):
+        """Write out queued lines and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
 
 
 class AppLogger:
     """Centralized logging configuration for the application."""
     
-    def __init__(self, log_level: str = LOG_LEVEL):
+    def __init__(
+        self,
+        log_level: str = LOG_LEVEL,
+        enqueue: bool = LOG_ENQUEUE,
+        json_files: bool = LOG_JSON,
+        module_levels: str = LOG_MODULE_LEVELS
+    ):
         """
         Initialize the application logger.
         
         Args:
             log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+            enqueue: Write from a background thread instead of the caller's
+            json_files: Write the log files as JSON lines
+            module_levels: Per-module overrides ("module=LEVEL,...")
         """
-        self.log_level = log_level
+        self.log_level = log_level.upper()
+        self.enqueue = enqueue
+        self.json_files = json_files
+        self.module_levels = parse_module_levels(module_levels)
         self.log_dir = LOG_DIR
         self.log_dir.mkdir(exist_ok=True)
         
@@ -32,42 +225,60 @@ class AppLogger:
     def _setup_logging(self):
         """Set up logging configuration with file and console handlers."""
         
+        writer = BackgroundLogWriter() if self.enqueue else None
+        logger.configure(patcher=LogSampler())
+        
+        def add_sink(sink, sink_options: Dict[str, Any], **format_options):
+            # Formatting options stay with the global logger; the sink itself
+            # (and its rotation) moves to the writer thread when enqueued
+            if writer is not None:
+                logger.add(writer.add(sink, **sink_options), **format_options)
+            else:
+                logger.add(sink, **sink_options, **format_options)
+        
+        level_filter = LogFilter(self.log_level, self.module_levels)
+        file_format = json_format if self.json_files else LOG_FORMAT
+        # Variable values in tracebacks are slow to render and may contain
+        # student data, so only include them when debugging
+        diagnose = self.log_level == "DEBUG"
+        
         # Console handler with colors
-        logger.add(
+        add_sink(
             sys.stdout,
-            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | <level>{message}</level>",
-            level=self.log_level,
-            colorize=True
+            {},
+            format=CONSOLE_FORMAT,
+            level=level_filter.min_level_no,
+            filter=level_filter,
+            colorize=True,
+            diagnose=diagnose
         )
         
         # File handler for all logs
-        logger.add(
-            self.log_dir / "app.log",
-            format=LOG_FORMAT,
-            level=self.log_level,
-            rotation="10 MB",
-            retention="30 days",
-            compression="zip",
-            encoding="utf-8",
+        add_sink(
+            self.log_dir / ("app.jsonl" if self.json_files else "app.log"),
+            {"rotation": "10 MB", "retention": "30 days", "compression": "zip", "encoding": "utf-8"},
+            format=file_format,
+            level=level_filter.min_level_no,
+            filter=level_filter,
             backtrace=True,
-            diagnose=True
+            diagnose=diagnose
         )
         
         # Error file handler
-        logger.add(
-            self.log_dir / "errors.log",
-            format=LOG_FORMAT,
+        add_sink(
+            self.log_dir / ("errors.jsonl" if self.json_files else "errors.log"),
+            {"rotation": "5 MB", "retention": "60 days", "compression": "zip", "encoding": "utf-8"},
+            format=file_format,
             level="ERROR",
-            rotation="5 MB",
-            retention="60 days",
-            compression="zip",
-            encoding="utf-8",
+            filter=LogFilter("ERROR"),
             backtrace=True,
-            diagnose=True
+            diagnose=diagnose
         )
         
-        logger.info(f"Logging initialized with level: {self.log_level}")
-        logger.info(f"Log files directory: {self.log_dir}")
+        logger.info(f"Logging initialized with level: {self.log_level}"
+                    + (f", module overrides: {self.module_levels}" if self.module_levels else ""))
+        logger.info(f"Log files directory: {self.log_dir} "
+                    f"({'JSON' if self.json_files else 'text'}, {'background' if self.enqueue else 'synchronous'} writes)")
     
     def get_logger(self, name: Optional[str] = None):
         """Get a logger instance with optional name binding."""
@@ -85,7 +296,8 @@ def get_logger(name: Optional[str] = None):
     return app_logger.get_logger(name)
 
 def log_performance(operation: str, duration: float, details: dict = None):
-    """Log performance metrics."""
+    """Log performance metrics (also recorded in the /metrics histograms)."""
+    OPERATION_SECONDS.observe(duration, operation=operation)
     logger.info(f"Performance: {operation} completed in {duration:.2f} seconds")
     if details:
         logger.debug(f"  Details: {details}")
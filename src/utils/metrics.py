@@ -0,0 +1,283 @@
+"""
+Process Metrics in Prometheus Text Format
+Thread-safe counters and latency histograms for the processing pipeline,
+rendered in the Prometheus text exposition format (version 0.0.4) by the
+API's GET /metrics endpoint. Kept dependency-free so the pipeline, CLI
+and API all record into the same in-process registry.
+
+Stages are timed with track_stage, which also counts failures and opens a
+trace span (see src/utils/tracing.py) when a document trace is active:
+
+    with track_stage("excel_write"):
+        ...
+
+Metrics are per process; with several API workers, scrape each one.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from src.utils.tracing import get_tracer
+
+# Seconds; covers sub-millisecond JSON parsing up to multi-minute OCR runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> _LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _lines(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._lines())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, one series per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        """
+        Increase the counter.
+
+        Args:
+            amount: Non-negative increment
+            **labels: One value per label name
+        """
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current value of one series (0 if never incremented)."""
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram(_Metric):
+    """Latency distribution over fixed buckets, one series per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[_LabelValues, List[int]] = {}
+        self._sums: Dict[_LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        """
+        Record one observation.
+
+        Args:
+            value: Observed value (seconds for latency histograms)
+            **labels: One value per label name
+        """
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the with-block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Number of observations in one series."""
+        key = self._key(labels)
+        with self._lock:
+            return sum(self._counts.get(key, ()))
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        names = self.labelnames + ("le",)
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Register (or fetch) a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Register (or fetch) a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "academic_eval_stage_duration_seconds",
+    "Latency of document pipeline stages",
+    ["stage"],
+)
+STAGE_FAILURES = REGISTRY.counter(
+    "academic_eval_stage_failures_total",
+    "Failures by pipeline stage",
+    ["stage"],
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "academic_eval_llm_call_duration_seconds",
+    "Latency of LLM API calls by provider",
+    ["provider"],
+)
+LLM_TOKENS = REGISTRY.counter(
+    "academic_eval_llm_tokens_total",
+    "Tokens reported by LLM providers",
+    ["provider"],
+)
+DOCUMENTS_PROCESSED = REGISTRY.counter(
+    "academic_eval_documents_processed_total",
+    "Documents processed by the batch pipeline, by outcome",
+    ["status"],
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "academic_eval_cache_lookups_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+OPERATION_SECONDS = REGISTRY.histogram(
+    "academic_eval_operation_duration_seconds",
+    "Durations reported through log_performance",
+    ["operation"],
+)
+
+
+@contextmanager
+def track_stage(stage: str, **span_attributes: Any) -> Iterator[None]:
+    """Time a pipeline stage (metrics and trace span); an exception counts as a failure."""
+    start = time.perf_counter()
+    try:
+        with get_tracer().span(stage, **span_attributes):
+            yield
+    except Exception:
+        STAGE_FAILURES.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def record_cache_lookups(cache: str, hits: int = 0, misses: int = 0):
+    """Count cache hits and misses (no-op for zero counts)."""
+    if hits:
+        CACHE_LOOKUPS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_LOOKUPS.inc(misses, cache=cache, result="miss")
+
+
+def render_metrics(registry: Optional[MetricsRegistry] = None) -> str:
+    """Render a registry (the process-wide one by default)."""
+    return (registry or REGISTRY).render()
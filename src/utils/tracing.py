@@ -0,0 +1,369 @@
+"""
+Per-Document Tracing
+Lightweight spans around the stages of document processing, so a slow
+document can be broken down into OCR, LLM calls, parsing and writes.
+
+Each processed document gets its own trace (a random 128-bit trace ID).
+Stages inside it open child spans; spans opened outside a trace (e.g. in
+the background vector indexer) are not recorded. When a document's root
+span ends, the whole trace is appended to TRACE_FILE as one line in the
+OpenTelemetry OTLP/JSON format (an ExportTraceServiceRequest, as written by
+the collector's file exporter), so it can be replayed into any OTLP
+backend. Inspect locally with:
+
+    python main.py --mode traces --top 10
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from loguru import logger
+from config.settings import TRACE_FILE, TRACE_FILE_MAX_MB, TRACING_ENABLED
+
+SERVICE_NAME = "academic-evaluator"
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+SPAN_KIND_INTERNAL = 1
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Convert an attribute value to an OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # int64 values are strings in OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)}
+            for key, value in attributes.items() if value is not None]
+
+
+def _plain_value(value: Dict[str, Any]) -> Any:
+    """Convert an OTLP AnyValue back to a Python value."""
+    if "intValue" in value:
+        return int(value["intValue"])
+    for kind in ("stringValue", "doubleValue", "boolValue"):
+        if kind in value:
+            return value[kind]
+    return None
+
+
+def _plain_attributes(attributes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {item["key"]: _plain_value(item.get("value", {})) for item in attributes or []}
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, trace: "_Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes)
+        self.events: List[Tuple[int, str, Dict[str, Any]]] = []
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    def set_attribute(self, key: str, value: Any):
+        """Attach (or overwrite) an attribute."""
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any):
+        """Record a point-in-time event (retry, fallback, ...) on this span."""
+        self.events.append((time.time_ns(), name, attributes))
+
+    def record_exception(self, error: BaseException):
+        """Mark the span failed, with an OpenTelemetry "exception" event."""
+        self.status = STATUS_ERROR
+        self.status_message = str(error)
+        self.add_event("exception", **{
+            "exception.type": type(error).__name__,
+            "exception.message": str(error),
+        })
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {"timeUnixNano": str(at), "name": name, "attributes": _otlp_attributes(attributes)}
+                for at, name, attributes in self.events
+            ],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _Trace:
+    """Spans collected for one document until its root span ends."""
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Creates spans and appends finished traces to a JSON-lines file."""
+
+    def __init__(
+        self,
+        path: Union[str, Path] = TRACE_FILE,
+        enabled: bool = TRACING_ENABLED,
+        max_mb: float = TRACE_FILE_MAX_MB
+    ):
+        """
+        Initialize the tracer.
+
+        Args:
+            path: JSON-lines file finished traces are appended to
+            enabled: Record spans at all (disabled tracers yield None spans)
+            max_mb: Rotate the file to <name>.1<suffix> beyond this size
+        """
+        self.path = Path(path)
+        self.enabled = enabled
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.exported = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Start a new trace with a root span (a child span if one is active).
+
+        Args:
+            name: Root span name, e.g. "document"
+            **attributes: Span attributes (filename, ...)
+
+        Yields:
+            The root span, or None when tracing is disabled
+        """
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        trace = parent.trace if parent is not None else _Trace()
+        try:
+            with logger.contextualize(trace_id=trace.trace_id):
+                with self._run(trace, name, parent, attributes) as span:
+                    yield span
+        finally:
+            if parent is None:
+                self._export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Open a child span of the active span; a no-op outside a trace.
+
+        Args:
+            name: Stage name, e.g. "extraction"
+            **attributes: Span attributes
+
+        Yields:
+            The span, or None when no trace is active
+        """
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        with self._run(parent.trace, name, parent, attributes) as span:
+            yield span
+
+    @contextmanager
+    def _run(self, trace: _Trace, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Iterator[Span]:
+        span = Span(trace, name, parent.span_id if parent is not None else None, attributes)
+        trace.add(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+
+    def _export(self, trace: _Trace):
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": __name__},
+                    "spans": [span.to_otlp() for span in trace.spans],
+                }],
+            }]
+        }
+        line = json.dumps(request, default=str, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                    self.path.replace(self.path.with_suffix(".1" + self.path.suffix))
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                self.exported += 1
+        except Exception as e:
+            logger.warning(f"Could not write trace {trace.trace_id}: {e}")
+
+
+def current_span() -> Optional[Span]:
+    """The active span in this thread/task, if any."""
+    return _current_span.get()
+
+
+def add_event(name: str, **attributes: Any):
+    """Record an event on the active span (no-op outside a trace)."""
+    span = _current_span.get()
+    if span is not None:
+        span.add_event(name, **attributes)
+
+
+def load_traces(path: Union[str, Path] = TRACE_FILE) -> List[List[Dict[str, Any]]]:
+    """
+    Read exported traces, including the rotated file.
+
+    Args:
+        path: Trace file written by Tracer
+
+    Returns:
+        One list of OTLP span dicts per trace
+    """
+    path = Path(path)
+    traces = []
+    for file in (path.with_suffix(".1" + path.suffix), path):
+        if not file.exists():
+            continue
+        with open(file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                spans = [span
+                         for resource in request.get("resourceSpans", [])
+                         for scope in resource.get("scopeSpans", [])
+                         for span in scope.get("spans", [])]
+                if spans:
+                    traces.append(spans)
+    return traces
+
+
+def _seconds(span: Dict[str, Any]) -> float:
+    return (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e9
+
+
+def _label(span: Dict[str, Any]) -> str:
+    provider = _plain_attributes(span.get("attributes")).get("provider")
+    return f"{span['name']}[{provider}]" if provider else span["name"]
+
+
+def summarize_trace(spans: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Break one trace down by stage.
+
+    Args:
+        spans: OTLP span dicts of one trace
+
+    Returns:
+        Root span name, attributes, duration and status, the stage
+        breakdown (same-named siblings merged, nested stages indented by
+        depth) and event counts; None if the trace has no root span
+    """
+    roots = [span for span in spans if not span.get("parentSpanId")]
+    if not roots:
+        return None
+    root = roots[0]
+
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        if span.get("parentSpanId"):
+            children.setdefault(span["parentSpanId"], []).append(span)
+
+    breakdown: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def walk(span_id: str, path: Tuple[str, ...]):
+        for child in sorted(children.get(span_id, []), key=lambda s: int(s["startTimeUnixNano"])):
+            key = path + (_label(child),)
+            stage = breakdown.setdefault(key, {"stage": key[-1], "depth": len(path), "count": 0,
+                                               "seconds": 0.0, "errors": 0})
+            stage["count"] += 1
+            stage["seconds"] += _seconds(child)
+            stage["errors"] += child.get("status", {}).get("code") == STATUS_ERROR
+            walk(child["spanId"], key)
+
+    walk(root["spanId"], ())
+    events = TallyCounter(event["name"] for span in spans for event in span.get("events", []))
+    return {
+        "trace_id": root["traceId"],
+        "name": root["name"],
+        "attributes": _plain_attributes(root.get("attributes")),
+        "seconds": _seconds(root),
+        "status": root.get("status", {}).get("code", STATUS_UNSET),
+        "breakdown": list(breakdown.values()),
+        "events": dict(events),
+    }
+
+
+def slowest_documents(path: Union[str, Path] = TRACE_FILE, top: int = 10) -> List[Dict[str, Any]]:
+    """
+    Slowest traced documents with their stage breakdown.
+
+    Args:
+        path: Trace file written by Tracer
+        top: Number of documents to return
+
+    Returns:
+        summarize_trace() dicts, slowest first
+    """
+    summaries = [summary for summary in map(summarize_trace, load_traces(path)) if summary]
+    return sorted(summaries, key=lambda summary: -summary["seconds"])[:top]
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer